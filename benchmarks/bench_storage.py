@@ -0,0 +1,285 @@
+"""
+Замер производительности хранилища заметок.
+
+Для каждого хранилища и размера корпуса создаёт синтетический набор
+заметок и замеряет основные операции: save_note, get_all_notes,
+search_notes, filter_notes_by_date и delete_note. Выводит пропускную
+способность, задержки p50/p99 и пиковое потребление памяти (RSS).
+
+Хранилища:
+
+* ``json`` - NoteStorage без базы данных (все запросы идут в JSON-хранилище);
+* ``sqlite`` - SQLiteNoteStorage во временной папке;
+* ``postgres`` - NoteStorage на отдельной базе данных (--pg-dbname). Таблица
+  notes этой базы очищается, поэтому рабочую базу указывать нельзя.
+
+Каждый замер выполняется в отдельном процессе, чтобы пиковый RSS
+относился только к нему. Результаты можно сохранить (--save) и сравнить
+с сохранёнными ранее (--baseline): если p50 операции вырос больше чем на
+--tolerance, программа завершается с кодом 1.
+
+Пример:
+    python benchmarks/bench_storage.py --sizes 1k,10k --save baseline.json
+    python benchmarks/bench_storage.py --sizes 1k,10k --baseline baseline.json
+    python benchmarks/bench_storage.py --backends sqlite --sizes 1m --ops 50
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = [
+    'молоко', 'хлеб', 'проект', 'отчёт', 'встреча', 'звонок', 'идея', 'книга',
+    'фильм', 'спорт', 'поездка', 'подарок', 'ремонт', 'врач', 'курс', 'python',
+    'postgres', 'release', 'review', 'deadline', 'budget', 'design', 'music', 'travel',
+]
+OPERATIONS = ('save_note', 'get_all_notes', 'search_notes', 'filter_notes_by_date', 'delete_note')
+
+
+def parse_size(value: str) -> int:
+    """Разбирает размер корпуса: 1000, 10k, 1m."""
+    value = value.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(value.rstrip('km')) * multiplier
+
+
+def generate_notes(count: int, seed: int = 42):
+    """Создаёт заметки со случайными словами и датами за последние два года.
+
+    Args:
+        count (int): Количество заметок.
+        seed (int, optional): Начальное значение генератора. По умолчанию 42.
+
+    Yields:
+        Note: Новая заметка без ID.
+    """
+    from notebook.models import Note
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    for number in range(count):
+        title = ' '.join(rng.choices(WORDS, k=3))
+        content = ' '.join(rng.choices(WORDS, k=rng.randint(10, 60)))
+        created_at = now - timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+        yield Note(f"{title} {number}", content, created_at=created_at)
+
+
+class _UnavailableDatabase:
+    """База данных, к которой нельзя выполнить запрос: NoteStorage работает только с JSON."""
+
+    class _Cursor:
+        closed = False
+
+        def execute(self, *args):
+            raise ConnectionError("база данных отключена для замера")
+
+        def close(self):
+            pass
+
+    class _Connection:
+        def cursor(self, name=None):
+            return _UnavailableDatabase._Cursor()
+
+        def rollback(self):
+            pass
+
+    def get_connection(self):
+        return self._Connection()
+
+    def release_connection(self):
+        pass
+
+
+def open_storage(backend: str, workdir: str, pg_dbname: str = None):
+    """Открывает пустое хранилище выбранного типа во временной папке."""
+    from notebook.storage import NoteStorage
+
+    filename = os.path.join(workdir, 'notes.json')
+    if backend == 'json':
+        return NoteStorage(filename, flush_interval=0, db=_UnavailableDatabase())
+    if backend == 'sqlite':
+        from notebook.sqlite_storage import SQLiteNoteStorage
+        return SQLiteNoteStorage(filename, path=os.path.join(workdir, 'notes.db'), flush_interval=0)
+
+    from notebook.database import Database, connection_params_from_env
+    db = Database(**dict(connection_params_from_env(), dbname=pg_dbname))
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE notes RESTART IDENTITY")
+        conn.commit()
+    return NoteStorage(filename, flush_interval=0, db=db)
+
+
+def percentile(values, fraction: float) -> float:
+    """Перцентиль по отсортированному списку (ближайший ранг)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(func, repeats: int):
+    """Выполняет func repeats раз и возвращает задержки в миллисекундах."""
+    latencies = []
+    for attempt in range(repeats):
+        started = time.perf_counter()
+        func(attempt)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run_worker(backend: str, size: int, ops: int, pg_dbname: str = None) -> dict:
+    """Выполняет замер одного хранилища на одном размере корпуса.
+
+    Args:
+        backend (str): Тип хранилища.
+        size (int): Количество заметок в корпусе.
+        ops (int): Количество повторов быстрых операций.
+        pg_dbname (str, optional): База данных для postgres.
+
+    Returns:
+        dict: Результаты по операциям и пиковый RSS.
+    """
+    from notebook.models import Note
+
+    rng = random.Random(7)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, 'w') as devnull:
+        # Сообщения о недоступной БД (json) не должны влиять на замер
+        with contextlib.redirect_stdout(devnull):
+            storage = open_storage(backend, workdir, pg_dbname)
+            started = time.perf_counter()
+            batch = []
+            for note in generate_notes(size):
+                batch.append(note)
+                if len(batch) == 10_000:
+                    storage.import_batch(batch)
+                    batch = []
+            if batch:
+                storage.import_batch(batch)
+            storage.compact()
+            load_seconds = time.perf_counter() - started
+
+            # Полная выборка медленная на больших корпусах - повторов меньше
+            full_repeats = max(3, min(ops, 100_000 // size))
+            saved_ids = []
+            latencies = {
+                'save_note': timed(
+                    lambda i: saved_ids.append(storage.save_note(Note(f"Новая {i}", "Текст замера")).id),
+                    ops),
+                'get_all_notes': timed(lambda i: storage.get_all_notes(), full_repeats),
+                'search_notes': timed(
+                    lambda i: storage.search_notes(rng.choice(WORDS)[:4], limit=20), ops),
+            }
+            all_notes = storage.get_all_notes()
+            latencies['filter_notes_by_date'] = timed(
+                lambda i: storage.filter_notes_by_date(all_notes, 'month'), full_repeats)
+            latencies['delete_note'] = timed(lambda i: storage.delete_note(saved_ids[i]), ops)
+            storage.close()
+
+    for operation in OPERATIONS:
+        values = latencies[operation]
+        results[operation] = {
+            'p50_ms': round(statistics.median(values), 3),
+            'p99_ms': round(percentile(values, 0.99), 3),
+            'ops_per_s': round(len(values) / (sum(values) / 1000), 1),
+        }
+    return {
+        'load_notes_per_s': round(size / load_seconds, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'operations': results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Сравнивает p50 с сохранёнными результатами.
+
+    Returns:
+        list: Описания операций, которые замедлились больше чем на tolerance.
+    """
+    regressions = []
+    for key, result in results.items():
+        for operation, stats in result['operations'].items():
+            before = baseline.get(key, {}).get('operations', {}).get(operation)
+            if before and stats['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+                regressions.append(f"{key} {operation}: p50 {before['p50_ms']} -> {stats['p50_ms']} мс")
+    return regressions
+
+
+def main():
+    """Точка входа: запускает замеры в отдельных процессах и печатает отчёт."""
+    parser = argparse.ArgumentParser(description='Замер производительности хранилища заметок')
+    parser.add_argument('--backends', default='json,sqlite',
+                        help='Хранилища через запятую: json, sqlite, postgres (по умолчанию json,sqlite)')
+    parser.add_argument('--sizes', default='1k,10k', help='Размеры корпуса, например 1k,10k,100k,1m')
+    parser.add_argument('--ops', type=int, default=200, help='Повторов быстрых операций')
+    parser.add_argument('--pg-dbname', help='Отдельная база данных PostgreSQL для замера')
+    parser.add_argument('--save', metavar='ФАЙЛ', help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', metavar='ФАЙЛ', help='Сравнить с сохранёнными результатами')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Допустимое замедление p50 (доля, по умолчанию 0.2)')
+    parser.add_argument('--worker', nargs=2, metavar=('ХРАНИЛИЩЕ', 'РАЗМЕР'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, size = args.worker
+        print(json.dumps(run_worker(backend, int(size), args.ops, args.pg_dbname)))
+        return
+
+    backends = [backend.strip() for backend in args.backends.split(',')]
+    if 'postgres' in backends:
+        if not args.pg_dbname:
+            parser.error("для postgres укажите отдельную базу данных: --pg-dbname")
+        from dotenv import load_dotenv
+        load_dotenv()
+        if args.pg_dbname == os.getenv('DB_NAME'):
+            parser.error("замер очищает таблицу notes - не указывайте рабочую базу данных")
+
+    results = {}
+    for backend in backends:
+        for size in (parse_size(value) for value in args.sizes.split(',')):
+            command = [sys.executable, os.path.abspath(__file__), '--worker', backend, str(size),
+                       '--ops', str(args.ops)]
+            if args.pg_dbname:
+                command += ['--pg-dbname', args.pg_dbname]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"{backend} {size}: ошибка\n{completed.stderr}")
+                continue
+            key = f"{backend}/{size}"
+            results[key] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+            result = results[key]
+            print(f"\n{key}: загрузка {result['load_notes_per_s']:.0f} заметок/с, "
+                  f"пиковый RSS {result['peak_rss_mb']} МБ")
+            print(f"  {'операция':<22} {'p50, мс':>9} {'p99, мс':>9} {'опер./с':>10}")
+            for operation, stats in result['operations'].items():
+                print(f"  {operation:<22} {stats['p50_ms']:>9} {stats['p99_ms']:>9} "
+                      f"{stats['ops_per_s']:>10}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nЗамедление относительно базовых результатов:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nЗамедлений относительно базовых результатов нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Замер времени запуска main.py.
+
+Для каждой команды из COMMANDS запускает ``python -X importtime main.py ...``
+несколько раз в пустой временной папке (хранилище SQLite, сервер базы
+данных не нужен) и выводит медиану полного времени запуска, суммарное
+время импортов и самые тяжёлые импортированные модули.
+
+Результаты можно сохранить (--save) и сравнить с сохранёнными ранее
+(--baseline), чтобы заметить, что запуск стал медленнее.
+
+Пример:
+    python benchmarks/startup.py --runs 10 --save startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+COMMANDS = {
+    'help': ['--help'],
+    'bad-args': ['--limit', 'много'],
+    'list': ['--list', '--limit', '10'],
+    'add': ['--add', '--title', 'Замер', '--content', 'Время запуска'],
+    'search': ['--search', 'замер'],
+}
+
+
+def parse_importtime(stderr: str):
+    """Разбирает вывод -X importtime.
+
+    Args:
+        stderr (str): Вывод процесса в stderr.
+
+    Returns:
+        tuple: Суммарное время импортов верхнего уровня в микросекундах и
+        словарь {модуль: собственное время импорта}.
+    """
+    total = 0
+    own = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        own[name.strip()] = int(self_us)
+        # Модули верхнего уровня записаны без отступа
+        if not name.startswith('  '):
+            total += int(cumulative_us)
+    return total, own
+
+
+def measure(args, runs: int, workdir: str) -> dict:
+    """Запускает main.py с аргументами runs раз.
+
+    Args:
+        args (list): Аргументы командной строки main.py.
+        runs (int): Количество запусков.
+        workdir (str): Рабочая папка процесса.
+
+    Returns:
+        dict: Медианы полного времени и времени импортов (мс) и самые
+        тяжёлые модули последнего запуска.
+    """
+    env = dict(os.environ, NOTES_BACKEND='sqlite', NOTES_FLUSH_INTERVAL='0')
+    wall, imports = [], []
+    own = {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', MAIN] + args,
+                                cwd=workdir, env=env, capture_output=True, text=True)
+        wall.append((time.perf_counter() - started) * 1000)
+        total, own = parse_importtime(result.stderr)
+        imports.append(total / 1000)
+    heaviest = sorted(own.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'wall_ms': round(statistics.median(wall), 1),
+        'imports_ms': round(statistics.median(imports), 1),
+        'heaviest': [f"{name} ({us / 1000:.1f} мс)" for name, us in heaviest],
+    }
+
+
+def main():
+    """Точка входа: замеряет команды и печатает таблицу."""
+    parser = argparse.ArgumentParser(description='Замер времени запуска main.py')
+    parser.add_argument('--runs', type=int, default=5, help='Запусков на команду')
+    parser.add_argument('--save', metavar='ФАЙЛ', help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', metavar='ФАЙЛ', help='Сравнить с сохранёнными результатами')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, command in COMMANDS.items():
+            results[name] = measure(command, args.runs, workdir)
+
+    print(f"{'команда':<10} {'запуск, мс':>11} {'импорты, мс':>12} {'было, мс':>9}")
+    for name, result in results.items():
+        before = baseline.get(name, {}).get('wall_ms')
+        print(f"{name:<10} {result['wall_ms']:>11} {result['imports_ms']:>12} "
+              f"{before if before is not None else '-':>9}")
+        print(f"{'':<10} самые тяжёлые: {', '.join(result['heaviest'])}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
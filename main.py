@@ -13,9 +13,8 @@ import argparse
 # Добавляю текущую папку в путь поиска модулей, чтобы Python нашёл мои файлы
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Импортирую свои классы из пакета notebook
-from notebook.commands import NoteCommands
-from notebook.storage import NoteStorage
+# Классы из пакета notebook импортируются в main() после разбора аргументов:
+# --help и ошибки в аргументах не загружают psycopg2 и не подключаются к БД
 
 def setup_parser():
     """Настраивает парсер аргументов командной строки.
@@ -37,15 +36,55 @@ def setup_parser():
     
     # Добавляю команду для поиска заметок
     parser.add_argument('--search', type=str, 
-                       help='Найти заметки по тексту')
+                       help='Найти заметки по тексту (все слова, по началу слова)')
     
     # Добавляю команду для удаления заметки
-    parser.add_argument('--delete', type=int, 
-                       help='Удалить заметку по ID')
+    parser.add_argument('--delete', type=int, nargs='+', metavar='ID', 
+                       help='Удалить заметки по ID (можно указать несколько)')
     
     # Добавляю параметр для фильтрации по дате
     parser.add_argument('--date', type=str, 
-                       help='Фильтр по дате (today, week, month, ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ)')
+                       help='Фильтр по дате (today, week, month, year, ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ)')
+    
+    # Добавляю параметры для постраничного вывода
+    parser.add_argument('--limit', type=int, 
+                       help='Сколько заметок показать')
+    
+    parser.add_argument('--after', type=str, 
+                       help='Продолжить список после курсора, выданного предыдущей страницей')
+    
+    # Добавляю параметры запроса для поиска
+    parser.add_argument('--offset', type=int, default=0, 
+                       help='Сколько первых результатов поиска пропустить')
+    
+    parser.add_argument('--order', choices=['relevance', 'newest', 'oldest'], 
+                       help='Порядок результатов поиска (по умолчанию relevance)')
+    
+    # Добавляю команды для массового импорта и экспорта
+    parser.add_argument('--import', dest='import_path', metavar='ФАЙЛ', type=str, 
+                       help='Импортировать заметки из файла (.jsonl, .csv, .json); заметки '
+                            'получают новые ID, поэтому повторный импорт создаёт дубликаты '
+                            '(см. --keep-ids)')
+    
+    parser.add_argument('--export', dest='export_path', metavar='ФАЙЛ', type=str, 
+                       help='Экспортировать заметки в файл (.jsonl, .csv, .json)')
+    
+    parser.add_argument('--format', choices=['jsonl', 'csv', 'json'], 
+                       help='Формат файла для импорта и экспорта (по умолчанию по расширению); '
+                            'для --stats допустим только json - вывести статистику в JSON')
+    
+    parser.add_argument('--batch-size', type=int, default=1000, 
+                       help='Размер пачки при импорте')
+    
+    parser.add_argument('--keep-ids', action='store_true', 
+                       help='При импорте сохранить ID из файла и пропустить заметки, '
+                            'чьи ID уже есть (повторный импорт выгрузки без дубликатов)')
+    
+    # Добавляю статистику: количество и объём заметок по дням, месяцам или годам
+    parser.add_argument('--stats', nargs='?', const='month', 
+                       choices=['day', 'month', 'year'], 
+                       help='Показать статистику заметок с разбивкой по day, month '
+                            '(по умолчанию) или year')
     
     # Добавляю параметры для создания заметки
     parser.add_argument('--title', type=str, 
@@ -54,8 +93,115 @@ def setup_parser():
     parser.add_argument('--content', type=str, 
                        help='Текст заметки')
     
+    # Добавляю фоновый режим: демон держит хранилище открытым между командами
+    parser.add_argument('--serve', action='store_true', 
+                       help='Запустить демон, который выполняет команды через сокет')
+    
+    parser.add_argument('--socket', type=str, default='notes.sock', 
+                       help='Путь к сокету демона (по умолчанию notes.sock)')
+    
+    # Добавляю профилирование: после команды печатается разбивка времени и счётчики
+    parser.add_argument('--profile', nargs='?', const='text', 
+                       choices=['text', 'prometheus', 'json'], 
+                       help='Замерить команду и вывести метрики в stderr: text (по умолчанию), '
+                            'prometheus или json. Команда выполняется без демона')
+    
     return parser
 
+def parse_args(parser, argv=None):
+    """Разбирает аргументы и проверяет сочетания, которые argparse не проверяет сам.
+    
+    Args:
+        parser (argparse.ArgumentParser): Парсер из setup_parser.
+        argv (list, optional): Аргументы. По умолчанию sys.argv[1:].
+    
+    Returns:
+        argparse.Namespace: Разобранные аргументы.
+    """
+    args = parser.parse_args(argv)
+    
+    # Статистика выводится только текстом или в JSON: jsonl и csv молча не игнорирую
+    if (args.stats and args.format in ('jsonl', 'csv')
+            and not (args.import_path or args.export_path)):
+        parser.error(f"--stats не поддерживает --format {args.format}, допустим только json")
+    
+    return args
+
+def run_command(args, commands):
+    """Выполняет команду, выбранную аргументами командной строки.
+    
+    Args:
+        args (argparse.Namespace): Разобранные аргументы.
+        commands (NoteCommands): Обработчик команд.
+    """
+    # Проверяю какую команду ввёл пользователь и выполняю её
+    if args.add:
+        # Команда добавления заметки
+        if not args.title or not args.content:
+            print("Ошибка: для добавления заметки нужно указать --title и --content")
+            return
+        
+        # Вызываю метод добавления заметки
+        commands.add_note(args.title, args.content)
+    
+    elif args.list:
+        # Команда показа всех заметок
+        commands.list_notes(args.date, limit=args.limit, after=args.after)
+    
+    elif args.search:
+        # Команда поиска заметок
+        commands.search_notes(args.search, args.date, limit=args.limit,
+                              offset=args.offset, order=args.order)
+    
+    elif args.delete:
+        # Команда удаления заметки (или нескольких одной пачкой)
+        if len(args.delete) == 1:
+            commands.delete_note(args.delete[0])
+        else:
+            commands.delete_notes(args.delete)
+    
+    elif args.import_path:
+        # Команда импорта заметок
+        commands.import_notes(args.import_path, args.format, args.batch_size, args.keep_ids)
+    
+    elif args.export_path:
+        # Команда экспорта заметок
+        commands.export_notes(args.export_path, args.format, args.date)
+    
+    elif args.stats:
+        # Команда статистики заметок
+        commands.show_stats(args.stats, args.format)
+
+def serve(parser, socket_path):
+    """Запускает демон: хранилище и кэши остаются открытыми между командами.
+    
+    Args:
+        parser (argparse.ArgumentParser): Парсер для аргументов от клиентов.
+        socket_path (str): Путь к сокету.
+    """
+    from notebook.backends import create_storage
+    from notebook.cache import CachedNoteStorage
+    from notebook.commands import NoteCommands
+    from notebook.daemon import serve as serve_socket
+    
+    commands = NoteCommands(CachedNoteStorage(create_storage()))
+    serve_socket(lambda argv: run_command(parse_args(parser, argv), commands), socket_path)
+
+def print_profile(fmt):
+    """Печатает собранные метрики в stderr.
+    
+    Args:
+        fmt (str): Формат: text, prometheus или json.
+    """
+    from notebook.metrics import registry
+    
+    if fmt == 'prometheus':
+        print(registry.to_prometheus(), end='', file=sys.stderr)
+    elif fmt == 'json':
+        print(registry.to_json(), file=sys.stderr)
+    else:
+        print(registry.report(), file=sys.stderr)
+
 def main():
     """Главная функция программы.
     
@@ -66,41 +212,47 @@ def main():
     parser = setup_parser()
     
     # Разбираю аргументы которые ввёл пользователь
-    args = parser.parse_args()
+    args = parse_args(parser)
+    
+    if args.serve:
+        serve(parser, args.socket)
+        return
+    
+    if not (args.add or args.list or args.search or args.delete
+            or args.import_path or args.export_path or args.stats):
+        # Если команда не распознана - показываю справку, хранилище не нужно
+        print("Неизвестная команда. Доступные команды:")
+        parser.print_help()
+        return
+    
+    if args.profile:
+        # Метрики собираются только по запросу: замеры стоят времени
+        from notebook.metrics import registry
+        registry.enable()
+    
+    elif args.add or args.list or args.search or args.delete or args.stats:
+        # Если запущен демон - передаю команду ему и печатаю ответ
+        from notebook.daemon import send_command
+        output = send_command(sys.argv[1:], args.socket)
+        if output is not None:
+            print(output, end='')
+            return
+    
+    from notebook.backends import create_storage
+    from notebook.commands import NoteCommands
     
     try:
-        # Создаю объект для работы с файлом заметок
-        storage = NoteStorage()
+        # Создаю хранилище заметок (PostgreSQL или SQLite, см. NOTES_BACKEND)
+        storage = create_storage()
         
         # Создаю объект для выполнения команд
         commands = NoteCommands(storage)
+        run_command(args, commands)
         
-        # Проверяю какую команду ввёл пользователь и выполняю её
-        if args.add:
-            # Команда добавления заметки
-            if not args.title or not args.content:
-                print("Ошибка: для добавления заметки нужно указать --title и --content")
-                return
-            
-            # Вызываю метод добавления заметки
-            commands.add_note(args.title, args.content)
-        
-        elif args.list:
-            # Команда показа всех заметок
-            commands.list_notes(args.date)
-        
-        elif args.search:
-            # Команда поиска заметок
-            commands.search_notes(args.search, args.date)
-        
-        elif args.delete:
-            # Команда удаления заметки
-            commands.delete_note(args.delete)
-        
-        else:
-            # Если команда не распознана - показываю справку
-            print("Неизвестная команда. Доступные команды:")
-            parser.print_help()
+        if args.profile:
+            # Дожидаюсь записи JSON-хранилища, чтобы она попала в замер
+            storage.close()
+            print_profile(args.profile)
     
     except Exception as e:
         # Ловлю все возможные ошибки чтобы программа не "упала"
@@ -0,0 +1,111 @@
+"""
+Модуль асинхронных команд.
+
+Содержит класс AsyncNoteCommands - вариант NoteCommands для программ на
+asyncio, работающий с AsyncNoteStorage. Команды выводят те же сообщения,
+что и NoteCommands.
+"""
+
+from .async_storage import AsyncNoteStorage
+from .models import Note
+
+
+class AsyncNoteCommands:
+    """Класс для обработки команд пользователя в цикле событий asyncio.
+
+    Attributes:
+        storage (AsyncNoteStorage): Открытое асинхронное хранилище заметок.
+    """
+
+    def __init__(self, storage: AsyncNoteStorage):
+        """Инициализирует обработчик команд.
+
+        Args:
+            storage (AsyncNoteStorage): Открытое асинхронное хранилище.
+        """
+        self.storage = storage
+
+    async def add_note(self, title: str, content: str):
+        """Добавляет новую заметку.
+
+        Args:
+            title (str): Заголовок заметки.
+            content (str): Текст заметки.
+
+        Raises:
+            ValueError: Если заголовок или содержание пустые.
+        """
+        if not title or not content:
+            raise ValueError("Заголовок и содержание обязательны!")
+
+        saved_note = await self.storage.save_note(Note(title=title, content=content))
+        print(f"Заметка добавлена успешно! (ID: {saved_note.id})")
+
+    async def list_notes(self, date_filter: str = None):
+        """Показывает заметки с возможностью фильтрации по дате.
+
+        Args:
+            date_filter (str, optional): Фильтр по дате. По умолчанию None.
+        """
+        notes = await self.storage.get_all_notes(date_filter=date_filter)
+
+        if not notes:
+            if date_filter:
+                print(f"Заметок за {date_filter} не найдено.")
+            else:
+                print("Заметок пока нет. Создайте первую!")
+            return
+
+        for note in notes:
+            print(f"ID: {note.id}")
+            print(f"Заголовок: {note.title}")
+            print(f"Содержание: {note.content}")
+            print(f"Создана: {note.created_at[:16]}")
+            print("-" * 30)
+
+        if date_filter:
+            print(f"Я нашёл {len(notes)} заметок за {date_filter}")
+        else:
+            print(f"Я нашёл {len(notes)} заметок")
+
+    async def search_notes(self, query: str, date_filter: str = None, limit: int = None):
+        """Ищет заметки по тексту в заголовке или содержании.
+
+        Args:
+            query (str): Текст для поиска.
+            date_filter (str, optional): Фильтр по дате. По умолчанию None.
+            limit (int, optional): Сколько самых релевантных заметок показать.
+                По умолчанию все.
+        """
+        if not query:
+            print("Введите текст для поиска!")
+            return
+
+        notes = await self.storage.search_notes(query, date_filter=date_filter, limit=limit)
+
+        if not notes:
+            if date_filter:
+                print(f"По запросу '{query}' за {date_filter} я ничего не нашёл")
+            else:
+                print(f"По запросу '{query}' я ничего не нашёл")
+            return
+
+        if date_filter:
+            print(f"Я нашёл {len(notes)} заметок по запросу '{query}' за {date_filter}:")
+        else:
+            print(f"Я нашёл {len(notes)} заметок по запросу '{query}':")
+
+        for note in notes:
+            print(f"ID: {note.id} - {note.title}")
+            print(f"   {note.content[:60]}...")
+
+    async def delete_note(self, note_id: int):
+        """Удаляет заметку по ID.
+
+        Args:
+            note_id (int): ID заметки для удаления.
+        """
+        if await self.storage.delete_note(note_id):
+            print(f"Заметка ID {note_id} удалена")
+        else:
+            print(f"Заметка с ID {note_id} не найдена")
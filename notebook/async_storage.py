@@ -0,0 +1,239 @@
+"""
+Модуль асинхронного хранилища заметок.
+
+Содержит класс AsyncNoteStorage с тем же набором методов, что и у
+NoteStorage (save_note, get_all_notes, search_notes, delete_note), но
+с корутинами вместо блокирующих вызовов. Запросы к PostgreSQL идут через
+пул asyncpg, а работа с JSON-хранилищем (журнал и индексы) выполняется в
+пуле потоков, чтобы не останавливать цикл событий.
+
+asyncpg - необязательная зависимость: без него модуль импортируется, но
+открыть хранилище без готового пула нельзя.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from functools import partial
+from typing import List, Optional
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - зависит от окружения
+    asyncpg = None
+
+from .database import connection_params_from_env
+from .models import Note
+from .query import NoteQuery, SQLPlanner
+from .storage import NoteStorage
+
+_planner = SQLPlanner()
+
+
+def _aware(value: datetime) -> datetime:
+    """Добавляет к дате местный часовой пояс, если его нет.
+
+    psycopg2 передаёт дату без пояса как местное время сервера, а asyncpg -
+    как UTC, поэтому перед запросом пояс указывается явно.
+    """
+    return value if value.tzinfo is not None else value.astimezone()
+
+
+def _numbered(sql: str) -> str:
+    """Заменяет параметры %s на $1, $2, ... для asyncpg."""
+    parts = sql.split('%s')
+    return parts[0] + ''.join(f"${number}{part}" for number, part in enumerate(parts[1:], 1))
+
+
+class AsyncNoteStorage:
+    """Асинхронное хранилище заметок в PostgreSQL и JSON-файле.
+
+    Перед использованием хранилище нужно открыть (await open() или
+    async with). JSON-хранилище и подписчики берутся из обычного
+    NoteStorage, который создаётся при открытии; при ошибке базы данных
+    заметки, как и в NoteStorage, читаются из JSON-хранилища.
+
+    Attributes:
+        filename (str): Имя файла для хранения заметок.
+        pool: Пул подключений asyncpg.
+        storage (NoteStorage): Синхронное хранилище для работы с JSON-файлом.
+    """
+
+    def __init__(self, filename: str = "notes.json", pool=None,
+                 executor: Optional[Executor] = None, min_size: int = 1,
+                 max_size: int = 10, **connect_params):
+        """Инициализирует хранилище. Подключения открываются в open().
+
+        Args:
+            filename (str, optional): Имя файла для хранения. По умолчанию "notes.json".
+            pool (optional): Готовый пул asyncpg. По умолчанию создаётся в open().
+            executor (Executor, optional): Пул потоков для работы с файлами.
+                По умолчанию пул цикла событий.
+            min_size (int, optional): Минимальный размер пула. По умолчанию 1.
+            max_size (int, optional): Максимальный размер пула. По умолчанию 10.
+            **connect_params: Параметры подключения. По умолчанию берутся из .env.
+        """
+        self.filename = filename
+        self.pool = pool
+        self.storage: Optional[NoteStorage] = None
+        self.executor = executor
+        self.min_size = min_size
+        self.max_size = max_size
+        self.connect_params = connect_params or connection_params_from_env()
+
+    async def _run(self, func, *args, **kwargs):
+        """Выполняет блокирующую функцию в пуле потоков."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def open(self) -> 'AsyncNoteStorage':
+        """Создаёт схему, JSON-хранилище и пул подключений.
+
+        Returns:
+            AsyncNoteStorage: Это же хранилище.
+
+        Raises:
+            ImportError: Если пул не передан, а asyncpg не установлен.
+        """
+        if self.pool is None and asyncpg is None:
+            raise ImportError("Для асинхронного хранилища нужен asyncpg: pip install asyncpg")
+
+        # NoteStorage один раз создаёт схему базы данных и открывает журнал
+        self.storage = await self._run(NoteStorage, self.filename)
+
+        if self.pool is None:
+            params = dict(self.connect_params)
+            params['database'] = params.pop('dbname', None)
+            if params.get('port'):
+                params['port'] = int(params['port'])
+            self.pool = await asyncpg.create_pool(
+                min_size=self.min_size, max_size=self.max_size,
+                **{k: v for k, v in params.items() if v is not None}
+            )
+        return self
+
+    async def close(self):
+        """Закрывает пул подключений и записывает очередь JSON-хранилища."""
+        if self.storage is not None:
+            await self._run(self.storage.close)
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def __aenter__(self) -> 'AsyncNoteStorage':
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def add_listener(self, listener):
+        """Подписывает объект на изменения заметок (см. NoteStorage.add_listener)."""
+        self.storage.add_listener(listener)
+
+    async def get_all_notes(self, date_filter: Optional[str] = None) -> List[Note]:
+        """Получает все заметки в виде объектов Note.
+
+        Args:
+            date_filter (str, optional): Фильтр даты. По умолчанию None.
+
+        Returns:
+            List[Note]: Список объектов заметок.
+        """
+        try:
+            query = NoteQuery().dated(date_filter)
+        except ValueError:
+            return []
+        return await self.query(query)
+
+    async def search_notes(self, query: str, date_filter: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[Note]:
+        """Ищет заметки по тексту в заголовке или содержании.
+
+        Запрос тот же, что в NoteStorage.search_notes.
+
+        Args:
+            query (str): Текст для поиска.
+            date_filter (str, optional): Фильтр даты. По умолчанию None.
+            limit (int, optional): Сколько самых релевантных заметок вернуть.
+                По умолчанию все.
+
+        Returns:
+            List[Note]: Список найденных заметок.
+        """
+        try:
+            note_query = NoteQuery(text=query, limit=limit).dated(date_filter)
+        except ValueError:
+            return []
+        return await self.query(note_query)
+
+    async def query(self, query: NoteQuery) -> List[Note]:
+        """Выполняет составной запрос (см. NoteStorage.query).
+
+        Args:
+            query (NoteQuery): Запрос.
+
+        Returns:
+            List[Note]: Найденные заметки в порядке запроса.
+        """
+        if query.matches_nothing:
+            return []
+        sql, params = _planner.plan(query)
+        params = [_aware(param) if isinstance(param, datetime) else param for param in params]
+
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(_numbered(sql), *params)
+            return [Note.from_db_row(row) for row in rows]
+        except Exception as e:
+            print(f"Ошибка при получении заметок из БД: {e}")
+            # Если ошибка с БД, выполняем запрос по индексам JSON-хранилища
+            return await self._run(self.storage._query_json, query)
+
+    async def save_note(self, note: Note) -> Note:
+        """Сохраняет заметку в базу данных и JSON-хранилище.
+
+        Args:
+            note (Note): Объект заметки для сохранения.
+
+        Returns:
+            Note: Сохранённая заметка с присвоенным ID.
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                if note.id is None:
+                    note.id = await conn.fetchval(
+                        "INSERT INTO notes (title, content, created_at) VALUES ($1, $2, $3) RETURNING id",
+                        note.title, note.content, _aware(note.created_datetime)
+                    )
+                else:
+                    await conn.execute(
+                        "UPDATE notes SET title = $1, content = $2 WHERE id = $3",
+                        note.title, note.content, note.id
+                    )
+        except Exception as e:
+            print(f"Ошибка при сохранении заметки в БД: {e}")
+
+        await self._run(self.storage._mirror_saved, [note])
+        return note
+
+    async def delete_note(self, note_id: int) -> bool:
+        """Удаляет заметку по ID.
+
+        Args:
+            note_id (int): ID заметки для удаления.
+
+        Returns:
+            bool: True если удаление успешно, False если заметка не найдена.
+        """
+        db_deleted = False
+        try:
+            async with self.pool.acquire() as conn:
+                db_deleted = await conn.fetchval(
+                    "DELETE FROM notes WHERE id = $1 RETURNING id", note_id
+                ) is not None
+        except Exception as e:
+            print(f"Ошибка при удалении заметки из БД: {e}")
+
+        deleted = await self._run(self.storage._mirror_deleted, [note_id],
+                                  {note_id} if db_deleted else set())
+        return bool(deleted)
@@ -0,0 +1,47 @@
+"""
+Модуль выбора хранилища заметок.
+
+Хранилище - объект с интерфейсом NoteStorage: get_all_notes, get_note, query,
+iter_notes, search_notes, save_note, save_many, import_batch, copy_out,
+delete_note, delete_many, note_stats, changes_since, add_listener и close. Все хранилища держат
+копию заметок в JSON-файле. Доступные хранилища:
+
+* ``postgres`` - NoteStorage, основная база данных PostgreSQL;
+* ``sqlite`` - SQLiteNoteStorage, локальный файл SQLite без сервера.
+
+Хранилище выбирается переменной окружения NOTES_BACKEND (по умолчанию
+postgres); путь к файлу SQLite задаёт NOTES_SQLITE_PATH. Модуль
+выбранного хранилища импортируется только при создании хранилища.
+"""
+
+import os
+from typing import Optional
+
+BACKENDS = ('postgres', 'sqlite')
+
+
+def create_storage(filename: str = "notes.json", backend: Optional[str] = None):
+    """Создаёт хранилище заметок выбранного типа.
+
+    Args:
+        filename (str, optional): Имя JSON-файла. По умолчанию "notes.json".
+        backend (str, optional): Тип хранилища из BACKENDS. По умолчанию
+            берётся из переменной окружения NOTES_BACKEND.
+
+    Returns:
+        NoteStorage: Хранилище заметок.
+
+    Raises:
+        ValueError: Если тип хранилища неизвестен.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    backend = (backend or os.getenv('NOTES_BACKEND') or 'postgres').lower()
+    if backend == 'postgres':
+        from .storage import NoteStorage
+        return NoteStorage(filename)
+    if backend == 'sqlite':
+        from .sqlite_storage import SQLiteNoteStorage
+        return SQLiteNoteStorage(filename, path=os.getenv('NOTES_SQLITE_PATH', 'notes.db'))
+    raise ValueError(f"Неизвестное хранилище: {backend} (доступны: {', '.join(BACKENDS)})")
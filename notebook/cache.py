@@ -0,0 +1,253 @@
+"""
+Модуль кэширования запросов к хранилищу заметок.
+
+Содержит класс LRUCache (кэш с ограничением размера и временем жизни
+записей) и класс CachedNoteStorage - обёртку над NoteStorage, которая
+кэширует списки заметок, результаты поиска и отдельные заметки.
+Из кэша выдаются копии заметок, поэтому изменение полученной заметки не
+меняет закэшированную.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+from .metrics import registry as metrics
+from .models import Note
+from .query import NoteQuery
+from .storage import NoteStorage
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Кэш с вытеснением давно не использованных записей и временем жизни.
+
+    Attributes:
+        maxsize (int): Максимальное количество записей.
+        ttl (float): Время жизни записи в секундах.
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        """Инициализирует пустой кэш.
+
+        Args:
+            maxsize (int, optional): Максимальное количество записей. По умолчанию 256.
+            ttl (float, optional): Время жизни записи в секундах. По умолчанию 60.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Количество записей в кэше."""
+        return len(self._data)
+
+    def get(self, key: Hashable, default=None):
+        """Возвращает значение по ключу и отмечает его как недавно использованное.
+
+        Args:
+            key (Hashable): Ключ.
+            default: Значение при промахе. По умолчанию None.
+
+        Returns:
+            Значение из кэша или default.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value):
+        """Сохраняет значение, вытесняя самую давнюю запись при переполнении.
+
+        Args:
+            key (Hashable): Ключ.
+            value: Значение.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """Удаляет запись по ключу, если она есть.
+
+        Args:
+            key (Hashable): Ключ.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_kinds(self, *kinds: str):
+        """Удаляет записи, у которых первый элемент ключа входит в kinds.
+
+        Args:
+            *kinds (str): Виды записей, например 'all' или 'search'.
+        """
+        with self._lock:
+            for key in [key for key in self._data if key[0] in kinds]:
+                del self._data[key]
+
+    def clear(self):
+        """Очищает кэш."""
+        with self._lock:
+            self._data.clear()
+
+
+class CachedNoteStorage:
+    """Хранилище заметок с кэшем запросов на чтение.
+
+    Кэшируются get_all_notes, search_notes, query и get_note. При сохранении или
+    удалении заметки из кэша удаляется запись этой заметки и все списки и
+    результаты поиска; записи других заметок остаются.
+
+    Изменения из других процессов отслеживаются двумя способами:
+    уведомлениями PostgreSQL (LISTEN notes_changed, их отправляет триггер
+    на таблице notes) и отметкой файлов JSON-хранилища (размер и время
+    изменения notes.json и журнала). Остальные методы NoteStorage
+    вызываются напрямую.
+
+    Attributes:
+        storage (NoteStorage): Исходное хранилище.
+        cache (LRUCache): Кэш результатов.
+    """
+
+    def __init__(self, storage: NoteStorage, maxsize: int = 256, ttl: float = 60.0,
+                 listen: bool = True):
+        """Инициализирует кэширующее хранилище.
+
+        Args:
+            storage (NoteStorage): Исходное хранилище.
+            maxsize (int, optional): Максимальное количество записей кэша. По умолчанию 256.
+            ttl (float, optional): Время жизни записи в секундах. По умолчанию 60.
+            listen (bool, optional): Подписаться на уведомления PostgreSQL, если
+                база данных их поддерживает (у SQLite метода listen нет).
+                По умолчанию True.
+        """
+        self.storage = storage
+        self.cache = LRUCache(maxsize, ttl)
+        self._listener = None
+        subscribe = getattr(storage.db, 'listen', None)
+        if listen and subscribe is not None:
+            # psycopg2 нужен только базе данных с уведомлениями (PostgreSQL)
+            import psycopg2
+            try:
+                self._listener = subscribe('notes_changed')
+            except psycopg2.Error as e:
+                print(f"Уведомления об изменениях недоступны, кэш проверяет только файлы: {e}")
+        self._stamp = self._files_stamp()
+        storage.add_listener(self)
+
+    def __getattr__(self, name):
+        """Остальные методы берутся из исходного хранилища."""
+        return getattr(self.storage, name)
+
+    def _files_stamp(self) -> tuple:
+        """Отметка файлов JSON-хранилища: размер и время изменения."""
+        stamp = []
+        for path in (self.storage.filename, self.storage.journal.journal_path):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _check_external_changes(self):
+        """Очищает кэш, если заметки изменил другой процесс."""
+        changed = False
+        if self._listener is not None:
+            try:
+                self._listener.poll()
+                if self._listener.notifies:
+                    self._listener.notifies.clear()
+                    changed = True
+            except Exception:
+                # Подписка оборвалась - дальше полагаемся на отметку файлов и TTL
+                self._listener = None
+                changed = True
+
+        stamp = self._files_stamp()
+        if stamp != self._stamp:
+            self._stamp = stamp
+            changed = True
+
+        if changed:
+            self.cache.clear()
+
+    def _cached(self, key: tuple, load):
+        """Возвращает значение из кэша или загружает его."""
+        self._check_external_changes()
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            metrics.inc('notebook_cache_misses_total', kind=key[0])
+            value = load()
+            self.cache.put(key, value)
+        else:
+            metrics.inc('notebook_cache_hits_total', kind=key[0])
+        return value
+
+    def get_all_notes(self, date_filter: Optional[str] = None) -> List[Note]:
+        """Получает все заметки (с кэшем), см. NoteStorage.get_all_notes."""
+        return _copies(self._cached(('all', date_filter),
+                                    lambda: self.storage.get_all_notes(date_filter=date_filter)))
+
+    def search_notes(self, query: str, date_filter: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[Note]:
+        """Ищет заметки (с кэшем), см. NoteStorage.search_notes."""
+        return _copies(self._cached(('search', query, date_filter, limit),
+                                    lambda: self.storage.search_notes(query, date_filter=date_filter,
+                                                                      limit=limit)))
+
+    def query(self, query: NoteQuery) -> List[Note]:
+        """Выполняет составной запрос (с кэшем), см. NoteStorage.query."""
+        return _copies(self._cached(('query',) + query.key(), lambda: self.storage.query(query)))
+
+    def get_note(self, note_id: int) -> Optional[Note]:
+        """Получает одну заметку (с кэшем), см. NoteStorage.get_note."""
+        note = self._cached(('note', note_id), lambda: self.storage.get_note(note_id))
+        return note.copy() if note is not None else None
+
+    def on_saved(self, notes: List[Note]):
+        """Удаляет из кэша записи, которые могли измениться после сохранения."""
+        self._invalidate(note.id for note in notes)
+
+    def on_deleted(self, note_ids: List[int]):
+        """Удаляет из кэша записи, которые могли измениться после удаления."""
+        self._invalidate(note_ids)
+
+    def _invalidate(self, note_ids):
+        """Удаляет записи заметок и все списки и результаты поиска."""
+        for note_id in note_ids:
+            self.cache.pop(('note', note_id))
+        self.cache.discard_kinds('all', 'search', 'query')
+        # Собственные изменения уже учтены - запоминаем новую отметку файлов
+        self._stamp = self._files_stamp()
+
+    def stats(self) -> dict:
+        """Возвращает счётчики кэша.
+
+        Returns:
+            dict: Попадания, промахи и текущий размер кэша.
+        """
+        return {'hits': self.cache.hits, 'misses': self.cache.misses, 'size': len(self.cache)}
+
+
+def _copies(notes: List[Note]) -> List[Note]:
+    """Копии закэшированных заметок (см. Note.copy)."""
+    return [note.copy() for note in notes]
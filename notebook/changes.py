@@ -0,0 +1,254 @@
+"""
+Модуль ленты изменений заметок.
+
+Каждое изменение заметки получает номер (change_seq), который только
+растёт: добавление и изменение записывают номер в саму заметку вместе с
+updated_at, удаление оставляет надгробие (tombstone) - ID удалённой
+заметки с номером удаления. Потребитель (реплика, кэш, выгрузка) хранит
+номер последнего полученного изменения и запрашивает только то, что
+изменилось после него (NoteStorage.changes_since), вместо того чтобы
+перечитывать весь блокнот.
+
+Номера выдаются каждым хранилищем свои: в PostgreSQL - ID транзакции
+изменения (у изменений одной транзакции номер общий), в SQLite - базой
+данных, в JSON-хранилище - журналом (по часам в микросекундах, но
+не меньше предыдущего номера + 1, поэтому номер растёт, даже если
+состояние построено заново). Номер из одного источника к другому не
+применяется - для этого у ChangeSet есть поле source.
+
+Содержит классы Change и ChangeSet (результат changes_since) и индекс
+ChangeLog, который ведёт ленту JSON-хранилища.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Note
+from .sidecar import SidecarIndex
+
+# Номер изменения заметок, записанных до появления ленты: при полной
+# синхронизации (с номера 0) они выдаются вместе с остальными
+LEGACY_SEQ = 1
+
+
+class Change:
+    """Одно изменение ленты.
+
+    Attributes:
+        seq (int): Номер изменения.
+        note_id (int): ID заметки.
+        note (Note): Заметка после изменения или None, если она удалена.
+        updated_at (str): Время изменения или удаления в формате ISO (None,
+            если неизвестно).
+    """
+
+    __slots__ = ('seq', 'note_id', 'note', 'updated_at')
+
+    def __init__(self, seq: int, note_id: int, note: Optional[Note] = None,
+                 updated_at: Optional[str] = None):
+        self.seq = seq
+        self.note_id = note_id
+        self.note = note
+        self.updated_at = updated_at
+
+    @property
+    def deleted(self) -> bool:
+        """Удалена ли заметка."""
+        return self.note is None
+
+    def __repr__(self) -> str:
+        return f"Change(seq={self.seq}, note_id={self.note_id}, deleted={self.deleted})"
+
+
+class ChangeSet:
+    """Изменения после указанного номера, по возрастанию номера.
+
+    Attributes:
+        changes (List[Change]): Изменения.
+        last_seq (int): Номер, с которого запрашивать следующие изменения.
+        source (str): Источник номеров: database или json.
+        complete (bool): False, если часть надгробий до этого номера
+            потеряна (JSON-хранилище построено заново) - тогда потребителю
+            нужна полная синхронизация с номера 0.
+    """
+
+    def __init__(self, changes: List[Change], since: int, source: str, complete: bool = True):
+        """Инициализирует набор изменений.
+
+        Args:
+            changes (List[Change]): Изменения по возрастанию номера.
+            since (int): Номер, после которого они запрошены.
+            source (str): Источник номеров.
+            complete (bool, optional): Все ли удаления после since известны.
+        """
+        self.changes = changes
+        self.last_seq = changes[-1].seq if changes else since
+        self.source = source
+        self.complete = complete
+
+    @property
+    def notes(self) -> List[Note]:
+        """Добавленные и изменённые заметки."""
+        return [change.note for change in self.changes if not change.deleted]
+
+    @property
+    def deleted(self) -> List[int]:
+        """ID удалённых заметок."""
+        return [change.note_id for change in self.changes if change.deleted]
+
+
+def note_seq(note_data: dict) -> int:
+    """Номер изменения заметки JSON-хранилища."""
+    return note_data.get('change_seq', LEGACY_SEQ)
+
+
+class ChangeLog(SidecarIndex):
+    """Лента изменений JSON-хранилища.
+
+    Индекс подключается к журналу, как SearchIndex и DateIndex: add и
+    remove получают заметки, а надгробия журнал передаёт в tombstone.
+    Хранит пары (номер, ID) живых заметок и надгробий по возрастанию
+    номера, поэтому изменения после номера находятся бинарным поиском.
+    Надгробия сохраняются вместе с индексом и не удаляются.
+
+    Attributes:
+        path (str): Путь к файлу индекса.
+        horizon (int): Номер, до которого надгробия могут быть потеряны
+            (индекс построен заново по снимку); 0 - всё известно.
+    """
+
+    def _clear(self):
+        """Сбрасывает ленту в пустое состояние."""
+        self.horizon = 0
+        self._entries: List[Tuple[int, int]] = []
+        self._seqs: Dict[int, int] = {}
+        self._tombstones: List[Tuple[int, int]] = []
+        self._deleted: Dict[int, int] = {}
+
+    @property
+    def max_seq(self) -> int:
+        """Наибольший выданный номер (не меньше horizon)."""
+        last = max(self._entries[-1][0] if self._entries else 0,
+                   self._tombstones[-1][0] if self._tombstones else 0)
+        return max(last, self.horizon)
+
+    def add(self, note_data: dict):
+        """Учитывает добавление или изменение заметки.
+
+        Args:
+            note_data (dict): Словарь с данными заметки.
+        """
+        note_id = note_data['id']
+        self.remove(note_id)
+        self._forget_tombstone(note_id)
+        seq = note_seq(note_data)
+        insort(self._entries, (seq, note_id))
+        self._seqs[note_id] = seq
+
+    @staticmethod
+    def extract_shard(notes_data: Iterable[dict]) -> List[Tuple[int, int]]:
+        """Собирает пары (номер, ID) части заметок для merge (в отдельном процессе).
+
+        Args:
+            notes_data (Iterable[dict]): Словари с данными заметок.
+
+        Returns:
+            List[Tuple[int, int]]: Пары по возрастанию номера.
+        """
+        return sorted((note_seq(note_data), note_data['id']) for note_data in notes_data)
+
+    def merge(self, parts: List[List[Tuple[int, int]]]):
+        """Добавляет в индекс результаты extract_shard.
+
+        Args:
+            parts (List[List[Tuple[int, int]]]): Результаты extract_shard.
+        """
+        for part in parts:
+            for _, note_id in part:
+                self.remove(note_id)
+                self._forget_tombstone(note_id)
+        self._entries = list(heapq.merge(self._entries, *parts))
+        for part in parts:
+            self._seqs.update((note_id, seq) for seq, note_id in part)
+
+    def remove(self, note_id: int):
+        """Убирает заметку из живых (надгробие ставит tombstone).
+
+        Args:
+            note_id (int): ID заметки.
+        """
+        seq = self._seqs.pop(note_id, None)
+        if seq is not None:
+            del self._entries[bisect_left(self._entries, (seq, note_id))]
+
+    def tombstone(self, note_id: int, seq: int):
+        """Записывает удаление заметки.
+
+        Args:
+            note_id (int): ID заметки.
+            seq (int): Номер удаления.
+        """
+        self.remove(note_id)
+        self._forget_tombstone(note_id)
+        insort(self._tombstones, (seq, note_id))
+        self._deleted[note_id] = seq
+
+    def _forget_tombstone(self, note_id: int):
+        """Убирает надгробие заметки, если она добавлена снова."""
+        seq = self._deleted.pop(note_id, None)
+        if seq is not None:
+            del self._tombstones[bisect_left(self._tombstones, (seq, note_id))]
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[Tuple[int, int, bool]]:
+        """Изменения с номером больше seq.
+
+        Args:
+            seq (int): Номер последнего полученного изменения.
+            limit (int, optional): Максимальное количество изменений.
+
+        Returns:
+            List[Tuple[int, int, bool]]: (номер, ID, удалена ли) по возрастанию номера.
+        """
+        def after(entries, deleted):
+            for position in range(bisect_left(entries, (seq + 1,)), len(entries)):
+                entry_seq, note_id = entries[position]
+                yield entry_seq, note_id, deleted
+
+        merged = heapq.merge(after(self._entries, False), after(self._tombstones, True))
+        return list(islice(merged, limit))
+
+    def complete(self, seq: int) -> bool:
+        """Известны ли все удаления после номера seq (см. ChangeSet.complete)."""
+        return seq == 0 or seq >= self.horizon
+
+    def load(self, stamp) -> bool:
+        """Загружает ленту из файла, если она построена по тому же снимку.
+
+        Если ленту нужно построить заново, надгробия, вошедшие в снимок,
+        потеряны: horizon становится временем записи снимка (в микросекундах,
+        как номера журнала).
+
+        Args:
+            stamp: Отметка текущего снимка (размер и время изменения в наносекундах).
+
+        Returns:
+            bool: True если лента загружена, False если её нужно построить заново.
+        """
+        if super().load(stamp):
+            return True
+        self.horizon = stamp[1] // 1000
+        return False
+
+    def _serialize(self) -> dict:
+        """Горизонт, пары живых заметок и надгробия для файла индекса."""
+        return {'horizon': self.horizon, 'entries': self._entries, 'tombstones': self._tombstones}
+
+    def _restore(self, data: dict):
+        """Восстанавливает ленту из файла индекса."""
+        self.horizon = data['horizon']
+        self._entries = [(seq, note_id) for seq, note_id in data['entries']]
+        self._seqs = {note_id: seq for seq, note_id in self._entries}
+        self._tombstones = [(seq, note_id) for seq, note_id in data['tombstones']]
+        self._deleted = {note_id: seq for seq, note_id in self._tombstones}
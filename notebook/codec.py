@@ -0,0 +1,126 @@
+"""
+Модуль кодирования заметок для файлов JSON-хранилища.
+
+Файлы хранилища (notes.json, журнал, файл записей) пишутся в UTF-8 без
+экранирования: кириллица занимает 2 байта на символ, а не 6 (\\uXXXX).
+Содержание заметки от COMPRESS_MIN_BYTES байт дополнительно сжимается
+zlib с общим словарём (SHARED_DICTIONARY) - только во внутренних файлах:
+в журнале оно записывается объектом
+
+    {"codec": "zlib1", "data": "<base64>"}
+
+а в файле записей - сжатой записью (см. records.py). notes.json остаётся
+обычным JSON, который можно читать и править без программы; сжатое
+содержание в нём (его писала прежняя версия) тоже раскодируется.
+Раскодируется содержание при чтении заметки (decode_note), поэтому
+остальной код работает с обычными строками.
+"""
+
+import base64
+import os
+import zlib
+from typing import Union
+
+# Содержание короче этого (в байтах UTF-8) не сжимается; 0 - сжимать всё
+COMPRESS_MIN_BYTES = int(os.getenv('NOTES_COMPRESS_MIN', '1024'))
+CODEC = 'zlib1'
+
+# Общий словарь: частые фрагменты заметок. zlib находит в нём совпадения
+# уже в начале текста, что заметно сжимает записи в несколько килобайт.
+# Словарь нельзя менять без смены CODEC - иначе старые данные не раскодируются.
+SHARED_DICTIONARY = (
+    '{"id": , "title": "", "content": "", "created_at": "2025-01-01T00:00:00.000000"}'
+    ' the and for with that this from have are was not you but all can will'
+    ' https:// www. .com .ru TODO - [ ] 1. 2. 3.'
+    ' что это как для или если так все уже при его она они было быть есть'
+    ' который которые также только можно нужно надо сделать купить проект'
+    ' задача задачи встреча работа заметка заметки сегодня завтра вчера'
+    ' понедельник вторник среда четверг пятница суббота воскресенье'
+    ' января февраля марта апреля мая июня июля августа сентября октября ноября декабря'
+    ' не на по из от до за что в и с к о у'
+).encode('utf-8')
+
+
+def compress(data: bytes) -> bytes:
+    """Сжимает байты zlib с общим словарём."""
+    compressor = zlib.compressobj(zdict=SHARED_DICTIONARY)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes) -> bytes:
+    """Распаковывает результат compress.
+
+    Raises:
+        ValueError: Если данные повреждены.
+    """
+    try:
+        decompressor = zlib.decompressobj(zdict=SHARED_DICTIONARY)
+        return decompressor.decompress(data) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Сжатые данные повреждены: {e}") from e
+
+
+def encode_content(content: str) -> Union[str, dict]:
+    """Сжимает содержание, если оно не короче COMPRESS_MIN_BYTES и сжатие выгодно.
+
+    Args:
+        content (str): Содержание заметки.
+
+    Returns:
+        Union[str, dict]: Исходная строка или объект {"codec", "data"}.
+    """
+    data = content.encode('utf-8')
+    if len(data) < COMPRESS_MIN_BYTES:
+        return content
+    packed = base64.b64encode(compress(data)).decode('ascii')
+    if len(packed) >= len(data):
+        return content
+    return {'codec': CODEC, 'data': packed}
+
+
+def decode_content(value: Union[str, dict]) -> str:
+    """Раскодирует результат encode_content.
+
+    Args:
+        value (Union[str, dict]): Строка или объект {"codec", "data"}.
+
+    Returns:
+        str: Содержание заметки.
+
+    Raises:
+        ValueError: Если кодек неизвестен или данные повреждены.
+    """
+    if isinstance(value, str):
+        return value
+    if value.get('codec') != CODEC:
+        raise ValueError(f"Неизвестный кодек содержания: {value.get('codec')}")
+    return decompress(base64.b64decode(value['data'])).decode('utf-8')
+
+
+def encode_note(note_data: dict) -> dict:
+    """Данные заметки для записи в файл (с сжатым содержанием, если оно большое).
+
+    Args:
+        note_data (dict): Словарь с данными заметки.
+
+    Returns:
+        dict: Тот же словарь или копия со сжатым содержанием.
+    """
+    content = encode_content(note_data['content'])
+    if content is note_data['content']:
+        return note_data
+    return dict(note_data, content=content)
+
+
+def decode_note(note_data: dict) -> dict:
+    """Данные заметки из файла с раскодированным содержанием.
+
+    Args:
+        note_data (dict): Словарь, прочитанный из файла хранилища.
+
+    Returns:
+        dict: Тот же словарь или копия с раскодированным содержанием.
+    """
+    if isinstance(note_data.get('content'), str):
+        return note_data
+    return dict(note_data, content=decode_content(note_data['content']))
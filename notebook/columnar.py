@@ -0,0 +1,209 @@
+"""
+Модуль колоночного кэша заметок в памяти.
+
+Содержит класс ColumnarNoteCache, который хранит ID и даты создания заметок
+в массивах NumPy int64, а заголовки и тексты - в сплошных строках со
+смещениями. Фильтры по дате, сортировка и подсчёт заметок по дням
+выполняются векторными операциями вместо цикла по объектам Note.
+
+NumPy - необязательная зависимость: без него модуль импортируется, но
+создать кэш нельзя.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+from .dates import date_range
+from .models import Note
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_MICROSECONDS_PER_DAY = 86_400_000_000
+
+
+def _to_micros(value: datetime) -> int:
+    """Переводит дату в микросекунды от 1970-01-01 по местному времени заметки."""
+    return (value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+
+
+class _TextColumn:
+    """Колонка строк: все значения в одной строке плюс массив смещений."""
+
+    def __init__(self, values: List[str]):
+        self.buffer = ''.join(values)
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in values], out=offsets[1:])
+        self.offsets = offsets
+
+    def __getitem__(self, row: int) -> str:
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]]
+
+    def take(self, rows) -> List[str]:
+        """Возвращает значения строк в заданном порядке."""
+        return [self[row] for row in rows]
+
+
+class ColumnarNoteCache:
+    """Колоночный кэш заметок для аналитических запросов.
+
+    Изменения (upsert, remove) копятся и применяются к колонкам одной
+    векторной операцией при следующем запросе. Кэш можно подписать на
+    изменения хранилища через NoteStorage.add_listener.
+
+    Attributes:
+        ids (numpy.ndarray): ID заметок (int64).
+        created (numpy.ndarray): Даты создания в микросекундах от 1970-01-01 (int64).
+    """
+
+    def __init__(self, notes: Iterable[Note] = ()):
+        """Инициализирует кэш.
+
+        Args:
+            notes (Iterable[Note], optional): Начальный набор заметок.
+
+        Raises:
+            ImportError: Если NumPy не установлен.
+        """
+        if np is None:
+            raise ImportError("Для колоночного кэша нужен NumPy: pip install numpy")
+        self.ids = np.empty(0, dtype=np.int64)
+        self.created = np.empty(0, dtype=np.int64)
+        self._titles = _TextColumn([])
+        self._contents = _TextColumn([])
+        self._pending: Dict[int, Optional[Note]] = {}
+        self.upsert(notes)
+
+    @classmethod
+    def from_storage(cls, storage) -> 'ColumnarNoteCache':
+        """Загружает все заметки хранилища и подписывает кэш на его изменения.
+
+        Args:
+            storage (NoteStorage): Хранилище заметок.
+
+        Returns:
+            ColumnarNoteCache: Заполненный кэш.
+        """
+        cache = cls(storage.iter_notes())
+        storage.add_listener(cache)
+        return cache
+
+    def __len__(self) -> int:
+        """Количество заметок в кэше."""
+        self._flush()
+        return len(self.ids)
+
+    # Подписка на изменения хранилища
+    def on_saved(self, notes: List[Note]):
+        """Обработчик сохранения заметок в хранилище."""
+        self.upsert(notes)
+
+    def on_deleted(self, note_ids: List[int]):
+        """Обработчик удаления заметок из хранилища."""
+        self.remove(note_ids)
+
+    def upsert(self, notes: Iterable[Note]):
+        """Добавляет заметки или обновляет их.
+
+        Args:
+            notes (Iterable[Note]): Заметки с заполненными ID.
+        """
+        for note in notes:
+            self._pending[note.id] = note
+
+    def remove(self, note_ids: Iterable[int]):
+        """Удаляет заметки.
+
+        Args:
+            note_ids (Iterable[int]): ID заметок.
+        """
+        for note_id in note_ids:
+            self._pending[note_id] = None
+
+    def _flush(self):
+        """Применяет накопленные изменения к колонкам."""
+        if not self._pending:
+            return
+        changed_ids = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+        keep = np.flatnonzero(~np.isin(self.ids, changed_ids))
+        added = [note for note in self._pending.values() if note is not None]
+        self._pending = {}
+
+        self.ids = np.concatenate([
+            self.ids[keep], np.fromiter((note.id for note in added), dtype=np.int64, count=len(added))
+        ])
+        self.created = np.concatenate([
+            self.created[keep],
+            np.fromiter((_to_micros(note.created_datetime) for note in added),
+                        dtype=np.int64, count=len(added))
+        ])
+        self._titles = _TextColumn(self._titles.take(keep) + [note.title for note in added])
+        self._contents = _TextColumn(self._contents.take(keep) + [note.content for note in added])
+
+    def _rows_in_range(self, start: Optional[datetime], end: Optional[datetime]):
+        """Номера строк с датой создания в интервале [start, end)."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if start is not None:
+            mask &= self.created >= _to_micros(start)
+        if end is not None:
+            mask &= self.created < _to_micros(end)
+        return np.flatnonzero(mask)
+
+    def _sorted_desc(self, rows):
+        """Сортирует строки от новых к старым (при равной дате - по убыванию ID)."""
+        order = np.lexsort((-self.ids[rows], -self.created[rows]))
+        return rows[order]
+
+    def filter_ids(self, date_filter: Optional[str] = None) -> 'np.ndarray':
+        """Возвращает ID заметок за период от новых к старым.
+
+        Args:
+            date_filter (str, optional): Фильтр даты (см. notebook.dates.date_range).
+
+        Returns:
+            numpy.ndarray: ID заметок.
+
+        Raises:
+            ValueError: Если фильтр не распознан.
+        """
+        self._flush()
+        start, end = date_range(date_filter) if date_filter else (None, None)
+        return self.ids[self._sorted_desc(self._rows_in_range(start, end))]
+
+    def notes(self, date_filter: Optional[str] = None) -> List[Note]:
+        """Возвращает заметки за период от новых к старым.
+
+        Args:
+            date_filter (str, optional): Фильтр даты.
+
+        Returns:
+            List[Note]: Заметки, собранные из колонок.
+        """
+        self._flush()
+        start, end = date_range(date_filter) if date_filter else (None, None)
+        rows = self._sorted_desc(self._rows_in_range(start, end))
+        return [
+            Note(self._titles[row], self._contents[row], id=int(self.ids[row]),
+                 created_at=_EPOCH + timedelta(microseconds=int(self.created[row])))
+            for row in rows
+        ]
+
+    def count_by_day(self, date_filter: Optional[str] = None) -> List[Tuple[date, int]]:
+        """Считает заметки по дням.
+
+        Args:
+            date_filter (str, optional): Фильтр даты.
+
+        Returns:
+            List[Tuple[date, int]]: Пары (день, количество заметок) по возрастанию дня.
+        """
+        self._flush()
+        start, end = date_range(date_filter) if date_filter else (None, None)
+        days = self.created[self._rows_in_range(start, end)] // _MICROSECONDS_PER_DAY
+        unique_days, counts = np.unique(days, return_counts=True)
+        return [(_EPOCH.date() + timedelta(days=int(day)), int(count))
+                for day, count in zip(unique_days, counts)]
@@ -2,12 +2,18 @@
 Модуль, содержащий логику команд.
 
 Содержит класс NoteCommands, который инкапсулирует все действия
-над заметками: добавление, вывод списка, поиск и удаление.
+над заметками: добавление, вывод списка, поиск, удаление, импорт, экспорт
+и статистику.
 """
 
+import json
 from datetime import datetime
+from typing import List, Tuple
+from .metrics import timed
 from .models import Note
-from .storage import NoteStorage
+from .query import NoteQuery
+from . import transfer
+from .storage import NoteStorage, page_cursor
 
 
 class NoteCommands:
@@ -25,6 +31,7 @@ class NoteCommands:
         """
         self.storage = storage
 
+    @timed('commands')
     def add_note(self, title: str, content: str):
         """Добавляет новую заметку.
 
@@ -42,51 +49,79 @@ class NoteCommands:
         saved_note = self.storage.save_note(note)
         print(f"Заметка добавлена успешно! (ID: {saved_note.id})")
 
-    def list_notes(self, date_filter: str = None):
-        """Показывает все заметки с возможностью фильтрации по дате.
+    @timed('commands')
+    def list_notes(self, date_filter: str = None, limit: int = None, after: str = None):
+        """Показывает заметки с возможностью фильтрации по дате.
+
+        Заметки выводятся по мере чтения из хранилища, поэтому первые
+        появляются сразу, а память не зависит от размера блокнота.
 
         Args:
             date_filter (str, optional): Фильтр по дате. По умолчанию None.
+            limit (int, optional): Размер страницы. По умолчанию все заметки.
+            after (str, optional): Курсор страницы, после которой продолжить
+                вывод. По умолчанию с самой новой заметки.
         """
-        notes = self.storage.get_all_notes()
-
-        if date_filter:
-            notes = self.storage.filter_notes_by_date(notes, date_filter)
+        count = 0
+        last_note = None
+        try:
+            for note in self.storage.iter_notes(date_filter=date_filter, limit=limit, after=after):
+                print(f"ID: {note.id}")
+                print(f"Заголовок: {note.title}")
+                print(f"Содержание: {note.content}")
+                print(f"Создана: {note.created_at[:16]}")
+                print("-" * 30)
+                count += 1
+                last_note = note
+        except ValueError as e:
+            print(e)
+            return
 
-        if not notes:
-            if date_filter:
+        if not count:
+            if after:
+                print("Больше заметок нет.")
+            elif date_filter:
                 print(f"Заметок за {date_filter} не найдено.")
             else:
                 print("Заметок пока нет. Создайте первую!")
             return
 
         if date_filter:
-            print(f"Я нашёл {len(notes)} заметок за {date_filter}:")
+            print(f"Я нашёл {count} заметок за {date_filter}")
         else:
-            print(f"Я нашёл {len(notes)} заметок:")
+            print(f"Я нашёл {count} заметок")
 
-        for note in notes:
-            print(f"ID: {note.id}")
-            print(f"Заголовок: {note.title}")
-            print(f"Содержание: {note.content}")
-            print(f"Создана: {note.created_at[:16]}")
-            print("-" * 30)
+        if limit is not None and count == limit:
+            print(f"Следующая страница: --after \"{page_cursor(last_note)}\"")
 
-    def search_notes(self, query: str, date_filter: str = None):
+    @timed('commands')
+    def search_notes(self, query: str, date_filter: str = None, limit: int = None,
+                     offset: int = 0, order: str = None):
         """Ищет заметки по тексту в заголовке или содержании.
 
+        Текст, фильтр даты, порядок и страница передаются хранилищу одним
+        запросом (см. NoteQuery).
+
         Args:
             query (str): Текст для поиска.
             date_filter (str, optional): Фильтр по дате. По умолчанию None.
+            limit (int, optional): Сколько самых релевантных заметок показать.
+                По умолчанию все.
+            offset (int, optional): Сколько первых результатов пропустить. По умолчанию 0.
+            order (str, optional): Порядок: relevance, newest или oldest.
+                По умолчанию по релевантности.
         """
         if not query:
             print("Введите текст для поиска!")
             return
 
-        notes = self.storage.search_notes(query)
+        try:
+            note_query = NoteQuery(text=query, order=order).dated(date_filter).page(limit, offset)
+        except ValueError as e:
+            print(e)
+            return
 
-        if date_filter:
-            notes = self.storage.filter_notes_by_date(notes, date_filter)
+        notes = self.storage.query(note_query)
 
         if not notes:
             if date_filter:
@@ -104,6 +139,7 @@ class NoteCommands:
             print(f"ID: {note.id} - {note.title}")
             print(f"   {note.content[:60]}...")
 
+    @timed('commands')
     def delete_note(self, note_id: int):
         """Удаляет заметку по ID.
 
@@ -113,4 +149,101 @@ class NoteCommands:
         if self.storage.delete_note(note_id):
             print(f"Заметка ID {note_id} удалена")
         else:
-            print(f"Заметка с ID {note_id} не найдена")
\ No newline at end of file
+            print(f"Заметка с ID {note_id} не найдена")
+
+    @timed('commands')
+    def add_notes(self, notes: List[Tuple[str, str]]):
+        """Добавляет несколько заметок одной пачкой.
+
+        Args:
+            notes (List[Tuple[str, str]]): Пары (заголовок, содержание).
+
+        Raises:
+            ValueError: Если у какой-либо заметки пустой заголовок или содержание.
+        """
+        if any(not title or not content for title, content in notes):
+            raise ValueError("Заголовок и содержание обязательны!")
+
+        saved_notes = self.storage.save_many([Note(title=title, content=content)
+                                              for title, content in notes])
+        ids = ', '.join(str(note.id) for note in saved_notes)
+        print(f"Добавлено заметок: {len(saved_notes)} (ID: {ids})")
+
+    @timed('commands')
+    def delete_notes(self, note_ids: List[int]):
+        """Удаляет несколько заметок одной пачкой.
+
+        Args:
+            note_ids (List[int]): ID заметок для удаления.
+        """
+        deleted = self.storage.delete_many(note_ids)
+        if deleted:
+            print(f"Удалены заметки с ID: {', '.join(map(str, deleted))}")
+        missing = [note_id for note_id in note_ids if note_id not in deleted]
+        if missing:
+            print(f"Не найдены заметки с ID: {', '.join(map(str, missing))}")
+
+    @timed('commands')
+    def import_notes(self, path: str, fmt: str = None, batch_size: int = 1000,
+                     keep_ids: bool = False):
+        """Импортирует заметки из файла (JSONL, CSV или notes.json).
+
+        Args:
+            path (str): Путь к файлу.
+            fmt (str, optional): Формат файла. По умолчанию по расширению.
+            batch_size (int, optional): Размер пачки. По умолчанию 1000.
+            keep_ids (bool, optional): Сохранить ID из файла и пропустить
+                заметки, чьи ID уже есть. По умолчанию False.
+        """
+        try:
+            count = transfer.import_notes(self.storage, path, fmt, batch_size=batch_size,
+                                          keep_ids=keep_ids)
+        except (ValueError, OSError) as e:
+            print(f"Ошибка импорта: {e}")
+            return
+        print(f"Импортировано заметок: {count}")
+
+    @timed('commands')
+    def export_notes(self, path: str, fmt: str = None, date_filter: str = None):
+        """Экспортирует заметки в файл (JSONL, CSV или notes.json).
+
+        Args:
+            path (str): Путь к файлу.
+            fmt (str, optional): Формат файла. По умолчанию по расширению.
+            date_filter (str, optional): Фильтр по дате. По умолчанию None.
+        """
+        try:
+            count = transfer.export_notes(self.storage, path, fmt, date_filter=date_filter)
+        except (ValueError, OSError) as e:
+            print(f"Ошибка экспорта: {e}")
+            return
+        if count is None:
+            print(f"Заметки выгружены в {path}")
+        else:
+            print(f"Выгружено заметок: {count} в {path}")
+
+    @timed('commands')
+    def show_stats(self, period: str = 'month', fmt: str = None):
+        """Показывает статистику заметок: сколько их и какого объёма по периодам.
+
+        Args:
+            period (str, optional): Разбивка: day, month или year. По умолчанию month.
+            fmt (str, optional): json - вывести статистику одной строкой JSON
+                (для панелей мониторинга). По умолчанию текстом.
+        """
+        stats = self.storage.note_stats()
+        if fmt == 'json':
+            print(json.dumps(stats.to_dict(), ensure_ascii=False))
+            return
+
+        if not stats.total:
+            print("Заметок пока нет. Создайте первую!")
+            return
+
+        print(f"Всего заметок: {stats.total}")
+        print(f"Объём содержания: {stats.content_bytes} байт")
+        print(f"Первая заметка: {stats.first[:16]}")
+        print(f"Последняя заметка: {stats.last[:16]}")
+        print("-" * 30)
+        for key, (count, size) in stats.by(period).items():
+            print(f"{key}: {count} заметок, {size} байт")
@@ -0,0 +1,154 @@
+"""
+Модуль фонового режима (демона) менеджера заметок.
+
+Демон (main.py --serve) держит открытыми хранилище, пул подключений и
+кэши и принимает команды через Unix-сокет. Клиент (обычный запуск
+main.py) передаёт демону аргументы командной строки и печатает ответ,
+не открывая хранилище сам.
+
+Протокол - одна строка JSON на запрос и одна на ответ:
+
+* запрос: ``{"argv": ["--search", "молоко"]}``;
+* ответ: ``{"output": "..."}`` - то, что команда напечатала бы в консоль.
+
+Поэтому команды можно отправлять и без Python, например через socat.
+
+Модуль импортирует только стандартную библиотеку: клиенту не нужны
+psycopg2 и модули хранилища.
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Callable, List, Optional
+
+DEFAULT_SOCKET = "notes.sock"
+
+
+def send_command(argv: List[str], socket_path: str = DEFAULT_SOCKET,
+                 timeout: float = 60.0) -> Optional[str]:
+    """Отправляет команду демону.
+
+    Args:
+        argv (List[str]): Аргументы командной строки main.py.
+        socket_path (str, optional): Путь к сокету демона. По умолчанию "notes.sock".
+        timeout (float, optional): Таймаут ответа в секундах. По умолчанию 60.
+
+    Returns:
+        Optional[str]: Вывод команды или None, если демон не запущен.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return None
+        sock.sendall(json.dumps({'argv': argv}, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as response:
+            line = response.readline()
+    if not line:
+        return None
+    return json.loads(line)['output']
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Обработчик подключения: выполняет запросы построчно."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                output = self.server.execute(json.loads(line)['argv'])
+            except (ValueError, KeyError, TypeError) as e:
+                output = f"Некорректный запрос: {e}\n"
+            self.wfile.write(json.dumps({'output': output}, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+class NoteServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Сервер команд на Unix-сокете.
+
+    Подключения обслуживаются в отдельных потоках, а сами команды
+    выполняются по одной: команды печатают результат, а перехват вывода
+    (redirect_stdout) действует на весь процесс.
+
+    Attributes:
+        socket_path (str): Путь к сокету.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, run: Callable[[List[str]], None]):
+        """Создаёт сокет и сервер.
+
+        Args:
+            socket_path (str): Путь к сокету.
+            run (Callable): Выполняет команду по списку аргументов и печатает результат.
+        """
+        self.socket_path = socket_path
+        self._run = run
+        self._lock = threading.Lock()
+        super().__init__(socket_path, _CommandHandler)
+
+    def execute(self, argv: List[str]) -> str:
+        """Выполняет команду и возвращает всё, что она напечатала.
+
+        Args:
+            argv (List[str]): Аргументы командной строки.
+
+        Returns:
+            str: Вывод команды.
+        """
+        output = io.StringIO()
+        with self._lock, redirect_stdout(output), redirect_stderr(output):
+            try:
+                self._run(argv)
+            except SystemExit:
+                # argparse завершает процесс при ошибке в аргументах и для --help
+                pass
+            except Exception as e:
+                print(f"Произошла ошибка: {e}")
+        return output.getvalue()
+
+    def server_close(self):
+        """Закрывает сервер и удаляет файл сокета."""
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def serve(run: Callable[[List[str]], None], socket_path: str = DEFAULT_SOCKET):
+    """Запускает демон и обслуживает команды до Ctrl+C или SIGTERM.
+
+    Оставшийся от упавшего демона файл сокета удаляется. Если демон на
+    этом сокете уже работает, новый не запускается.
+
+    Args:
+        run (Callable): Выполняет команду по списку аргументов и печатает результат.
+        socket_path (str, optional): Путь к сокету. По умолчанию "notes.sock".
+    """
+    if os.path.exists(socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(socket_path)
+                print(f"Демон уже запущен: {socket_path}")
+                return
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(socket_path)
+
+    # SIGTERM (kill) останавливает демон так же, как Ctrl+C, и сокет удаляется
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with NoteServer(socket_path, run) as server:
+        print(f"Демон заметок слушает {socket_path} (Ctrl+C - остановить)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Демон остановлен")
@@ -1,60 +1,941 @@
 """
 Модуль для работы с базой данных PostgreSQL.
+
+Содержит пул подключений ConnectionPool, общий для всех объектов Database
+с одинаковыми параметрами подключения, и класс Database, который выдаёт
+подключения из пула и один раз на процесс создаёт схему базы данных.
+
+Таблица notes секционирована по месяцам created_at (notes_pГГГГ_ММ и
+секция по умолчанию notes_default): запросы за интервал дат читают только
+нужные секции, а очистка и VACUUM работают с небольшими таблицами.
+
+Таблица notes_stats хранит количество заметок и объём содержания по
+отрезкам в 15 минут (UTC); её пополняют триггеры на notes, поэтому
+статистика (--stats) не просматривает заметки.
+
+Для ленты изменений (NoteStorage.changes_since) у заметок есть столбцы
+updated_at, change_seq (номер из последовательности notes_change_seq) и
+change_xid (ID транзакции изменения), а удалённые заметки оставляют
+надгробия в таблице notes_tombstones.
 """
 
 import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Dict, List, Tuple
+
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
 from dotenv import load_dotenv
 
+from .metrics import registry as metrics
+
 load_dotenv()
 
+
+def connection_params_from_env() -> dict:
+    """Читает параметры подключения из переменных окружения (.env).
+
+    Returns:
+        dict: Параметры для psycopg2.connect.
+    """
+    return {
+        'host': os.getenv('DB_HOST'),
+        'port': os.getenv('DB_PORT'),
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+    }
+
+
+class MetricsCursor(extensions.cursor):
+    """Курсор psycopg2, который считает запросы и их время в реестре метрик.
+
+    Пока сбор метрик выключен, запрос выполняется без замеров.
+    """
+
+    def execute(self, query, vars=None):
+        if not metrics.enabled:
+            return super().execute(query, vars)
+        metrics.inc('notebook_queries_total', backend='postgres')
+        with metrics.timer('notebook_query_seconds', backend='postgres'):
+            return super().execute(query, vars)
+
+    def copy_expert(self, sql, file, size=8192):
+        if not metrics.enabled:
+            return super().copy_expert(sql, file, size)
+        metrics.inc('notebook_queries_total', backend='postgres')
+        with metrics.timer('notebook_query_seconds', backend='postgres'):
+            return super().copy_expert(sql, file, size)
+
+
+class ConnectionPool:
+    """Потокобезопасный пул подключений к PostgreSQL.
+
+    Перед выдачей подключение проверяется: закрытые подключения
+    выбрасываются, а долго простаивавшие проверяются запросом ``SELECT 1``.
+    Подключения, простаивающие дольше idle_timeout, закрываются, пока в
+    пуле остаётся больше minconn подключений. Открытие и проверка
+    подключения идут без блокировки пула: место в пуле резервируется
+    заранее, поэтому медленное подключение не задерживает другие потоки.
+
+    Attributes:
+        minconn (int): Минимальное количество подключений в пуле.
+        maxconn (int): Максимальное количество подключений в пуле.
+        idle_timeout (float): Время простоя в секундах, после которого
+            лишнее подключение закрывается.
+        health_check_interval (float): Время простоя в секундах, после
+            которого подключение проверяется перед выдачей.
+        wait_timeout (float): Сколько секунд ждать свободного подключения,
+            если пул заполнен.
+    """
+
+    def __init__(self, minconn: int = 1, maxconn: int = 10,
+                 idle_timeout: float = 300.0, health_check_interval: float = 30.0,
+                 wait_timeout: float = 10.0, **connect_params):
+        """Инициализирует пул и открывает minconn подключений.
+
+        Args:
+            minconn (int, optional): Минимальный размер пула. По умолчанию 1.
+            maxconn (int, optional): Максимальный размер пула. По умолчанию 10.
+            idle_timeout (float, optional): Таймаут простоя. По умолчанию 300.
+            health_check_interval (float, optional): Интервал проверки
+                подключений. По умолчанию 30.
+            wait_timeout (float, optional): Таймаут ожидания подключения.
+                По умолчанию 10.
+            **connect_params: Параметры для psycopg2.connect.
+        """
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.wait_timeout = wait_timeout
+        self.connect_params = connect_params
+        self._idle: List[Tuple[object, float]] = []
+        self._in_use = set()
+        # Места, занятые подключениями, которые открываются или проверяются
+        self._reserved = 0
+        self._condition = threading.Condition()
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        """Текущее количество открытых подключений."""
+        return len(self._idle) + len(self._in_use) + self._reserved
+
+    def _connect(self):
+        """Открывает новое подключение."""
+        return psycopg2.connect(cursor_factory=MetricsCursor, **self.connect_params)
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        """Проверяет, что подключение можно выдать.
+
+        Args:
+            conn: Подключение psycopg2.
+            idle_for (float): Сколько секунд подключение простаивало.
+
+        Returns:
+            bool: True если подключение рабочее.
+        """
+        if conn.closed:
+            return False
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle(self):
+        """Закрывает лишние подключения, простаивающие дольше idle_timeout."""
+        now = time.monotonic()
+        total = self.size
+        kept = []
+        # Самые старые подключения лежат в начале списка
+        for conn, released_at in self._idle:
+            if now - released_at > self.idle_timeout and total > self.minconn:
+                self._close_quietly(conn)
+                total -= 1
+            else:
+                kept.append((conn, released_at))
+        self._idle = kept
+
+    @staticmethod
+    def _close_quietly(conn):
+        """Закрывает подключение, не выбрасывая исключений."""
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """Выдаёт подключение из пула.
+
+        Returns:
+            Подключение psycopg2.
+
+        Raises:
+            PoolError: Если свободное подключение не появилось за wait_timeout.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            conn, released_at = self._reserve(deadline)
+            # Проверка и открытие подключения - без блокировки пула
+            try:
+                if conn is None:
+                    conn = self._connect()
+                elif not self._is_healthy(conn, time.monotonic() - released_at):
+                    self._close_quietly(conn)
+                    conn = None
+            except BaseException:
+                self._release_reservation()
+                raise
+            with self._condition:
+                self._reserved -= 1
+                if conn is not None:
+                    self._in_use.add(conn)
+                    return conn
+                self._condition.notify()
+
+    def _reserve(self, deadline: float) -> Tuple[object, float]:
+        """Занимает место в пуле: берёт свободное подключение или место под новое.
+
+        Args:
+            deadline (float): Момент (time.monotonic), до которого ждать места.
+
+        Returns:
+            Tuple[object, float]: Свободное подключение и время его возврата
+            в пул или (None, 0.0), если нужно открыть новое подключение.
+
+        Raises:
+            PoolError: Если место не освободилось до deadline.
+        """
+        with self._condition:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    self._reserved += 1
+                    return self._idle.pop()
+                if self.size < self.maxconn:
+                    self._reserved += 1
+                    return None, 0.0
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolError("пул подключений исчерпан")
+                self._condition.wait(remaining)
+
+    def _release_reservation(self):
+        """Освобождает место, если подключение не удалось открыть."""
+        with self._condition:
+            self._reserved -= 1
+            self._condition.notify()
+
+    def putconn(self, conn, close: bool = False):
+        """Возвращает подключение в пул.
+
+        Незавершённая транзакция откатывается.
+
+        Args:
+            conn: Подключение, полученное через getconn.
+            close (bool, optional): Закрыть подключение вместо возврата.
+                По умолчанию False.
+        """
+        with self._condition:
+            self._in_use.discard(conn)
+            if not close and not conn.closed:
+                try:
+                    status = conn.get_transaction_status()
+                    if status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error:
+                    close = True
+            if close or conn.closed:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def closeall(self):
+        """Закрывает все свободные подключения пула."""
+        with self._condition:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+
+
+# Версия схемы базы данных. При изменении схемы в _init_db версия
+# увеличивается, и схема обновляется при первом подключении.
+SCHEMA_VERSION = 7
+
+# На сколько месяцев вперёд создаются секции таблицы notes
+PARTITION_MONTHS_AHEAD = int(os.getenv('NOTES_PARTITION_MONTHS_AHEAD', '3'))
+# Схема, в которую переносятся отключённые старые секции
+ARCHIVE_SCHEMA = 'notes_archive'
+# Столбцы notes, которые переносятся между секциями (search_vector вычисляется)
+_MOVED_COLUMNS = "id, title, content, created_at, updated_at, change_seq, change_xid"
+# Отрезок статистики notes_stats, в который попадает заметка: 15 минут -
+# кратно смещению любого часового пояса, поэтому отрезки складываются в
+# местные дни без остатка (см. NoteStats.from_buckets)
+_STATS_BUCKET = "to_timestamp(floor(extract(epoch FROM created_at) / 900) * 900)"
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_schema_ready = set()
+_schema_lock = threading.Lock()
+_registry_lock = threading.Lock()
+
+
+def add_months(month: date, count: int) -> date:
+    """Первое число месяца через count месяцев (count может быть отрицательным).
+
+    Args:
+        month (date): Первое число месяца.
+        count (int): Количество месяцев.
+
+    Returns:
+        date: Первое число нового месяца.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя секции таблицы notes за месяц, например notes_p2025_01."""
+    return f"notes_p{month:%Y_%m}"
+
+
+def partition_bounds(month: date) -> Tuple[str, str]:
+    """Границы секции за месяц [начало, конец) в UTC для FOR VALUES FROM ... TO."""
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+def _dsn_key(connect_params: dict) -> tuple:
+    """Ключ, по которому различаются базы данных."""
+    return tuple(sorted((k, str(v)) for k, v in connect_params.items()))
+
+
+def get_pool(connect_params: dict) -> ConnectionPool:
+    """Возвращает общий пул для параметров подключения, создавая его при необходимости.
+
+    Размер пула берётся из переменных окружения DB_POOL_MIN, DB_POOL_MAX
+    и DB_POOL_IDLE_TIMEOUT.
+
+    Args:
+        connect_params (dict): Параметры для psycopg2.connect.
+
+    Returns:
+        ConnectionPool: Пул подключений.
+    """
+    key = _dsn_key(connect_params)
+    with _registry_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                minconn=int(os.getenv('DB_POOL_MIN', '1')),
+                maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+                idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+                **connect_params
+            )
+        return _pools[key]
+
+
 class Database:
-    """Класс для работы с базой данных PostgreSQL."""
-    
-    def __init__(self):
-        """Инициализирует подключение к базе данных."""
-        self.connection = None
-        self._init_db()
-    
+    """Класс для работы с базой данных PostgreSQL.
+
+    Все объекты Database с одинаковыми параметрами подключения делят один
+    пул. Каждый поток получает своё подключение; вложенные вызовы
+    get_connection в одном потоке возвращают то же подключение.
+
+    Пул создаётся, а схема проверяется только при первом запросе
+    подключения, поэтому создание объекта Database не обращается к серверу.
+
+    Attributes:
+        connect_params (dict): Параметры подключения.
+        pool (ConnectionPool): Пул подключений.
+    """
+
+    def __init__(self, **connect_params):
+        """Инициализирует подключение к базе данных.
+
+        Args:
+            **connect_params: Параметры для psycopg2.connect. По умолчанию
+                берутся из .env.
+        """
+        self.connect_params = connect_params or connection_params_from_env()
+        self._pool = None
+        self._key = _dsn_key(self.connect_params)
+        self._local = threading.local()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Пул подключений; создаётся при первом обращении."""
+        if self._pool is None:
+            self._pool = get_pool(self.connect_params)
+        return self._pool
+
     def get_connection(self):
-        """Возвращает подключение к базе данных."""
-        if self.connection is None or self.connection.closed:
-            self.connection = psycopg2.connect(
-                host=os.getenv('DB_HOST'),
-                port=os.getenv('DB_PORT'),
-                dbname=os.getenv('DB_NAME'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD')
-            )
-        return self.connection
-    
-    def _init_db(self):
-        """Инициализирует базу данных и создает таблицы, если их нет."""
+        """Возвращает подключение текущего потока, взятое из пула.
+
+        Каждый вызов должен завершаться вызовом release_connection.
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None or conn.closed:
+            if conn is not None:
+                self._local.connection = None
+                self.pool.putconn(conn, close=True)
+            conn = self.pool.getconn()
+            self._local.connection = conn
+            self._local.depth = 0
+        self._local.depth += 1
+        # Схема считается готовой, только когда _init_db её создал: после
+        # сбоя DDL следующий вызов попробует снова. Флаг потока не даёт
+        # _init_db (он сам берёт подключение) зайти сюда повторно
+        if self._key not in _schema_ready and not getattr(self._local, 'schema_init', False):
+            self._local.schema_init = True
+            try:
+                with _schema_lock:
+                    self._init_db()
+            except Exception:
+                self.release_connection()
+                raise
+            finally:
+                self._local.schema_init = False
+        return conn
+
+    def release_connection(self):
+        """Возвращает подключение текущего потока в пул после последнего использования."""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            return
+        self._local.depth -= 1
+        if self._local.depth <= 0:
+            self._local.connection = None
+            self.pool.putconn(conn)
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер, выдающий подключение из пула.
+
+        Yields:
+            Подключение psycopg2.
+        """
         conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            self.release_connection()
+
+    def _schema_is_current(self, conn) -> bool:
+        """Проверяет отметку версии схемы в таблице notebook_schema.
+
+        Args:
+            conn: Подключение psycopg2.
+
+        Returns:
+            bool: True если схема уже обновлена до SCHEMA_VERSION, а секции
+            созданы на PARTITION_MONTHS_AHEAD месяцев вперёд.
+        """
         cursor = conn.cursor()
-        
         try:
-            # Создаем таблицу для заметок
+            cursor.execute("SELECT version, partitions_until FROM notebook_schema")
+            row = cursor.fetchone()
+            return (row is not None and row[0] == SCHEMA_VERSION
+                    and row[1] is not None and row[1] >= self._partition_horizon())
+        except psycopg2.Error:
+            return False
+        finally:
+            conn.rollback()
+            cursor.close()
+
+    def _init_db(self):
+        """Создает таблицы, если их нет. Выполняется один раз на базу данных в процессе;
+        если создание не удалось, повторяется при следующем подключении.
+
+        Если отметка версии схемы совпадает с SCHEMA_VERSION и секции
+        созданы на нужный срок, создание таблиц и индексов пропускается -
+        остаётся один запрос SELECT. Иначе (раз в месяц) заодно
+        обслуживаются секции (см. maintain_partitions).
+        """
+        key = self._key
+        if key in _schema_ready:
+            return
+
+        conn = self.get_connection()
+        cursor = None
+
+        try:
+            if self._schema_is_current(conn):
+                _schema_ready.add(key)
+                return
+            cursor = conn.cursor()
+
+            # Создаем таблицу для заметок (или переводим старую на секции)
+            self._create_notes_table(cursor)
+
+            # Полнотекстовый поиск: русская и английская морфология, заголовок важнее текста
+            cursor.execute('''
+                ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('russian', title), 'A') ||
+                    setweight(to_tsvector('english', title), 'A') ||
+                    setweight(to_tsvector('russian', content), 'B') ||
+                    setweight(to_tsvector('english', content), 'B')
+                ) STORED
+            ''')
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS notes_search_idx ON notes USING GIN (search_vector)"
+            )
+            # Поиск подстроки (ILIKE) заменён поиском по началу слов, как в
+            # SQLite и JSON-хранилище; триграммные индексы только замедляли запись
+            cursor.execute("DROP INDEX IF EXISTS notes_title_trgm_idx")
+            cursor.execute("DROP INDEX IF EXISTS notes_content_trgm_idx")
+            self._init_stats(cursor)
+            self._init_changes(cursor)
+
+            # Уведомление об изменениях для кэшей в других процессах (LISTEN notes_changed)
+            cursor.execute('''
+                CREATE OR REPLACE FUNCTION notes_notify_change() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify('notes_changed', TG_OP);
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            ''')
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS notes (
-                    id SERIAL PRIMARY KEY,
-                    title VARCHAR(255) NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                )
+                CREATE OR REPLACE TRIGGER notes_notify_change
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON notes
+                FOR EACH STATEMENT EXECUTE FUNCTION notes_notify_change()
             ''')
-            
+
+            # Индекс для фильтрации по дате и постраничного вывода по (created_at, id)
+            cursor.execute("DROP INDEX IF EXISTS notes_created_at_idx")
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS notes_created_at_id_idx ON notes (created_at, id)"
+            )
+
+            partitions_until = self._maintain_partitions(cursor)
+
+            # Отметка версии схемы: следующие запуски пропустят создание таблиц
+            cursor.execute("CREATE TABLE IF NOT EXISTS notebook_schema (version INTEGER NOT NULL)")
+            cursor.execute("ALTER TABLE notebook_schema ADD COLUMN IF NOT EXISTS partitions_until DATE")
+            cursor.execute("DELETE FROM notebook_schema")
+            cursor.execute("INSERT INTO notebook_schema (version, partitions_until) VALUES (%s, %s)",
+                           (SCHEMA_VERSION, partitions_until))
+
             conn.commit()
+            _schema_ready.add(key)
             print("✅ Таблица 'notes' создана или уже существует")
         except Exception as e:
+            conn.rollback()
             print(f"❌ Ошибка при создании таблицы: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+            self.release_connection()
+
+    def _create_notes_table(self, cursor):
+        """Создаёт таблицу notes, секционированную по месяцам created_at.
+
+        Таблица прежней версии (без секций) переименовывается, её строки
+        копируются в новую таблицу с сохранением ID, после чего она удаляется.
+        Последовательность ID остаётся прежней. Первичный ключ секционированной
+        таблицы обязан включать created_at, поэтому он (id, created_at);
+        уникальность ID по-прежнему обеспечивает последовательность.
+
+        Args:
+            cursor: Курсор текущего подключения.
+        """
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('notes')")
+        row = cursor.fetchone()
+        kind = row[0] if row else None
+        if kind == 'p':
+            return
+
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS notes_id_seq")
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS notes_change_seq")
+        if kind is not None:
+            cursor.execute("ALTER TABLE notes RENAME TO notes_unpartitioned")
+            # Иначе последовательность удалится вместе со старой таблицей
+            cursor.execute("ALTER SEQUENCE notes_id_seq OWNED BY NONE")
+        cursor.execute('''
+            CREATE TABLE notes (
+                id INTEGER NOT NULL DEFAULT nextval('notes_id_seq'),
+                title VARCHAR(255) NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                change_seq BIGINT NOT NULL DEFAULT nextval('notes_change_seq'),
+                change_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+                search_vector tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('russian', title), 'A') ||
+                    setweight(to_tsvector('english', title), 'A') ||
+                    setweight(to_tsvector('russian', content), 'B') ||
+                    setweight(to_tsvector('english', content), 'B')
+                ) STORED,
+                CONSTRAINT notes_id_created_at_pkey PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        ''')
+        cursor.execute("ALTER SEQUENCE notes_id_seq OWNED BY notes.id")
+        # Строки без своей секции (например, импорт старых заметок) попадают
+        # сюда и переносятся в секции при обслуживании
+        cursor.execute("CREATE TABLE notes_default PARTITION OF notes DEFAULT")
+        if kind is None:
+            return
+
+        cursor.execute("SELECT min(created_at), max(created_at) FROM notes_unpartitioned")
+        first, last = cursor.fetchone()
+        if first is not None:
+            month = first.astimezone(timezone.utc).date().replace(day=1)
+            while month <= last.astimezone(timezone.utc).date():
+                self._create_partition(cursor, month)
+                month = add_months(month, 1)
+        cursor.execute('''
+            INSERT INTO notes (id, title, content, created_at)
+            SELECT id, title, content, COALESCE(created_at, CURRENT_TIMESTAMP) FROM notes_unpartitioned
+        ''')
+        cursor.execute("DROP TABLE notes_unpartitioned")
+
+    @staticmethod
+    def _partition_horizon() -> date:
+        """Граница, до которой должны быть созданы секции (первое число месяца)."""
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        return add_months(this_month, PARTITION_MONTHS_AHEAD + 1)
+
+    def _partitions(self, cursor) -> Dict[date, str]:
+        """Месячные секции таблицы notes.
+
+        Returns:
+            Dict[date, str]: Первое число месяца -> имя секции.
+        """
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'notes'::regclass"
+        )
+        partitions = {}
+        for name, in cursor.fetchall():
+            if name.startswith('notes_p'):
+                year, month = name[len('notes_p'):].split('_')
+                partitions[date(int(year), int(month), 1)] = name
+        return partitions
+
+    def _create_partition(self, cursor, month: date):
+        """Создаёт пустую секцию за месяц (границы - в UTC).
+
+        Args:
+            cursor: Курсор текущего подключения.
+            month (date): Первое число месяца.
+        """
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF notes "
+            "FOR VALUES FROM (%s) TO (%s)",
+            partition_bounds(month)
+        )
+
+    def _split_default(self, cursor, months: List[date]):
+        """Создаёт секции за месяцы, строки которых лежат в секции по умолчанию.
+
+        Пока строки месяца в notes_default, PostgreSQL не создаст его секцию.
+        Перенос через notes (DELETE и INSERT) вызвал бы триггеры статистики,
+        ленты изменений и NOTIFY, хотя заметки не менялись. Поэтому
+        notes_default отключается от notes, строки переносятся из неё в
+        новые обычные таблицы, и все они подключаются к notes обратно:
+        DETACH и ATTACH триггеров не вызывают, а у отключённых таблиц своих
+        триггеров нет.
+
+        Args:
+            cursor: Курсор текущего подключения.
+            months (List[date]): Первые числа месяцев.
+        """
+        cursor.execute("ALTER TABLE notes DETACH PARTITION notes_default")
+        for month in months:
+            name = partition_name(month)
+            bounds = partition_bounds(month)
+            cursor.execute(f"CREATE TABLE {name} (LIKE notes INCLUDING DEFAULTS INCLUDING GENERATED)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM notes_default WHERE created_at >= %s AND created_at < %s "
+                f"RETURNING {_MOVED_COLUMNS}) INSERT INTO {name} ({_MOVED_COLUMNS}) SELECT * FROM moved",
+                bounds
+            )
+            cursor.execute(f"ALTER TABLE notes ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+        cursor.execute("ALTER TABLE notes ATTACH PARTITION notes_default DEFAULT")
+
+    def _maintain_partitions(self, cursor) -> date:
+        """Создаёт недостающие секции и отключает устаревшие.
+
+        * создаются секции текущего месяца и PARTITION_MONTHS_AHEAD следующих,
+          а также месяцев, строки которых лежат в секции по умолчанию;
+        * если задана переменная NOTES_PARTITION_RETENTION_MONTHS, секции
+          старше этого количества месяцев отключаются от notes (DETACH) и
+          переносятся в схему ARCHIVE_SCHEMA - данные сохраняются, но в
+          запросы программы больше не попадают;
+        * изменения статистики в notes_stats складываются по отрезкам.
+
+        Args:
+            cursor: Курсор текущего подключения.
+
+        Returns:
+            date: Граница, до которой созданы секции.
+        """
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        existing = self._partitions(cursor)
+
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM notes_default"
+        )
+        stray = {row[0] for row in cursor.fetchall()} - existing.keys()
+        if stray:
+            self._split_default(cursor, sorted(stray))
+        ahead = {add_months(this_month, ahead) for ahead in range(PARTITION_MONTHS_AHEAD + 1)}
+        for month in sorted(ahead - existing.keys() - stray):
+            self._create_partition(cursor, month)
+
+        retention = os.getenv('NOTES_PARTITION_RETENTION_MONTHS')
+        if retention:
+            cutoff = add_months(this_month, -int(retention))
+            old = [(month, name) for month, name in sorted(existing.items())
+                   if add_months(month, 1) <= cutoff]
+            if old:
+                cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            for month, name in old:
+                cursor.execute(f"ALTER TABLE notes DETACH PARTITION {name}")
+                # Отключение секции не вызывает триггеры - вычитаем её из статистики
+                cursor.execute("DELETE FROM notes_stats WHERE bucket >= %s AND bucket < %s",
+                               partition_bounds(month))
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+                print(f"Секция {name} перенесена в архив {ARCHIVE_SCHEMA}")
+
+        # Незафиксированные строки других транзакций снимок не видит - они
+        # остаются и складываются в следующий раз
+        cursor.execute('''
+            WITH old AS (DELETE FROM notes_stats RETURNING bucket, notes, content_bytes)
+            INSERT INTO notes_stats (bucket, notes, content_bytes)
+            SELECT bucket, sum(notes), sum(content_bytes) FROM old GROUP BY bucket
+            HAVING sum(notes) <> 0 OR sum(content_bytes) <> 0
+        ''')
+        return self._partition_horizon()
+
+    def maintain_partitions(self):
+        """Обслуживает секции таблицы notes (см. _maintain_partitions).
+
+        Выполняется автоматически при первом подключении в новом месяце;
+        долгоживущие процессы (демон) и задания cron могут вызывать его сами.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            partitions_until = self._maintain_partitions(cursor)
+            cursor.execute("UPDATE notebook_schema SET partitions_until = %s", (partitions_until,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Ошибка при обслуживании секций: {e}")
         finally:
             cursor.close()
-    
+            self.release_connection()
+
+    def _init_stats(self, cursor):
+        """Создаёт таблицу notes_stats и триггеры, которые её пополняют.
+
+        Триггеры уровня оператора получают изменённые строки через
+        переходные таблицы и добавляют в notes_stats по строке на отрезок
+        в 15 минут (UTC): изменение количества заметок и объёма содержания
+        в байтах (удаление - с минусом). Строки только добавляются, поэтому
+        одновременные записи не ждут друг друга на общей строке дня;
+        обслуживание секций складывает их (см. _maintain_partitions), а
+        чтение суммирует по отрезкам и раскладывает по местным дням (см.
+        NoteStorage.note_stats). Таблица прежней версии notes_daily_stats
+        (по дням UTC) удаляется. Новая таблица заполняется по существующим
+        заметкам после создания триггеров: они блокируют notes до конца
+        транзакции, и заметки других процессов не теряются и не считаются
+        дважды.
+
+        Args:
+            cursor: Курсор текущего подключения.
+        """
+        cursor.execute("SELECT to_regclass('notes_stats') IS NOT NULL")
+        row = cursor.fetchone()
+        exists = bool(row and row[0])
+        cursor.execute("DROP TABLE IF EXISTS notes_daily_stats")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notes_stats (
+                bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+                notes BIGINT NOT NULL,
+                content_bytes BIGINT NOT NULL
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE OR REPLACE FUNCTION notes_stats_apply() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'TRUNCATE' THEN
+                    DELETE FROM notes_stats;
+                ELSIF TG_OP = 'INSERT' THEN
+                    INSERT INTO notes_stats (bucket, notes, content_bytes)
+                    SELECT {_STATS_BUCKET}, count(*), sum(octet_length(content))
+                    FROM new_rows GROUP BY 1;
+                ELSIF TG_OP = 'DELETE' THEN
+                    INSERT INTO notes_stats (bucket, notes, content_bytes)
+                    SELECT {_STATS_BUCKET}, -count(*), -sum(octet_length(content))
+                    FROM old_rows GROUP BY 1;
+                ELSE
+                    INSERT INTO notes_stats (bucket, notes, content_bytes)
+                    SELECT {_STATS_BUCKET}, sum(notes), sum(content_bytes)
+                    FROM (SELECT created_at, 1 AS notes, octet_length(content) AS content_bytes
+                          FROM new_rows
+                          UNION ALL
+                          SELECT created_at, -1, -octet_length(content) FROM old_rows) d
+                    GROUP BY 1 HAVING sum(notes) <> 0 OR sum(content_bytes) <> 0;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        for event, referencing in (('INSERT', 'NEW TABLE AS new_rows'),
+                                   ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+                                   ('DELETE', 'OLD TABLE AS old_rows')):
+            cursor.execute(f'''
+                CREATE OR REPLACE TRIGGER notes_stats_{event.lower()}
+                AFTER {event} ON notes REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION notes_stats_apply()
+            ''')
+        cursor.execute('''
+            CREATE OR REPLACE TRIGGER notes_stats_truncate
+            AFTER TRUNCATE ON notes
+            FOR EACH STATEMENT EXECUTE FUNCTION notes_stats_apply()
+        ''')
+        if not exists:
+            cursor.execute(f'''
+                INSERT INTO notes_stats (bucket, notes, content_bytes)
+                SELECT {_STATS_BUCKET}, count(*), sum(octet_length(content))
+                FROM notes GROUP BY 1
+            ''')
+
+    def _init_changes(self, cursor):
+        """Создаёт столбцы, надгробия и триггеры ленты изменений.
+
+        * добавление заметки получает номер из notes_change_seq (значение
+          по умолчанию change_seq), изменение заголовка или текста - новый
+          номер и updated_at (триггер notes_touch);
+        * удаление записывает надгробие с новым номером в notes_tombstones,
+          повторное добавление заметки с тем же ID надгробие убирает;
+        * вместе с номером заметка и надгробие получают ID своей транзакции
+          (change_xid). Лента изменений упорядочена по нему и выдаёт только
+          транзакции, завершившиеся до самой старой незавершённой (см.
+          NoteStorage._changes_sql), поэтому читатель не пропустит
+          изменение, зафиксированное позже, а записи не ждут друг друга.
+          Самая старая незавершённая транзакция ищется по всему кластеру:
+          долгая пишущая транзакция в любой базе данных сервера
+          задерживает ленту до своего завершения.
+
+        Args:
+            cursor: Курсор текущего подключения.
+        """
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS notes_change_seq")
+        cursor.execute(
+            "ALTER TABLE notes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE "
+            "NOT NULL DEFAULT CURRENT_TIMESTAMP"
+        )
+        cursor.execute(
+            "ALTER TABLE notes ADD COLUMN IF NOT EXISTS change_seq BIGINT "
+            "NOT NULL DEFAULT nextval('notes_change_seq')"
+        )
+        cursor.execute(
+            "ALTER TABLE notes ADD COLUMN IF NOT EXISTS change_xid xid8 "
+            "NOT NULL DEFAULT pg_current_xact_id()"
+        )
+        cursor.execute("DROP INDEX IF EXISTS notes_change_seq_idx")
+        cursor.execute("CREATE INDEX IF NOT EXISTS notes_change_xid_idx ON notes (change_xid)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notes_tombstones (
+                id INTEGER PRIMARY KEY,
+                change_seq BIGINT NOT NULL,
+                deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute(
+            "ALTER TABLE notes_tombstones ADD COLUMN IF NOT EXISTS change_xid xid8 "
+            "NOT NULL DEFAULT pg_current_xact_id()"
+        )
+        cursor.execute("DROP INDEX IF EXISTS notes_tombstones_change_seq_idx")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS notes_tombstones_change_xid_idx ON notes_tombstones (change_xid)"
+        )
+
+        # Прежние версии упорядочивали изменения общей блокировкой
+        cursor.execute("DROP TRIGGER IF EXISTS notes_change_lock ON notes")
+        cursor.execute("DROP FUNCTION IF EXISTS notes_change_lock()")
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION notes_touch() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.title IS DISTINCT FROM OLD.title OR NEW.content IS DISTINCT FROM OLD.content THEN
+                    NEW.updated_at := CURRENT_TIMESTAMP;
+                    NEW.change_seq := nextval('notes_change_seq');
+                    NEW.change_xid := pg_current_xact_id();
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute('''
+            CREATE OR REPLACE TRIGGER notes_touch
+            BEFORE UPDATE ON notes
+            FOR EACH ROW EXECUTE FUNCTION notes_touch()
+        ''')
+        cursor.execute('''
+            CREATE OR REPLACE FUNCTION notes_track_tombstones() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    INSERT INTO notes_tombstones AS t (id, change_seq)
+                    SELECT id, nextval('notes_change_seq') FROM old_rows
+                    ON CONFLICT (id) DO UPDATE
+                    SET change_seq = EXCLUDED.change_seq, change_xid = EXCLUDED.change_xid,
+                        deleted_at = CURRENT_TIMESTAMP;
+                ELSE
+                    DELETE FROM notes_tombstones t USING new_rows n WHERE t.id = n.id;
+                END IF;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        for event, referencing in (('INSERT', 'NEW TABLE AS new_rows'),
+                                   ('DELETE', 'OLD TABLE AS old_rows')):
+            cursor.execute(f'''
+                CREATE OR REPLACE TRIGGER notes_tombstones_{event.lower()}
+                AFTER {event} ON notes REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION notes_track_tombstones()
+            ''')
+
+    def listen(self, channel: str):
+        """Открывает отдельное подключение, подписанное на канал LISTEN.
+
+        Подключение не берётся из пула: оно живёт, пока нужна подписка.
+        Новые уведомления появляются в conn.notifies после conn.poll().
+
+        Args:
+            channel (str): Имя канала.
+
+        Returns:
+            Подключение psycopg2 в режиме autocommit.
+        """
+        conn = psycopg2.connect(**self.connect_params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {channel}")
+        return conn
+
     def close_connection(self):
-        """Закрывает подключение к базе данных."""
-        if self.connection and not self.connection.closed:
-            self.connection.close()
+        """Возвращает подключение текущего потока в пул."""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            self._local.depth = 0
+            self._local.connection = None
+            self.pool.putconn(conn)
 
 # Тестовое подключение и создание таблицы
 if __name__ == "__main__":
@@ -63,4 +944,4 @@ if __name__ == "__main__":
         print("✅ Модуль database.py работает корректно!")
         db.close_connection()
     except Exception as e:
-        print(f"❌ Ошибка: {e}")
\ No newline at end of file
+        print(f"❌ Ошибка: {e}")
@@ -0,0 +1,205 @@
+"""
+Модуль фильтрации заметок по дате.
+
+Содержит функцию date_range, которая переводит фильтр даты из командной
+строки в интервал [начало, конец), и класс DateIndex - отсортированный
+индекс дат создания для JSON-хранилища.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sidecar import SidecarIndex
+
+
+def date_range(date_filter: str, today: Optional[date] = None) -> Tuple[datetime, Optional[datetime]]:
+    """Переводит фильтр даты в интервал времени создания.
+
+    * today - сегодня;
+    * week, month, year - последние 7, 30 и 365 дней;
+    * ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ - конкретный день, месяц или год.
+
+    Args:
+        date_filter (str): Фильтр даты.
+        today (date, optional): Текущая дата. По умолчанию сегодняшняя.
+
+    Returns:
+        Tuple[datetime, Optional[datetime]]: Начало интервала (включительно)
+        и конец (не включительно) или None, если интервал не ограничен сверху.
+
+    Raises:
+        ValueError: Если фильтр не распознан.
+    """
+    today = today or datetime.now().date()
+    start_of_today = datetime.combine(today, datetime.min.time())
+
+    if date_filter == 'today':
+        return start_of_today, start_of_today + timedelta(days=1)
+    if date_filter == 'week':
+        return start_of_today - timedelta(days=7), None
+    if date_filter == 'month':
+        return start_of_today - timedelta(days=30), None
+    if date_filter == 'year':
+        return start_of_today - timedelta(days=365), None
+    if len(date_filter) == 10:  # ГГГГ-ММ-ДД
+        start = datetime.strptime(date_filter, '%Y-%m-%d')
+        return start, start + timedelta(days=1)
+    if len(date_filter) == 7:  # ГГГГ-ММ
+        start = datetime.strptime(date_filter, '%Y-%m')
+        if start.month == 12:
+            return start, start.replace(year=start.year + 1, month=1)
+        return start, start.replace(month=start.month + 1)
+    if len(date_filter) == 4:  # ГГГГ
+        start = datetime.strptime(date_filter, '%Y')
+        return start, start.replace(year=start.year + 1)
+    raise ValueError(f"Неизвестный фильтр даты: {date_filter}")
+
+
+def local_moment(moment: Optional[datetime]) -> Optional[datetime]:
+    """Время без часового пояса (местное, как у date_range) с местным поясом.
+
+    PostgreSQL сравнивает время без пояса с TIMESTAMP WITH TIME ZONE в
+    поясе сессии (TimeZone сервера), а не в поясе программы; с явным
+    поясом границы дней совпадают с JSON-хранилищем и статистикой.
+
+    Args:
+        moment (datetime, optional): Время или None.
+
+    Returns:
+        datetime: То же время с часовым поясом (None, если moment - None).
+    """
+    if moment is None or moment.tzinfo is not None:
+        return moment
+    return moment.astimezone()
+
+
+def iso_range(date_filter: str) -> Tuple[str, Optional[str]]:
+    """Интервал date_range в виде строк ISO для сравнения с created_at.
+
+    Строки ISO одного формата сравниваются так же, как даты, поэтому
+    created_at не нужно разбирать для каждой заметки.
+
+    Args:
+        date_filter (str): Фильтр даты.
+
+    Returns:
+        Tuple[str, Optional[str]]: Начало и конец интервала.
+
+    Raises:
+        ValueError: Если фильтр не распознан.
+    """
+    start, end = date_range(date_filter)
+    return start.isoformat(), end.isoformat() if end else None
+
+
+class DateIndex(SidecarIndex):
+    """Отсортированный индекс дат создания заметок для JSON-хранилища.
+
+    Хранит пары (created_at, ID) в порядке возрастания даты, поэтому
+    заметки за интервал находятся двумя бинарными поисками.
+
+    Attributes:
+        path (str): Путь к файлу индекса.
+    """
+
+    def _clear(self):
+        """Сбрасывает индекс в пустое состояние."""
+        self._entries: List[Tuple[str, int]] = []
+        self._dates: Dict[int, str] = {}
+
+    def add(self, note_data: dict):
+        """Добавляет заметку в индекс или обновляет её дату.
+
+        Args:
+            note_data (dict): Словарь с данными заметки.
+        """
+        self.remove(note_data['id'])
+        entry = (note_data['created_at'], note_data['id'])
+        insort(self._entries, entry)
+        self._dates[note_data['id']] = note_data['created_at']
+
+    @staticmethod
+    def extract_shard(notes_data: Iterable[dict]) -> List[Tuple[str, int]]:
+        """Собирает пары (created_at, ID) части заметок для merge (в отдельном процессе).
+
+        Args:
+            notes_data (Iterable[dict]): Словари с данными заметок.
+
+        Returns:
+            List[Tuple[str, int]]: Пары по возрастанию даты.
+        """
+        return sorted((note_data['created_at'], note_data['id']) for note_data in notes_data)
+
+    def merge(self, parts: List[List[Tuple[str, int]]]):
+        """Добавляет в индекс результаты extract_shard.
+
+        Части уже отсортированы, поэтому объединяются слиянием по дате
+        без повторной сортировки.
+
+        Args:
+            parts (List[List[Tuple[str, int]]]): Результаты extract_shard.
+        """
+        for part in parts:
+            for _, note_id in part:
+                self.remove(note_id)
+        self._entries = list(heapq.merge(self._entries, *parts))
+        for part in parts:
+            self._dates.update((note_id, created_at) for created_at, note_id in part)
+
+    def remove(self, note_id: int):
+        """Удаляет заметку из индекса.
+
+        Args:
+            note_id (int): ID заметки.
+        """
+        created_at = self._dates.pop(note_id, None)
+        if created_at is not None:
+            position = bisect_left(self._entries, (created_at, note_id))
+            del self._entries[position]
+
+    def created_at(self, note_id: int) -> Optional[str]:
+        """Возвращает дату создания заметки в формате ISO или None, если её нет в индексе.
+
+        Args:
+            note_id (int): ID заметки.
+        """
+        return self._dates.get(note_id)
+
+    def bounds(self) -> Tuple[Optional[str], Optional[str]]:
+        """Возвращает даты создания самой старой и самой новой заметки (None, если индекс пуст)."""
+        if not self._entries:
+            return None, None
+        return self._entries[0][0], self._entries[-1][0]
+
+    def range(self, start: Optional[str] = None, end: Optional[str] = None,
+              before: Optional[Tuple[str, int]] = None, limit: Optional[int] = None) -> List[int]:
+        """Возвращает ID заметок, созданных в интервале [start, end).
+
+        Args:
+            start (str, optional): Начало интервала в формате ISO.
+            end (str, optional): Конец интервала в формате ISO.
+            before (tuple, optional): Ключ (created_at, id): выдаются только
+                заметки, которые в порядке от новых к старым идут после него.
+            limit (int, optional): Максимальное количество ID.
+
+        Returns:
+            List[int]: ID заметок от новых к старым.
+        """
+        low = bisect_left(self._entries, (start,)) if start else 0
+        high = bisect_left(self._entries, (end,)) if end else len(self._entries)
+        if before is not None:
+            high = min(high, bisect_left(self._entries, tuple(before)))
+        if limit is not None:
+            low = max(low, high - limit)
+        return [note_id for _, note_id in reversed(self._entries[low:high])]
+
+    def _serialize(self) -> dict:
+        """Пары (created_at, ID) для файла индекса."""
+        return {'entries': self._entries}
+
+    def _restore(self, data: dict):
+        """Восстанавливает пары (created_at, ID) из файла индекса."""
+        self._entries = [(created_at, note_id) for created_at, note_id in data['entries']]
+        self._dates = {note_id: created_at for created_at, note_id in self._entries}
@@ -0,0 +1,670 @@
+"""
+Модуль журнала изменений JSON-хранилища.
+
+Содержит класс NoteJournal, который вместо полной перезаписи notes.json
+дописывает каждое изменение (добавление, обновление, удаление) в конец
+файла журнала. Снимок (сам notes.json) периодически собирается из журнала.
+
+Вместе со снимком пишется файл записей (см. records.py): заметки снимка
+читаются из него через mmap по одной, поэтому в памяти держатся только
+изменения журнала после последнего снимка.
+
+С одними файлами могут работать несколько процессов: запись в журнал и
+сборка снимка идут под блокировкой notes.json.lock (см. locking.py), а
+перед ними журнал догоняет изменения, дописанные другими процессами.
+
+Каждая запись журнала получает номер изменения, и журнал ведёт по ним
+ленту изменений с надгробиями удалённых заметок (см. changes.py).
+"""
+
+import atexit
+import json
+import os
+import threading
+import weakref
+import time
+from collections.abc import Mapping
+from itertools import takewhile
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .changes import ChangeLog
+from .codec import decode_note, encode_note
+from .locking import FileLock, fsync_directory, remove_orphaned_files
+from .metrics import registry as metrics
+from .parallel import build_indexes
+from .records import RecordReader, write_records
+
+
+class NoteJournal:
+    """Журнал изменений заметок со снимком состояния.
+
+    Состояние хранилища = снимок + записи журнала поверх него. Каждая запись
+    журнала - одна строка JSON (формат JSON Lines):
+
+    * ``{"op": "put", "note": {...}}`` - добавление или обновление заметки;
+      в заметку записываются номер изменения change_seq и время updated_at;
+    * ``{"op": "delete", "id": 5, "seq": 18}`` - удаление заметки с номером
+      изменения.
+
+    Записи идемпотентны, поэтому повторное применение журнала к уже
+    собранному снимку (например, после сбоя во время сжатия) безопасно.
+
+    Версия состояния на диске - отметка снимка и прочитанная длина каждого
+    файла журнала (по номеру inode, поэтому переименование журнала при
+    сжатии не сбивает счёт). Если версия изменилась, то есть другой процесс
+    дописал журнал или собрал снимок, журнал дочитывает только новые записи
+    или, после нового снимка, загружается заново. Записи дописываются
+    одной операцией под блокировкой и сбрасываются на диск (fsync).
+
+    К журналу можно подключить индексы (например, SearchIndex) - объекты с
+    методами add, remove, load, dumps и save. Журнал обновляет их при каждом
+    изменении и сохраняет вместе со снимком. Индексы с методами
+    extract_shard и merge строятся по большому снимку параллельно (см. parallel.py).
+
+    Attributes:
+        snapshot_path (str): Путь к файлу снимка (notes.json).
+        journal_path (str): Путь к файлу журнала.
+        compact_threshold (int): Количество записей журнала, после которого
+            запускается фоновое сжатие.
+        indexes (list): Индексы, которые обновляются вместе с журналом.
+        changes (ChangeLog): Лента изменений (входит в indexes).
+        fsync (bool): Сбрасывать ли записи журнала на диск перед возвратом.
+    """
+
+    def __init__(self, snapshot_path: str, compact_threshold: int = 1000,
+                 indexes: Optional[list] = None, fsync: bool = True):
+        """Инициализирует журнал.
+
+        Args:
+            snapshot_path (str): Путь к файлу снимка. Существующий notes.json
+                используется как первый снимок без преобразований.
+            compact_threshold (int, optional): Порог записей для сжатия.
+                По умолчанию 1000.
+            indexes (list, optional): Индексы заметок. По умолчанию нет.
+            fsync (bool, optional): Сбрасывать записи журнала на диск.
+                По умолчанию True.
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + '.journal'
+        self.compact_threshold = compact_threshold
+        self.changes = ChangeLog(snapshot_path + '.changes')
+        self.indexes = list(indexes or []) + [self.changes]
+        self.records_path = snapshot_path + '.records'
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        # Блокировка между процессами; берётся всегда после self._lock
+        self._file_lock = FileLock(snapshot_path + '.lock')
+        self._compaction_lock = FileLock(snapshot_path + '.compact.lock')
+        self._loaded = False
+        # Версия на диске, до которой дочитано состояние в памяти
+        self._stamp: tuple = (0, 0)
+        self._offsets: Dict[int, int] = {}
+        self._records: Optional[RecordReader] = None
+        # Изменения поверх файла записей: новые версии заметок и удалённые ID
+        self._notes: Dict[int, dict] = {}
+        self._deleted: Set[int] = set()
+        self._view = NotesView(self)
+        self._max_id = 0
+        # Наименьший ID: временные ID заметок без базы данных отрицательные
+        self._min_id = 0
+        self._journal_records = 0
+        self._compaction: Optional[threading.Thread] = None
+        atexit.register(_close_journal, weakref.ref(self))
+
+    @property
+    def _rotated_path(self) -> str:
+        """Путь к журналу, который в данный момент сжимается в снимок."""
+        return self.journal_path + '.old'
+
+    def load(self) -> 'NotesView':
+        """Загружает состояние: снимок и журнал поверх него.
+
+        Заметки снимка не разбираются при загрузке - они читаются из файла
+        записей при обращении. Если файл записей построен не по текущему
+        снимку (его нет или notes.json изменён), он строится заново.
+        Повторный вызов дочитывает изменения других процессов, если они есть.
+
+        Returns:
+            NotesView: Заметки по ID (только для чтения).
+
+        Raises:
+            ValueError: Если notes.json повреждён.
+        """
+        with self._lock:
+            if not self._loaded or self._outdated():
+                with self._file_lock:
+                    self._sync()
+            return self._view
+
+    def _load_all(self):
+        """Загружает состояние заново: файл записей снимка и оба файла журнала."""
+        if not self._loaded:
+            # Временные файлы сжатия, прерванного выходом другого процесса
+            remove_orphaned_files(self.snapshot_path)
+        self._notes = {}
+        self._deleted = set()
+        self._offsets = {}
+        self._stamp = self._snapshot_stamp()
+        self._records = self._open_records(self._stamp)
+        self._max_id = self._records.max_id
+        self._min_id = min(self._records.min_id, 0)
+        stale = [index for index in self.indexes if not index.load(self._stamp)]
+        if stale:
+            build_indexes(self._records, stale)
+        self._journal_records = 0
+        self._loaded = True
+        self._catch_up()
+
+    def _journal_files(self) -> Iterator[tuple]:
+        """Существующие файлы журнала: путь, номер inode и размер."""
+        for path in (self._rotated_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_ino, stat.st_size
+
+    def _outdated(self) -> bool:
+        """Изменилась ли версия на диске: новый снимок или дописанный журнал."""
+        if self._snapshot_stamp() != self._stamp:
+            return True
+        return any(size != self._offsets.get(inode, 0) for _, inode, size in self._journal_files())
+
+    def _sync(self):
+        """Приводит состояние в памяти к версии на диске; вызывается под блокировкой файла."""
+        if not self._loaded or self._snapshot_stamp() != self._stamp:
+            # Другой процесс собрал снимок - журнал, который мы читали, вошёл в него
+            self._load_all()
+        else:
+            self._catch_up()
+
+    def _catch_up(self):
+        """Дочитывает из файлов журнала записи, которых ещё нет в памяти."""
+        for path, inode, size in self._journal_files():
+            offset = self._offsets.get(inode, 0)
+            if size > offset:
+                count, self._offsets[inode] = self._replay(path, offset)
+                self._journal_records += count
+
+    def _open_records(self, stamp) -> RecordReader:
+        """Открывает файл записей снимка, при необходимости строит его из notes.json.
+
+        Args:
+            stamp: Отметка текущего снимка.
+
+        Returns:
+            RecordReader: Файл записей.
+        """
+        try:
+            records = RecordReader(self.records_path)
+            if records.stamp == tuple(stamp):
+                return records
+        except (FileNotFoundError, ValueError):
+            pass
+        write_records(self.records_path, self._read_snapshot(), stamp)
+        return RecordReader(self.records_path)
+
+    def _snapshot_stamp(self, path: Optional[str] = None) -> tuple:
+        """Отметка снимка (размер и время изменения), по которой проверяются индексы."""
+        try:
+            stat = os.stat(path or self.snapshot_path)
+        except FileNotFoundError:
+            return (0, 0)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _file_id(path: str) -> Optional[tuple]:
+        """Номер inode и размер файла или None, если файла нет."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size)
+
+    def _read_snapshot(self) -> List[dict]:
+        """Читает снимок.
+
+        Returns:
+            List[dict]: Список словарей с данными заметок.
+
+        Raises:
+            ValueError: Если файл повреждён. Пустой список вместо него привёл
+                бы к тому, что следующее сжатие перезапишет notes.json пустым.
+        """
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                notes_data = json.load(f)
+                metrics.inc('notebook_json_bytes_read_total', os.fstat(f.fileno()).st_size,
+                            file='snapshot')
+                return [decode_note(note_data) for note_data in notes_data]
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Файл {self.snapshot_path} повреждён ({e}); "
+                             f"исправьте его или восстановите из резервной копии") from e
+
+    def _replay(self, path: str, offset: int = 0) -> Tuple[int, int]:
+        """Применяет записи файла журнала к состоянию, начиная со смещения.
+
+        Args:
+            path (str): Путь к файлу журнала.
+            offset (int, optional): Смещение первой непрочитанной записи.
+
+        Returns:
+            Tuple[int, int]: Количество применённых записей и смещение после
+            последней целой строки.
+        """
+        count = 0
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Строка ещё не дописана (или оборвана сбоем) - дочитаем позже
+                        break
+                    offset += len(line)
+                    try:
+                        record = json.loads(line)
+                        if record['op'] == 'put':
+                            record['note'] = decode_note(record['note'])
+                    except ValueError:
+                        # Испорченная строка после сбоя - пропускаем
+                        continue
+                    self._apply(record)
+                    count += 1
+                metrics.inc('notebook_json_bytes_read_total', f.tell(), file='journal')
+        except FileNotFoundError:
+            pass
+        return count, offset
+
+    def _apply(self, record: dict):
+        """Применяет одну запись журнала к состоянию в памяти.
+
+        Args:
+            record (dict): Запись журнала.
+        """
+        if record['op'] == 'put':
+            note_data = record['note']
+            self._notes[note_data['id']] = note_data
+            self._deleted.discard(note_data['id'])
+            self._max_id = max(self._max_id, note_data['id'])
+            self._min_id = min(self._min_id, note_data['id'])
+            for index in self.indexes:
+                index.add(note_data)
+        elif record['op'] == 'delete':
+            self._notes.pop(record['id'], None)
+            self._deleted.add(record['id'])
+            for index in self.indexes:
+                index.remove(record['id'])
+            # Удаления, записанные до появления ленты, номера не имеют
+            self.changes.tombstone(record['id'], record.get('seq', 0))
+
+    def notes(self) -> List[dict]:
+        """Возвращает все заметки.
+
+        Returns:
+            List[dict]: Список словарей с данными заметок.
+        """
+        with self._lock:
+            return list(self.load().values())
+
+    def max_id(self) -> int:
+        """Возвращает наибольший выданный ID.
+
+        Returns:
+            int: Наибольший ID или 0, если заметок ещё не было.
+        """
+        with self._lock:
+            self.load()
+            return self._max_id
+
+    def put(self, note_data: dict):
+        """Записывает добавление или обновление заметки.
+
+        Args:
+            note_data (dict): Словарь с данными заметки (с заполненным ID).
+        """
+        self.commit([note_data], [])
+
+    def put_many(self, notes_data: List[dict]):
+        """Записывает добавление или обновление нескольких заметок одной записью в файл.
+
+        Args:
+            notes_data (List[dict]): Словари с данными заметок (с заполненными ID).
+        """
+        self.commit(notes_data, [])
+
+    def put_new(self, notes_data: List[dict]) -> List[int]:
+        """Выдаёт новым заметкам временные ID и записывает их.
+
+        Новые заметки попадают в журнал без базы данных, когда она
+        недоступна. Их ID отрицательные (-1, -2, ...), поэтому не совпадают
+        с ID, которые потом выдаст последовательность базы данных; при
+        следующем подключении к базе заметки переносятся в неё и получают
+        постоянные ID (см. NoteStorage.sync_offline_notes). ID выдаются
+        после наименьшего ID на диске под блокировкой файла, поэтому два
+        процесса не выдадут один и тот же ID, а удалённые ID не повторяются.
+
+        Args:
+            notes_data (List[dict]): Словари с данными заметок; поле id
+                заполняется.
+
+        Returns:
+            List[int]: Выданные ID в порядке заметок.
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            for offset, note_data in enumerate(notes_data, start=1):
+                note_data['id'] = self._min_id - offset
+            self._append([{'op': 'put', 'note': note_data} for note_data in notes_data])
+            return [note_data['id'] for note_data in notes_data]
+
+    def temporary_ids(self) -> List[int]:
+        """Временные ID заметок, ещё не перенесённых в базу данных (см. put_new).
+
+        Returns:
+            List[int]: ID в порядке выдачи (-1, -2, ...).
+        """
+        with self._lock:
+            view = self.load()
+            ids = set(takewhile(lambda note_id: note_id < 0, self._records.ids()))
+            ids.update(note_id for note_id in self._notes if note_id < 0)
+            return sorted((note_id for note_id in ids if note_id in view), reverse=True)
+
+    def delete(self, note_id: int) -> bool:
+        """Записывает удаление заметки.
+
+        Args:
+            note_id (int): ID заметки.
+
+        Returns:
+            bool: True если заметка была в хранилище, иначе False.
+        """
+        return bool(self.commit([], [note_id]))
+
+    def delete_many(self, note_ids: List[int]) -> List[int]:
+        """Записывает удаление нескольких заметок одной записью в файл.
+
+        Args:
+            note_ids (List[int]): ID заметок.
+
+        Returns:
+            List[int]: ID заметок, которые были в хранилище.
+        """
+        return self.commit([], note_ids)
+
+    def commit(self, notes_data: List[dict], note_ids: List[int]) -> List[int]:
+        """Записывает пачку изменений одной записью в файл под блокировкой.
+
+        Удаления проверяются по состоянию, дочитанному под блокировкой, а не
+        по устаревшей копии в памяти, поэтому пачки нескольких процессов
+        применяются по очереди и ни одна не теряется.
+
+        Args:
+            notes_data (List[dict]): Добавленные и обновлённые заметки (с ID).
+            note_ids (List[int]): ID удалённых заметок; удаляются после добавлений.
+
+        Returns:
+            List[int]: ID удалённых заметок, которые были в хранилище.
+        """
+        with self._lock, self._file_lock:
+            self._sync()
+            records = [{'op': 'put', 'note': note_data} for note_data in notes_data]
+            existing = list(dict.fromkeys(note_ids))
+            if existing:
+                present = {note_data['id'] for note_data in notes_data}
+                existing = [note_id for note_id in existing
+                            if note_id in present or note_id in self._view]
+                records += [{'op': 'delete', 'id': note_id} for note_id in existing]
+            if records:
+                self._append(records)
+            return existing
+
+    def _append(self, records: List[dict]):
+        """Дописывает записи в конец журнала одной операцией записи.
+
+        Вызывается под self._lock и блокировкой файла после _sync, поэтому
+        номера изменений, выданные записям, больше всех номеров на диске.
+        Номер - время в микросекундах, но не меньше предыдущего номера + 1:
+        он растёт, даже если лента построена заново без прежних надгробий.
+
+        Args:
+            records (List[dict]): Записи журнала; им выдаются номера изменений.
+
+        Raises:
+            IOError: Если произошла ошибка записи в файл.
+        """
+        seq = max(self.changes.max_seq, time.time_ns() // 1000)
+        updated_at = datetime.now().isoformat()
+        for record in records:
+            seq += 1
+            if record['op'] == 'put':
+                record['note'] = dict(record['note'], change_seq=seq, updated_at=updated_at)
+            else:
+                record['seq'] = seq
+        data = ''.join(json.dumps(_encode_record(record), ensure_ascii=False) + '\n'
+                       for record in records).encode('utf-8')
+        with open(self.journal_path, 'ab') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if f.tell() != self._offsets.get(inode, 0):
+                # Хвост файла - строка, оборванная сбоем; новые записи начинаем с новой строки
+                data = b'\n' + data
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self._offsets[inode] = f.tell()
+        metrics.inc('notebook_json_bytes_written_total', len(data), file='journal')
+        for record in records:
+            self._apply(record)
+        self._journal_records += len(records)
+
+        if self._journal_records >= self.compact_threshold:
+            self.compact(wait=False)
+
+    def compact(self, wait: bool = True):
+        """Собирает новый снимок из текущего состояния.
+
+        Текущий журнал переименовывается, и новые записи идут в чистый файл,
+        поэтому запись снимка не блокирует добавление заметок. Одновременно
+        сжатие выполняет только один процесс (блокировка notes.json.compact.lock).
+
+        Args:
+            wait (bool, optional): Дождаться окончания записи снимка.
+                По умолчанию True. При False снимок пишется в фоновом потоке,
+                а если журнал уже сжимает другой процесс, сжатие пропускается.
+        """
+        while True:
+            with self._lock:
+                self.load()
+                running = self._compaction
+                if running is None or not running.is_alive():
+                    self._compaction = threading.Thread(
+                        target=self._compact, args=(wait,), daemon=True
+                    )
+                    self._compaction.start()
+                    compaction = self._compaction
+                    break
+                if not wait:
+                    return
+            # Ждём предыдущее сжатие без блокировки - ему она тоже нужна
+            running.join()
+        if wait:
+            compaction.join()
+
+    def close(self):
+        """Дожидается окончания фонового сжатия.
+
+        Поток сжатия - фоновый (daemon), и без ожидания выход из программы
+        прервал бы запись снимка на середине.
+        """
+        with self._lock:
+            compaction = self._compaction
+        if compaction is not None and compaction is not threading.current_thread():
+            compaction.join()
+
+    def _compact(self, wait: bool):
+        """Фоновый поток сжатия: переименовывает журнал и записывает снимок.
+
+        Args:
+            wait (bool): Ждать, пока сжатие закончит другой процесс.
+        """
+        if not self._compaction_lock.acquire(blocking=wait):
+            # Журнал уже сжимает другой процесс; его снимок мы загрузим при синхронизации
+            return
+        try:
+            with self._lock, self._file_lock:
+                self._sync()
+                # Если переименованный журнал остался от прерванного сжатия,
+                # новый журнал не трогаем: его записи войдут в снимок, а их
+                # повторное применение поверх снимка безопасно
+                if not os.path.exists(self._rotated_path) and os.path.exists(self.journal_path):
+                    os.replace(self.journal_path, self._rotated_path)
+                    fsync_directory(self.journal_path)
+                self._journal_records = 0
+                # Версия, по которой собирается снимок: если к записи снимка она
+                # изменится, снимок устарел и не записывается
+                state = (self._records, dict(self._notes), set(self._deleted),
+                         self._stamp, self._file_id(self._rotated_path))
+            self._write_snapshot(*state)
+        finally:
+            self._compaction_lock.release()
+
+    def _write_snapshot(self, records: RecordReader, changed: Dict[int, dict], deleted: Set[int],
+                        stamp: tuple, rotated: Optional[tuple]):
+        """Записывает снимок и файл записей и удаляет вошедший в них журнал.
+
+        Заметки берутся из прежнего файла записей и изменений поверх него по
+        одной, поэтому весь снимок в памяти не собирается. Снимок и файл
+        записей пишутся во временные файлы без блокировки; подменяют они
+        notes.json под блокировкой и только если с начала сжатия ни снимок,
+        ни переименованный журнал не изменились (иначе снимок уже собрал
+        другой процесс, и этот снимок может не содержать его записей).
+
+        Args:
+            records (RecordReader): Файл записей прежнего снимка.
+            changed (Dict[int, dict]): Изменённые и новые заметки.
+            deleted (Set[int]): Удалённые ID.
+            stamp (tuple): Отметка прежнего снимка.
+            rotated (tuple, optional): Номер inode и размер переименованного журнала.
+        """
+        def merged():
+            for note_data in records:
+                note_id = note_data['id']
+                if note_id in changed:
+                    yield changed[note_id]
+                elif note_id not in deleted:
+                    yield note_data
+            for note_id, note_data in changed.items():
+                if note_id not in records:
+                    yield note_data
+
+        snapshot_tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        records_tmp = f"{self.records_path}.{os.getpid()}"
+        try:
+            with open(snapshot_tmp, 'w', encoding='utf-8') as f:
+                # То же, что json.dump(notes, f, indent=2, ensure_ascii=False), но по одной заметке
+                separator = '[\n  '
+                for note_data in merged():
+                    f.write(separator + json.dumps(note_data, indent=2,
+                                                   ensure_ascii=False).replace('\n', '\n  '))
+                    separator = ',\n  '
+                f.write('[]' if separator == '[\n  ' else '\n]')
+                metrics.inc('notebook_json_bytes_written_total', f.tell(), file='snapshot')
+                f.flush()
+                os.fsync(f.fileno())
+            # Переименование сохраняет размер и время изменения - отметку нового снимка
+            new_stamp = self._snapshot_stamp(snapshot_tmp)
+            write_records(records_tmp, merged(), new_stamp)
+            new_records = RecordReader(records_tmp)
+
+            with self._lock, self._file_lock:
+                if self._snapshot_stamp() != stamp or self._file_id(self._rotated_path) != rotated:
+                    return
+                os.replace(snapshot_tmp, self.snapshot_path)
+                os.replace(records_tmp, self.records_path)
+                fsync_directory(self.snapshot_path)
+
+                # Изменения, вошедшие в снимок, больше не нужны в памяти; индексы
+                # могут уже содержать записи нового журнала - это безопасно, при
+                # загрузке журнал применяется к ним повторно
+                self._stamp = new_stamp
+                self._records = new_records
+                self._notes = {note_id: note_data for note_id, note_data in self._notes.items()
+                               if changed.get(note_id) is not note_data}
+                self._deleted -= deleted
+                for index in self.indexes:
+                    index.save(index.dumps(new_stamp))
+                if rotated is not None:
+                    os.remove(self._rotated_path)
+                    self._offsets.pop(rotated[0], None)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка при сжатии журнала заметок: {e}")
+        finally:
+            for path in (snapshot_tmp, records_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _close_journal(journal_ref):
+    """Дожидается фонового сжатия при выходе из программы, если журнал ещё существует."""
+    journal = journal_ref()
+    if journal is not None:
+        journal.close()
+
+
+def _encode_record(record: dict) -> dict:
+    """Запись журнала для файла: содержание большой заметки сжимается (см. codec.py)."""
+    if record['op'] == 'put':
+        return {'op': 'put', 'note': encode_note(record['note'])}
+    return record
+
+
+class NotesView(Mapping):
+    """Заметки журнала по ID: файл записей снимка и изменения поверх него.
+
+    Словарь только для чтения; заметки снимка разбираются из файла записей
+    при каждом обращении.
+    """
+
+    def __init__(self, journal: NoteJournal):
+        self._journal = journal
+
+    def __getitem__(self, note_id: int) -> dict:
+        journal = self._journal
+        note_data = journal._notes.get(note_id)
+        if note_data is not None:
+            return note_data
+        if note_id not in journal._deleted and journal._records is not None:
+            note_data = journal._records.get(note_id)
+            if note_data is not None:
+                return note_data
+        raise KeyError(note_id)
+
+    def __contains__(self, note_id) -> bool:
+        journal = self._journal
+        if note_id in journal._notes:
+            return True
+        return (note_id not in journal._deleted and journal._records is not None
+                and note_id in journal._records)
+
+    def __iter__(self) -> Iterator[int]:
+        journal = self._journal
+        records, changed, deleted = journal._records, dict(journal._notes), set(journal._deleted)
+        if records is not None:
+            for note_id in records.ids():
+                if note_id in changed or note_id not in deleted:
+                    yield note_id
+        for note_id in changed:
+            if records is None or note_id not in records:
+                yield note_id
+
+    def __len__(self) -> int:
+        journal = self._journal
+        records = journal._records
+        if records is None:
+            return len(journal._notes)
+        hidden = sum(1 for note_id in journal._deleted if note_id in records)
+        added = sum(1 for note_id in journal._notes if note_id not in records)
+        return len(records) - hidden + added
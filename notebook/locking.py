@@ -0,0 +1,183 @@
+"""
+Модуль межпроцессной блокировки и атомарной записи файлов.
+
+Содержит класс FileLock - рекомендательную (advisory) блокировку файла
+через fcntl.flock, которой несколько процессов программы согласуют запись
+в JSON-хранилище, - и функцию atomic_write, которая пишет файл во временный
+файл и подменяет им исходный через os.replace после fsync. Читатель видит
+либо старый, либо новый файл целиком, а сбой во время записи оставляет
+старый файл нетронутым.
+
+На платформах без fcntl (Windows) блокировка действует только между
+потоками одного процесса.
+"""
+
+import glob
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - зависит от платформы
+    fcntl = None
+
+
+class FileLock:
+    """Рекомендательная блокировка файла между процессами и потоками.
+
+    Блокировка повторно входимая: поток, который уже держит её, может
+    захватить её ещё раз. Файл блокировки создаётся при первом захвате и
+    не удаляется.
+
+    Attributes:
+        path (str): Путь к файлу блокировки.
+    """
+
+    def __init__(self, path: str):
+        """Инициализирует блокировку.
+
+        Args:
+            path (str): Путь к файлу блокировки (например, notes.json.lock).
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Захватывает блокировку.
+
+        Args:
+            blocking (bool, optional): Ждать, пока блокировку отпустят другие
+                процессы и потоки. По умолчанию True.
+
+        Returns:
+            bool: True если блокировка захвачена; False только при blocking=False.
+        """
+        if not self._lock.acquire(blocking):
+            return False
+        try:
+            if self._depth == 0 and fcntl is not None:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock.release()
+            return False
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth += 1
+        return True
+
+    def release(self):
+        """Отпускает блокировку."""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def close(self):
+        """Закрывает файл блокировки (блокировка не должна быть захвачена)."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def fsync_directory(path: str):
+    """Сбрасывает на диск каталог файла, чтобы переименование пережило сбой.
+
+    Args:
+        path (str): Путь к файлу в каталоге.
+    """
+    if not hasattr(os, 'O_DIRECTORY'):  # pragma: no cover - зависит от платформы
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: str = 'utf-8') -> Iterator[IO]:
+    """Открывает временный файл, который после записи атомарно заменяет path.
+
+    Временный файл свой у каждого процесса. После выхода из блока with файл
+    сбрасывается на диск (fsync) и переименовывается в path; при исключении
+    временный файл удаляется, а path остаётся прежним.
+
+    Args:
+        path (str): Путь к итоговому файлу.
+        mode (str, optional): 'w' или 'wb'. По умолчанию 'w'.
+        encoding (str, optional): Кодировка текстового режима. По умолчанию utf-8.
+
+    Yields:
+        IO: Открытый временный файл.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(path)
+
+
+def _process_alive(pid: int) -> bool:
+    """Проверяет, работает ли процесс с указанным PID."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # Процесс есть, но принадлежит другому пользователю (или проверка недоступна)
+        return True
+    return True
+
+
+def remove_orphaned_files(path: str) -> int:
+    """Удаляет временные файлы, оставшиеся от завершившихся процессов.
+
+    Временные файлы рядом с path содержат PID записавшего их процесса
+    (path.<pid>.tmp, path.records.<pid> и т.п.). Если процесс завершился
+    посреди записи (например, фоновое сжатие не успело закончиться), такие
+    файлы больше никому не нужны.
+
+    Args:
+        path (str): Путь к основному файлу (например, notes.json).
+
+    Returns:
+        int: Количество удалённых файлов.
+    """
+    pattern = re.compile(re.escape(os.path.basename(path)) + r'(\.[a-z]+)?\.(\d+)(\.tmp)?$')
+    removed = 0
+    for candidate in glob.glob(glob.escape(path) + '.*'):
+        match = pattern.match(os.path.basename(candidate))
+        if match is None:
+            continue
+        pid = int(match.group(2))
+        if pid == os.getpid() or _process_alive(pid):
+            continue
+        try:
+            os.remove(candidate)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,209 @@
+"""
+Модуль метрик производительности.
+
+Содержит класс MetricsRegistry - реестр счётчиков и таймеров - и общий
+реестр registry, в который пишут хранилище, база данных, журнал, кэш и
+команды. Метрики собираются только после registry.enable() (или при
+переменной окружения NOTES_METRICS=1); выключенный реестр почти ничего
+не стоит: каждая точка замера сводится к проверке одного флага.
+
+Собираемые метрики:
+
+* notebook_operation_seconds - время операций хранилища и команд;
+* notebook_queries_total, notebook_query_seconds - запросы к PostgreSQL;
+* notebook_rows_fetched_total - строки, полученные из базы данных;
+* notebook_json_bytes_read_total, notebook_json_bytes_written_total -
+  объём чтения и записи JSON-хранилища;
+* notebook_cache_hits_total, notebook_cache_misses_total - кэш запросов;
+* notebook_json_fallbacks_total - переходы на JSON-хранилище из-за ошибки БД.
+
+Реестр выводится в формате Prometheus (to_prometheus), JSON (to_json) или
+в виде таблицы (report) - её печатает main.py --profile.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: dict) -> _Key:
+    """Ключ метрики: имя и отсортированные метки."""
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_labels(labels) -> str:
+    """Метки в формате Prometheus: {a="1",b="2"}."""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр счётчиков и таймеров.
+
+    Attributes:
+        enabled (bool): Собираются ли метрики.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """Инициализирует пустой реестр.
+
+        Args:
+            enabled (bool, optional): Собирать метрики сразу. По умолчанию False.
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = {}
+        # Таймер: [количество, сумма секунд, максимум секунд]
+        self._timers: Dict[_Key, list] = {}
+
+    def enable(self):
+        """Включает сбор метрик."""
+        self.enabled = True
+
+    def disable(self):
+        """Выключает сбор метрик."""
+        self.enabled = False
+
+    def reset(self):
+        """Обнуляет все метрики."""
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Увеличивает счётчик.
+
+        Args:
+            name (str): Имя метрики.
+            value (float, optional): На сколько увеличить. По умолчанию 1.
+            **labels: Метки, например operation='search_notes'.
+        """
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Добавляет замер времени в таймер.
+
+        Args:
+            name (str): Имя метрики.
+            seconds (float): Длительность в секундах.
+            **labels: Метки.
+        """
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            timer = self._timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Контекстный менеджер, замеряющий время блока.
+
+        Args:
+            name (str): Имя метрики.
+            **labels: Метки.
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict:
+        """Возвращает копию всех метрик.
+
+        Returns:
+            dict: {'counters': [...], 'timers': [...]} - списки словарей с
+            именем, метками и значениями.
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            timers = [{'name': name, 'labels': dict(labels), 'count': count,
+                       'sum': total, 'max': longest}
+                      for (name, labels), (count, total, longest) in sorted(self._timers.items())]
+        return {'counters': counters, 'timers': timers}
+
+    def to_json(self) -> str:
+        """Метрики в формате JSON."""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines = []
+        typed = set()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for (name, labels), (count, total, _) in sorted(self._timers.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} summary")
+                    typed.add(name)
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        return '\n'.join(lines) + '\n'
+
+    def report(self) -> str:
+        """Таблица для чтения человеком: таймеры по убыванию общего времени, затем счётчики."""
+        snapshot = self.snapshot()
+        lines = [f"{'операция':<48} {'вызовов':>8} {'всего, мс':>10} {'макс, мс':>9}"]
+        for timer in sorted(snapshot['timers'], key=lambda item: item['sum'], reverse=True):
+            labels = ','.join(f"{value}" for value in timer['labels'].values())
+            title = f"{timer['name']}[{labels}]" if labels else timer['name']
+            lines.append(f"{title:<48} {timer['count']:>8} {timer['sum'] * 1000:>10.2f} "
+                         f"{timer['max'] * 1000:>9.2f}")
+        if snapshot['counters']:
+            lines.append('')
+            for counter in snapshot['counters']:
+                labels = ','.join(f"{value}" for value in counter['labels'].values())
+                title = f"{counter['name']}[{labels}]" if labels else counter['name']
+                lines.append(f"{title:<48} {counter['value']:>8g}")
+        return '\n'.join(lines)
+
+
+registry = MetricsRegistry(enabled=os.getenv('NOTES_METRICS') == '1')
+
+
+def timed(component: str):
+    """Декоратор: замеряет время метода в notebook_operation_seconds.
+
+    Args:
+        component (str): Компонент (storage, commands), метка component.
+
+    Returns:
+        Callable: Декоратор.
+    """
+    def decorator(func):
+        operation = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe('notebook_operation_seconds', time.perf_counter() - started,
+                                 component=component, operation=operation)
+        return wrapper
+    return decorator
@@ -0,0 +1,213 @@
+"""
+Модуль отложенной записи в JSON-хранилище.
+
+Содержит класс JournalMirror, который копит изменения для JSON-журнала в
+памяти и записывает их фоновым потоком раз в flush_interval секунд.
+Несколько изменений одной заметки между записями схлопываются в одно.
+Перед чтением JSON-хранилища и при выходе из программы очередь
+записывается полностью. Если запись не удалась, изменения возвращаются в
+очередь, а фоновый поток повторяет запись с растущей паузой.
+"""
+
+import atexit
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from .journal import NoteJournal
+
+# Наибольшая пауза между повторными попытками записи в секундах
+MAX_RETRY_INTERVAL = 60.0
+
+
+class JournalMirror:
+    """Очередь отложенной записи заметок в NoteJournal.
+
+    Основное хранилище - PostgreSQL; JSON-журнал - его копия, которую не
+    нужно обновлять в момент записи. Методы put_many и delete_many только
+    ставят изменения в очередь. Методы, которым нужно актуальное состояние
+    журнала (load, max_id, put_new, delete_existing), сначала записывают очередь.
+
+    Attributes:
+        journal (NoteJournal): Журнал, в который записываются изменения.
+        flush_interval (float): Интервал фоновой записи в секундах. При 0
+            изменения записываются сразу, без фонового потока.
+    """
+
+    def __init__(self, journal: NoteJournal, flush_interval: float = 1.0):
+        """Инициализирует очередь и запускает фоновый поток.
+
+        Args:
+            journal (NoteJournal): Журнал JSON-хранилища.
+            flush_interval (float, optional): Интервал записи в секундах.
+                По умолчанию 1.
+        """
+        self.journal = journal
+        self.flush_interval = flush_interval
+        # ID заметки -> данные заметки или None (удаление); побеждает последнее изменение
+        self._pending: 'OrderedDict[int, Optional[dict]]' = OrderedDict()
+        self._pending_lock = threading.Lock()
+        # Записи в журнал идут строго по очереди, иначе изменения могут поменяться местами
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(target=self._run, name='journal-mirror', daemon=True)
+            self._thread.start()
+            atexit.register(_close_mirror, weakref.ref(self))
+
+    def _run(self):
+        """Фоновый поток: записывает очередь раз в flush_interval секунд.
+
+        После ошибки записи пауза удваивается (до MAX_RETRY_INTERVAL), после
+        успешной записи возвращается к flush_interval.
+        """
+        interval = self.flush_interval
+        while not self._closed:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                interval = self.flush_interval
+            except Exception as e:
+                interval = min(interval * 2, max(MAX_RETRY_INTERVAL, self.flush_interval))
+                print(f"Ошибка при записи в JSON-хранилище (повтор через {interval:g} с): {e}")
+
+    def put_many(self, notes_data: List[dict]):
+        """Ставит в очередь добавление или обновление заметок.
+
+        Args:
+            notes_data (List[dict]): Данные заметок с заполненными ID.
+        """
+        self._enqueue((note_data['id'], note_data) for note_data in notes_data)
+
+    def delete_many(self, note_ids: Iterable[int]):
+        """Ставит в очередь удаление заметок.
+
+        Args:
+            note_ids (Iterable[int]): ID заметок.
+        """
+        self._enqueue((note_id, None) for note_id in note_ids)
+
+    def _enqueue(self, changes):
+        """Добавляет изменения в очередь, заменяя старые изменения тех же заметок."""
+        with self._pending_lock:
+            for note_id, note_data in changes:
+                self._pending.pop(note_id, None)
+                self._pending[note_id] = note_data
+        if self._thread is None:
+            self.flush()
+
+    def flush(self):
+        """Записывает все изменения из очереди в журнал."""
+        with self._flush_lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """Записывает очередь; вызывается под _flush_lock.
+
+        Raises:
+            Exception: Ошибка записи в журнал; изменения остаются в очереди.
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, OrderedDict()
+
+        # Вся очередь - одна запись в журнал под блокировкой файла: несколько
+        # процессов пишут пачками по очереди, а не ждут блокировку на каждую заметку
+        puts = [note_data for note_data in pending.values() if note_data is not None]
+        deletes = [note_id for note_id, note_data in pending.items() if note_data is None]
+        try:
+            self.journal.commit(puts, deletes)
+        except BaseException:
+            self._requeue(pending)
+            raise
+
+    def _requeue(self, pending: 'OrderedDict[int, Optional[dict]]'):
+        """Возвращает незаписанные изменения в начало очереди.
+
+        Изменения тех же заметок, поставленные в очередь во время записи,
+        новее и не заменяются.
+        """
+        with self._pending_lock:
+            restored = OrderedDict((note_id, note_data) for note_id, note_data in pending.items()
+                                   if note_id not in self._pending)
+            restored.update(self._pending)
+            self._pending = restored
+
+    def load(self) -> Dict[int, dict]:
+        """Записывает очередь и возвращает заметки журнала (см. NoteJournal.load)."""
+        self.flush()
+        return self.journal.load()
+
+    def max_id(self) -> int:
+        """Записывает очередь и возвращает наибольший ID в журнале."""
+        with self._flush_lock:
+            self._flush_locked()
+            return self.journal.max_id()
+
+    def put_new(self, notes_data: List[dict]) -> List[int]:
+        """Записывает очередь, затем сразу записывает новые заметки с временными ID.
+
+        Args:
+            notes_data (List[dict]): Данные заметок без ID.
+
+        Returns:
+            List[int]: Выданные ID (см. NoteJournal.put_new).
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            return self.journal.put_new(notes_data)
+
+    def temporary_ids(self) -> List[int]:
+        """Записывает очередь и возвращает временные ID (см. NoteJournal.temporary_ids)."""
+        with self._flush_lock:
+            self._flush_locked()
+            return self.journal.temporary_ids()
+
+    def replace_ids(self, notes_data: List[dict], old_ids: List[int]):
+        """Сразу заменяет заметки с временными ID заметками с постоянными ID.
+
+        Args:
+            notes_data (List[dict]): Данные заметок с ID из базы данных.
+            old_ids (List[int]): Временные ID тех же заметок.
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            self.journal.commit(notes_data, old_ids)
+
+    def delete_existing(self, note_ids: List[int]) -> List[int]:
+        """Сразу удаляет заметки из журнала.
+
+        Нужен, когда результат удаления известен только JSON-хранилищу
+        (например, база данных недоступна).
+
+        Args:
+            note_ids (List[int]): ID заметок.
+
+        Returns:
+            List[int]: ID заметок, которые были в журнале.
+        """
+        with self._flush_lock:
+            self._flush_locked()
+            return self.journal.delete_many(note_ids)
+
+    def close(self):
+        """Останавливает фоновый поток, записывает оставшуюся очередь и ждёт сжатия журнала."""
+        self._closed = True
+        if self._thread is not None:
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.journal.close()
+
+
+def _close_mirror(mirror_ref):
+    """Записывает очередь при выходе из программы, если очередь ещё существует."""
+    mirror = mirror_ref()
+    if mirror is not None:
+        mirror.close()
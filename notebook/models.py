@@ -5,34 +5,70 @@
 и методы для её преобразования в словарь и обратно.
 """
 
-import json
 from datetime import datetime
+from typing import Optional, Union
 
 class Note:
     """Класс для представления одной заметки.
-    
+
+    Заметка хранится в __slots__ без словаря атрибутов. Дата создания
+    хранится в том виде, в каком пришла (строка ISO из JSON или datetime
+    из базы данных), и преобразуется в другой вид только при первом
+    обращении.
+
     Attributes:
         id (int, optional): Уникальный идентификатор заметки.
         title (str): Заголовок заметки.
         content (str): Основной текст заметки.
-        created_at (str): Дата и время создания в формаite ISO.
+        created_at (str): Дата и время создания в формате ISO.
+        created_datetime (datetime): Дата и время создания.
     """
-    
-    def __init__(self, title: str, content: str):
+
+    __slots__ = ('id', 'title', 'content', '_created_at', '_created_datetime')
+
+    def __init__(self, title: str, content: str, id: Optional[int] = None,
+                 created_at: Union[str, datetime, None] = None):
         """Инициализирует новую заметку.
-        
+
         Args:
             title (str): Заголовок новой заметки.
             content (str): Текст новой заметки.
+            id (int, optional): ID заметки. По умолчанию None (новая заметка).
+            created_at (str или datetime, optional): Дата создания.
+                По умолчанию текущее время.
         """
-        self.id = None
+        self.id = id
         self.title = title
         self.content = content
-        self.created_at = datetime.now().isoformat()
-    
+        self.created_at = created_at if created_at is not None else datetime.now()
+
+    @property
+    def created_at(self) -> str:
+        """Дата и время создания в формате ISO."""
+        if self._created_at is None:
+            self._created_at = self._created_datetime.isoformat()
+        return self._created_at
+
+    @created_at.setter
+    def created_at(self, value: Union[str, datetime]):
+        """Устанавливает дату создания строкой ISO или объектом datetime."""
+        if isinstance(value, datetime):
+            self._created_at = None
+            self._created_datetime = value
+        else:
+            self._created_at = value
+            self._created_datetime = None
+
+    @property
+    def created_datetime(self) -> datetime:
+        """Дата и время создания; строка ISO разбирается один раз."""
+        if self._created_datetime is None:
+            self._created_datetime = datetime.fromisoformat(self._created_at)
+        return self._created_datetime
+
     def to_dict(self):
         """Преобразует объект заметки в словарь.
-        
+
         Returns:
             dict: Словарь с данными заметки, готовый для сериализации в JSON.
         """
@@ -42,37 +78,50 @@ class Note:
             'content': self.content,
             'created_at': self.created_at
         }
-    
+
+    def copy(self) -> 'Note':
+        """Создаёт копию заметки (дата создания не разбирается заново).
+
+        Returns:
+            Note: Новый объект с теми же данными.
+        """
+        return self._create(self.id, self.title, self.content, self._created_at,
+                            self._created_datetime)
+
+    @classmethod
+    def _create(cls, note_id, title, content, created_at, created_datetime):
+        """Создаёт заметку без вызова __init__ (и без лишнего datetime.now())."""
+        note = cls.__new__(cls)
+        note.id = note_id
+        note.title = title
+        note.content = content
+        note._created_at = created_at
+        note._created_datetime = created_datetime
+        return note
+
     @classmethod
     def from_dict(cls, data):
         """Создает объект заметки из словаря.
-        
+
         Args:
             data (dict): Словарь с данными заметки.
-            
+
         Returns:
             Note: Объект заметки, восстановленный из словаря.
         """
-        note = cls(data['title'], data['content'])
-        note.id = data['id']
-        note.created_at = data['created_at']
-        return note
-    
+        return cls._create(data['id'], data['title'], data['content'], data['created_at'], None)
+
     @classmethod
     def from_db_row(cls, row):
         """Создает объект заметки из строки базы данных.
-        
+
         Args:
             row: Кортеж с данными из БД (id, title, content, created_at)
-            
+
         Returns:
             Note: Объект заметки.
         """
-        note = cls(row[1], row[2])
-        note.id = row[0]
         # Обрабатываем как datetime объект, так и строку
-        if hasattr(row[3], 'isoformat'):
-            note.created_at = row[3].isoformat()
-        else:
-            note.created_at = row[3]
-        return note
\ No newline at end of file
+        if isinstance(row[3], datetime):
+            return cls._create(row[0], row[1], row[2], None, row[3])
+        return cls._create(row[0], row[1], row[2], row[3], None)
@@ -0,0 +1,124 @@
+"""
+Модуль параллельного просмотра файла записей JSON-хранилища.
+
+Запросы к JSON-хранилищу идут по индексам (SearchIndex, DateIndex), и
+полностью снимок просматривается только когда индексы нужно построить
+заново: при первом запуске, после замены notes.json или если файлы
+индексов потеряны. На больших снимках это самая долгая операция без базы
+данных, поэтому она делится на части (шарды) по позициям файла записей и
+выполняется в ProcessPoolExecutor.
+
+Каждый процесс сам открывает файл записей через mmap и разбирает свою
+часть, поэтому заметки между процессами не передаются - только то, что
+из них извлекли индексы. Результаты объединяются по порядку частей; даты
+приходят отсортированными и сливаются по created_at.
+
+Процессы пула запускаются через forkserver (или spawn), а не fork: в
+момент построения индексов поток записи в базу данных или другой поток
+может держать блокировку, и её копия в дочернем процессе осталась бы
+захваченной навсегда.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from .records import RecordReader
+
+# Меньше записей быстрее разобрать в одном процессе, чем запустить пул
+PARALLEL_MIN_RECORDS = 50000
+
+
+def shard_bounds(count: int, shards: int) -> List[Tuple[int, int]]:
+    """Делит позиции [0, count) на не более чем shards непустых частей.
+
+    Args:
+        count (int): Количество записей.
+        shards (int): Желаемое количество частей.
+
+    Returns:
+        List[Tuple[int, int]]: Границы [start, stop) частей по порядку.
+    """
+    shards = max(1, min(shards, count))
+    size, extra = divmod(count, shards)
+    bounds, start = [], 0
+    for shard in range(shards):
+        stop = start + size + (1 if shard < extra else 0)
+        if stop > start:
+            bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _pool_context():
+    """Способ запуска процессов пула, не копирующий блокировки других потоков.
+
+    Returns:
+        Контекст multiprocessing: forkserver, если он доступен, иначе spawn.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _extract_shard(path: str, start: int, stop: int, kinds: list) -> list:
+    """Разбирает часть файла записей в отдельном процессе.
+
+    Args:
+        path (str): Путь к файлу записей.
+        start (int): Позиция первой записи части.
+        stop (int): Позиция после последней записи части.
+        kinds (list): Классы индексов (с методом extract_shard).
+
+    Returns:
+        list: Результаты extract_shard каждого класса.
+    """
+    notes_data = list(RecordReader(path).slice(start, stop))
+    return [kind.extract_shard(notes_data) for kind in kinds]
+
+
+def build_indexes(records: RecordReader, indexes: list, workers: Optional[int] = None,
+                  min_records: int = PARALLEL_MIN_RECORDS):
+    """Заполняет индексы заметками файла записей.
+
+    Индексы с методами extract_shard и merge строятся параллельно, если
+    записей не меньше min_records и доступно больше одного процессора;
+    остальные - по одной заметке через add.
+
+    Args:
+        records (RecordReader): Файл записей снимка.
+        indexes (list): Пустые индексы.
+        workers (int, optional): Количество процессов. По умолчанию по числу процессоров.
+        min_records (int, optional): Наименьшее количество записей для
+            параллельного построения. По умолчанию PARALLEL_MIN_RECORDS.
+    """
+    workers = workers or os.cpu_count() or 1
+    parallel = []
+    if workers > 1 and len(records) >= min_records:
+        parallel = [index for index in indexes
+                    if hasattr(index, 'extract_shard') and hasattr(index, 'merge')]
+    sequential = [index for index in indexes if index not in parallel]
+
+    if parallel:
+        kinds = [type(index) for index in parallel]
+        # Частей больше, чем процессов: память процесса ограничена одной частью,
+        # а медленная часть не задерживает остальные
+        bounds = shard_bounds(len(records), workers * 4)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+                shards = list(pool.map(_extract_shard, [records.path] * len(bounds),
+                                       [start for start, _ in bounds],
+                                       [stop for _, stop in bounds],
+                                       [kinds] * len(bounds)))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"Параллельное построение индексов недоступно ({e}), строим в одном процессе")
+            sequential = indexes
+        else:
+            for position, index in enumerate(parallel):
+                index.merge([shard[position] for shard in shards])
+
+    if sequential:
+        for note_data in records:
+            for index in sequential:
+                index.add(note_data)
@@ -0,0 +1,314 @@
+"""
+Модуль запросов к хранилищу заметок.
+
+Содержит класс NoteQuery - описание выборки заметок (текст, интервал дат,
+интервал ID, порядок, limit и offset) - и планировщики, которые переводят
+его в один параметризованный SQL-запрос (SQLPlanner для PostgreSQL,
+SQLitePlanner для SQLite) или в обращения к индексам JSON-хранилища
+(plan_json).
+
+Текст поиска везде означает одно и то же: в заметке есть все слова
+запроса как начала слов ("мол" находит "молоко", "локо" - нет).
+PostgreSQL дополнительно учитывает морфологию (находит и другие формы
+слова, например "молока").
+
+Пример:
+    query = NoteQuery().match("молоко").dated("week").page(limit=10)
+    notes = storage.query(query)
+"""
+
+from datetime import datetime
+from typing import List, Mapping, Optional, Tuple
+
+from .dates import DateIndex, date_range, local_moment
+from .search import SearchIndex, build_tsquery, tokenize
+
+ORDERS = ('newest', 'oldest', 'relevance')
+
+
+class NoteQuery:
+    """Описание выборки заметок.
+
+    Методы match, dated, between, ids, order_by и page не меняют запрос,
+    а возвращают новый, поэтому запросы можно составлять по частям.
+
+    Attributes:
+        text (str, optional): Текст поиска: в заметке должны быть все слова
+            (как начала слов).
+        start (datetime, optional): Начало интервала дат создания (включительно).
+        end (datetime, optional): Конец интервала дат создания (не включительно).
+        min_id (int, optional): Наименьший ID (включительно).
+        max_id (int, optional): Наибольший ID (включительно).
+        order (str, optional): Порядок из ORDERS. По умолчанию relevance при
+            поиске по тексту и newest без него.
+        limit (int, optional): Максимальное количество заметок.
+        offset (int): Сколько первых заметок пропустить.
+    """
+
+    __slots__ = ('text', 'start', 'end', 'min_id', 'max_id', 'order', 'limit', 'offset')
+
+    def __init__(self, text: Optional[str] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, min_id: Optional[int] = None,
+                 max_id: Optional[int] = None, order: Optional[str] = None,
+                 limit: Optional[int] = None, offset: int = 0):
+        """Создаёт запрос.
+
+        Raises:
+            ValueError: Если порядок неизвестен или limit/offset отрицательны.
+        """
+        if order is not None and order not in ORDERS:
+            raise ValueError(f"Неизвестный порядок: {order} (доступны: {', '.join(ORDERS)})")
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit и offset не могут быть отрицательными")
+        self.text = text
+        self.start = start
+        self.end = end
+        self.min_id = min_id
+        self.max_id = max_id
+        self.order = order
+        self.limit = limit
+        self.offset = offset
+
+    def _replace(self, **changes) -> 'NoteQuery':
+        """Копия запроса с изменёнными полями."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return NoteQuery(**fields)
+
+    def match(self, text: Optional[str]) -> 'NoteQuery':
+        """Запрос с поиском по тексту."""
+        return self._replace(text=text)
+
+    def dated(self, date_filter: Optional[str]) -> 'NoteQuery':
+        """Запрос с фильтром даты (today, week, month, year, ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ).
+
+        Raises:
+            ValueError: Если фильтр не распознан.
+        """
+        if not date_filter:
+            return self._replace(start=None, end=None)
+        start, end = date_range(date_filter)
+        return self._replace(start=start, end=end)
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> 'NoteQuery':
+        """Запрос с интервалом дат создания [start, end)."""
+        return self._replace(start=start, end=end)
+
+    def ids(self, min_id: Optional[int] = None, max_id: Optional[int] = None) -> 'NoteQuery':
+        """Запрос с интервалом ID [min_id, max_id]."""
+        return self._replace(min_id=min_id, max_id=max_id)
+
+    def order_by(self, order: Optional[str]) -> 'NoteQuery':
+        """Запрос с порядком из ORDERS.
+
+        Raises:
+            ValueError: Если порядок неизвестен.
+        """
+        return self._replace(order=order)
+
+    def page(self, limit: Optional[int] = None, offset: int = 0) -> 'NoteQuery':
+        """Запрос со страницей: limit заметок после первых offset."""
+        return self._replace(limit=limit, offset=offset)
+
+    @property
+    def words(self) -> List[str]:
+        """Слова текста поиска."""
+        return tokenize(self.text) if self.text else []
+
+    @property
+    def effective_order(self) -> str:
+        """Порядок с учётом значения по умолчанию."""
+        if self.order:
+            return self.order
+        return 'relevance' if self.text is not None else 'newest'
+
+    @property
+    def matches_nothing(self) -> bool:
+        """Запрос заведомо пустой: в тексте поиска нет слов или пустой интервал."""
+        if self.text is not None and not self.words:
+            return True
+        if self.limit == 0:
+            return True
+        if self.min_id is not None and self.max_id is not None and self.min_id > self.max_id:
+            return True
+        return self.start is not None and self.end is not None and self.start >= self.end
+
+    def key(self) -> tuple:
+        """Ключ запроса для кэша."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NoteQuery) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) not in (None, 0))
+        return f"NoteQuery({fields})"
+
+
+class SQLPlanner:
+    """Переводит NoteQuery в один запрос PostgreSQL.
+
+    Текст ищется полнотекстовым поиском по GIN-индексу (слова запроса -
+    как начала слов), даты - по индексу на created_at, ID - по первичному
+    ключу.
+    """
+
+    columns = "id, title, content, created_at"
+
+    def _text(self, query: NoteQuery) -> Tuple[str, List[str], list, str]:
+        """Части запроса для поиска по тексту.
+
+        Returns:
+            tuple: Источник строк (FROM), условия, их параметры и порядок по релевантности.
+        """
+        tsquery = build_tsquery(query.text)
+        return (
+            # Выражение в FROM допустимо только как подзапрос
+            "notes, (SELECT to_tsquery('russian', %s) || to_tsquery('english', %s)) AS q (query)",
+            ["search_vector @@ query"],
+            [tsquery, tsquery],
+            "ts_rank(search_vector, query) DESC, created_at DESC",
+        )
+
+    def _column(self, name: str) -> str:
+        """Имя столбца таблицы notes в запросе."""
+        return name
+
+    def _moment(self, moment: Optional[datetime]) -> Optional[datetime]:
+        """Граница интервала дат как параметр запроса (местное время с поясом)."""
+        return local_moment(moment)
+
+    def _page(self, query: NoteQuery) -> Tuple[str, list]:
+        """LIMIT и OFFSET."""
+        sql, params = "", []
+        if query.limit is not None:
+            sql += " LIMIT %s"
+            params.append(query.limit)
+        if query.offset:
+            sql += " OFFSET %s"
+            params.append(query.offset)
+        return sql, params
+
+    def plan(self, query: NoteQuery) -> Tuple[str, list]:
+        """Строит запрос.
+
+        Args:
+            query (NoteQuery): Запрос.
+
+        Returns:
+            Tuple[str, list]: Текст SQL с параметрами %s и список параметров.
+        """
+        source, conditions, params, relevance = "notes", [], [], None
+        if query.text is not None:
+            source, conditions, params, relevance = self._text(query)
+
+        created_at, note_id = self._column('created_at'), self._column('id')
+        for condition, value in ((f"{created_at} >= %s", self._moment(query.start)),
+                                 (f"{created_at} < %s", self._moment(query.end)),
+                                 (f"{note_id} >= %s", query.min_id), (f"{note_id} <= %s", query.max_id)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        order = query.effective_order
+        if order == 'relevance' and relevance:
+            order_by = relevance
+        elif order == 'oldest':
+            order_by = f"{created_at}, {note_id}"
+        else:
+            order_by = f"{created_at} DESC, {note_id} DESC"
+
+        sql = f"SELECT {self.columns} FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + order_by
+        page_sql, page_params = self._page(query)
+        return sql + page_sql, params + page_params
+
+
+class SQLitePlanner(SQLPlanner):
+    """Переводит NoteQuery в один запрос SQLite.
+
+    Текст ищется по индексу FTS5 (notes_fts), порядок по релевантности -
+    BM25 с большим весом заголовка.
+    """
+
+    columns = "notes.id, notes.title, notes.content, notes.created_at"
+
+    def _text(self, query: NoteQuery) -> Tuple[str, List[str], list, str]:
+        return (
+            "notes_fts JOIN notes ON notes.id = notes_fts.rowid",
+            ["notes_fts MATCH %s"],
+            [" ".join(f'"{word}"*' for word in query.words)],
+            "bm25(notes_fts, 10.0, 1.0), notes.created_at DESC",
+        )
+
+    def _column(self, name: str) -> str:
+        return f"notes.{name}"
+
+    def _moment(self, moment: Optional[datetime]) -> Optional[datetime]:
+        # Дата в SQLite - строка в том виде, в каком записана (местное время)
+        return moment
+
+    def _page(self, query: NoteQuery) -> Tuple[str, list]:
+        # В SQLite OFFSET допустим только после LIMIT; -1 - без ограничения
+        if query.offset and query.limit is None:
+            return " LIMIT -1 OFFSET %s", [query.offset]
+        return super()._page(query)
+
+
+def plan_json(query: NoteQuery, notes_by_id: Mapping[int, dict], search_index: SearchIndex,
+              date_index: DateIndex) -> List[dict]:
+    """Выполняет запрос по индексам JSON-хранилища.
+
+    Поиск по тексту идёт по инвертированному индексу, фильтры и порядок -
+    по индексу дат, поэтому из notes_by_id читаются только заметки
+    итоговой страницы.
+
+    Args:
+        query (NoteQuery): Запрос.
+        notes_by_id (Mapping[int, dict]): Заметки JSON-хранилища по ID.
+        search_index (SearchIndex): Поисковый индекс.
+        date_index (DateIndex): Индекс дат создания.
+
+    Returns:
+        List[dict]: Словари с данными найденных заметок в порядке запроса.
+    """
+    if query.matches_nothing:
+        return []
+    start = query.start.isoformat() if query.start else None
+    end = query.end.isoformat() if query.end else None
+
+    def in_id_range(note_id: int) -> bool:
+        return ((query.min_id is None or note_id >= query.min_id)
+                and (query.max_id is None or note_id <= query.max_id))
+
+    order = query.effective_order
+    if query.text is not None:
+        found = []
+        for note_id, score in search_index.search(query.text):
+            created_at = date_index.created_at(note_id)
+            if (created_at is not None and in_id_range(note_id)
+                    and (start is None or created_at >= start) and (end is None or created_at < end)):
+                found.append((score, created_at, note_id))
+        if order == 'relevance':
+            found.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        else:
+            found.sort(key=lambda item: (item[1], item[2]), reverse=order == 'newest')
+        note_ids = [note_id for _, _, note_id in found]
+    else:
+        window = None
+        if order != 'oldest' and query.limit is not None and query.min_id is None and query.max_id is None:
+            window = query.offset + query.limit
+        note_ids = [note_id for note_id in date_index.range(start, end, limit=window)
+                    if in_id_range(note_id)]
+        if order == 'oldest':
+            note_ids.reverse()
+
+    stop = query.offset + query.limit if query.limit is not None else None
+    notes_data = (notes_by_id.get(note_id) for note_id in note_ids[query.offset:stop])
+    return [note_data for note_data in notes_data if note_data is not None]
@@ -0,0 +1,191 @@
+"""
+Модуль файла записей JSON-хранилища с индексом смещений.
+
+Файл записей (notes.json.records) - двоичная копия снимка notes.json, которую
+можно читать через mmap, не разбирая весь снимок:
+
+* заголовок: сигнатура и отметка снимка (размер и время изменения
+  notes.json), по которому построен файл;
+* записи: для каждой заметки длина (4 байта) и JSON заметки в UTF-8;
+  записи от codec.COMPRESS_MIN_BYTES байт сжаты (старший бит длины);
+* индекс: ID по возрастанию и смещения записей в том же порядке (int64);
+* окончание: смещение индекса и количество записей.
+
+Класс RecordReader находит заметку двоичным поиском по индексу и
+разбирает только её запись, поэтому поиск, удаление и постраничный вывод
+не зависят от размера файла по памяти. Функция write_records создаёт файл.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .codec import COMPRESS_MIN_BYTES, compress, decompress
+from .locking import atomic_write
+from .metrics import registry as metrics
+
+MAGIC = b'NOTEREC2'
+_HEADER = struct.Struct('<8sqq')
+_LENGTH = struct.Struct('<I')
+_ID = struct.Struct('<q')
+_TRAILER = struct.Struct('<qq')
+# Старший бит длины записи - запись сжата codec.compress
+_COMPRESSED = 1 << 31
+
+
+def _column(data) -> array:
+    """Столбец int64 из байтов файла (порядок байтов - little-endian)."""
+    column = array('q')
+    column.frombytes(data)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def write_records(path: str, notes_data: Iterable[dict], stamp: Tuple[int, int]) -> int:
+    """Записывает файл записей (через временный файл, см. locking.atomic_write).
+
+    Args:
+        path (str): Путь к файлу записей.
+        notes_data (Iterable[dict]): Словари с данными заметок; могут
+            выдаваться по одному, в памяти держится только индекс.
+        stamp (Tuple[int, int]): Отметка снимка, по которому построен файл.
+
+    Returns:
+        int: Количество записей.
+    """
+    entries = []
+    with atomic_write(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, *stamp))
+        offset = _HEADER.size
+        for note_data in notes_data:
+            data = json.dumps(note_data, ensure_ascii=False).encode('utf-8')
+            flag = 0
+            if len(data) >= COMPRESS_MIN_BYTES:
+                packed = compress(data)
+                if len(packed) < len(data):
+                    data, flag = packed, _COMPRESSED
+            f.write(_LENGTH.pack(len(data) | flag))
+            f.write(data)
+            entries.append((note_data['id'], offset))
+            offset += _LENGTH.size + len(data)
+        entries.sort()
+        for column in ([note_id for note_id, _ in entries], [position for _, position in entries]):
+            column = array('q', column)
+            if sys.byteorder != 'little':
+                column.byteswap()
+            f.write(column.tobytes())
+        f.write(_TRAILER.pack(offset, len(entries)))
+        metrics.inc('notebook_json_bytes_written_total', f.tell(), file='records')
+    return len(entries)
+
+
+class RecordReader:
+    """Чтение файла записей через mmap.
+
+    Attributes:
+        path (str): Путь к файлу записей.
+        stamp (Tuple[int, int]): Отметка снимка из заголовка.
+        max_id (int): Наибольший ID в файле или 0.
+        min_id (int): Наименьший ID в файле или 0.
+    """
+
+    def __init__(self, path: str):
+        """Открывает файл записей.
+
+        Args:
+            path (str): Путь к файлу записей.
+
+        Raises:
+            FileNotFoundError: Если файла нет.
+            ValueError: Если файл повреждён или имеет другой формат.
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size + _TRAILER.size:
+                raise ValueError(f"Файл записей повреждён: {path}")
+            # Отображение остаётся действительным после закрытия файла
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, stamp_size, stamp_mtime = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Неизвестный формат файла записей: {path}")
+        self.stamp = (stamp_size, stamp_mtime)
+        self._index, self._count = _TRAILER.unpack_from(self._map, size - _TRAILER.size)
+        if self._index + 2 * self._count * _ID.size + _TRAILER.size != size:
+            raise ValueError(f"Файл записей повреждён: {path}")
+        ids_end = self._index + self._count * _ID.size
+        offsets_end = ids_end + self._count * _ID.size
+        if sys.byteorder == 'little':
+            # Столбцы читаются прямо из отображения, без копирования в память
+            self._ids = memoryview(self._map)[self._index:ids_end].cast('q')
+            self._offsets = memoryview(self._map)[ids_end:offsets_end].cast('q')
+        else:  # pragma: no cover - зависит от платформы
+            self._ids = _column(self._map[self._index:ids_end])
+            self._offsets = _column(self._map[ids_end:offsets_end])
+        self.max_id = self._ids[-1] if self._count else 0
+        self.min_id = self._ids[0] if self._count else 0
+
+    def __len__(self) -> int:
+        """Количество записей."""
+        return self._count
+
+    def _find(self, note_id: int) -> Optional[int]:
+        """Смещение записи заметки или None (двоичный поиск по индексу)."""
+        position = bisect_left(self._ids, note_id)
+        if position < self._count and self._ids[position] == note_id:
+            return self._offsets[position]
+        return None
+
+    def _decode(self, offset: int) -> dict:
+        """Разбирает запись по смещению (сжатая запись распаковывается здесь же)."""
+        length, = _LENGTH.unpack_from(self._map, offset)
+        start = offset + _LENGTH.size
+        data = self._map[start:start + (length & ~_COMPRESSED)]
+        metrics.inc('notebook_json_bytes_read_total', len(data), file='records')
+        if length & _COMPRESSED:
+            data = decompress(data)
+        return json.loads(data.decode('utf-8'))
+
+    def __contains__(self, note_id) -> bool:
+        """Есть ли запись заметки."""
+        return self._find(note_id) is not None
+
+    def get(self, note_id: int) -> Optional[dict]:
+        """Возвращает данные заметки или None.
+
+        Args:
+            note_id (int): ID заметки.
+
+        Returns:
+            Optional[dict]: Словарь с данными заметки.
+        """
+        offset = self._find(note_id)
+        return self._decode(offset) if offset is not None else None
+
+    def ids(self) -> Iterator[int]:
+        """ID заметок по возрастанию (записи не разбираются)."""
+        return iter(self._ids)
+
+    def __iter__(self) -> Iterator[dict]:
+        """Данные заметок по возрастанию ID, по одной."""
+        for offset in self._offsets:
+            yield self._decode(offset)
+
+    def slice(self, start: int, stop: int) -> Iterator[dict]:
+        """Данные заметок с позициями [start, stop) в порядке возрастания ID.
+
+        Args:
+            start (int): Позиция первой записи.
+            stop (int): Позиция после последней записи.
+
+        Yields:
+            dict: Данные очередной заметки.
+        """
+        for offset in self._offsets[start:stop]:
+            yield self._decode(offset)
@@ -0,0 +1,182 @@
+"""
+Модуль полнотекстового поиска.
+
+Содержит функции разбиения текста на слова и построения запроса tsquery
+для PostgreSQL, а также класс SearchIndex - инвертированный индекс для
+поиска по JSON-хранилищу без базы данных.
+"""
+
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sidecar import SidecarIndex
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на слова в нижнем регистре.
+
+    Args:
+        text (str): Исходный текст.
+
+    Returns:
+        List[str]: Список слов.
+    """
+    return _WORD_RE.findall(text.lower())
+
+
+def build_tsquery(query: str) -> str:
+    """Строит строку для to_tsquery: все слова запроса как префиксы.
+
+    Запрос "заметки postgres" превращается в "заметки:* & postgres:*".
+    В результат попадают только буквы и цифры, поэтому строку безопасно
+    передавать в to_tsquery.
+
+    Args:
+        query (str): Текст поиска.
+
+    Returns:
+        str: Строка tsquery или пустая строка, если в запросе нет слов.
+    """
+    return ' & '.join(f'{word}:*' for word in tokenize(query))
+
+
+def _word_counts(note_data: dict) -> Dict[str, int]:
+    """Сколько раз каждое слово встречается в заголовке и содержании заметки."""
+    counts: Dict[str, int] = {}
+    for word in tokenize(note_data['title']) + tokenize(note_data['content']):
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+class SearchIndex(SidecarIndex):
+    """Инвертированный индекс по заголовкам и содержанию заметок.
+
+    Для каждого слова хранится, в каких заметках и сколько раз оно
+    встречается. Слова запроса ищутся как префиксы (бинарным поиском по
+    отсортированному словарю), поэтому "замет" находит "заметки". Заметка
+    попадает в результат, если в ней есть все слова запроса; чем чаще они
+    встречаются, тем выше заметка в выдаче.
+
+    Индекс сохраняется в файл рядом с notes.json вместе с отметкой снимка,
+    по которому он построен (см. SidecarIndex), и при следующем запуске
+    загружается без повторной обработки всех заметок.
+
+    Attributes:
+        path (str): Путь к файлу индекса.
+    """
+
+    def _clear(self):
+        """Сбрасывает индекс в пустое состояние."""
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._note_words: Dict[int, List[str]] = {}
+        self._sorted_words: Optional[List[str]] = None
+
+    def add(self, note_data: dict):
+        """Добавляет заметку в индекс или обновляет её.
+
+        Args:
+            note_data (dict): Словарь с данными заметки.
+        """
+        note_id = note_data['id']
+        self.remove(note_id)
+        self._store(note_id, _word_counts(note_data))
+
+    def _store(self, note_id: int, counts: Dict[str, int]):
+        """Записывает в индекс количества слов заметки, которой в индексе нет."""
+        for word, count in counts.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                self._sorted_words = None
+            postings[note_id] = count
+        self._note_words[note_id] = list(counts)
+
+    @staticmethod
+    def extract_shard(notes_data: Iterable[dict]) -> List[Tuple[int, Dict[str, int]]]:
+        """Разбирает часть заметок для merge (выполняется в отдельном процессе).
+
+        Args:
+            notes_data (Iterable[dict]): Словари с данными заметок.
+
+        Returns:
+            List[Tuple[int, Dict[str, int]]]: ID и количества слов каждой заметки.
+        """
+        return [(note_data['id'], _word_counts(note_data)) for note_data in notes_data]
+
+    def merge(self, parts: List[list]):
+        """Добавляет в индекс результаты extract_shard по всем частям.
+
+        Args:
+            parts (List[list]): Результаты extract_shard.
+        """
+        for part in parts:
+            for note_id, counts in part:
+                self.remove(note_id)
+                self._store(note_id, counts)
+
+    def remove(self, note_id: int):
+        """Удаляет заметку из индекса.
+
+        Args:
+            note_id (int): ID заметки.
+        """
+        for word in self._note_words.pop(note_id, ()):
+            postings = self._postings[word]
+            postings.pop(note_id, None)
+            if not postings:
+                del self._postings[word]
+                self._sorted_words = None
+
+    def _words_with_prefix(self, prefix: str) -> List[str]:
+        """Возвращает слова словаря, начинающиеся с префикса."""
+        if self._sorted_words is None:
+            self._sorted_words = sorted(self._postings)
+        words = []
+        index = bisect_left(self._sorted_words, prefix)
+        while index < len(self._sorted_words) and self._sorted_words[index].startswith(prefix):
+            words.append(self._sorted_words[index])
+            index += 1
+        return words
+
+    def search(self, query: str) -> List[Tuple[int, int]]:
+        """Ищет заметки, содержащие все слова запроса.
+
+        Args:
+            query (str): Текст поиска.
+
+        Returns:
+            List[Tuple[int, int]]: Пары (ID заметки, релевантность) по
+            убыванию релевантности.
+        """
+        scores: Optional[Dict[int, int]] = None
+        for word in tokenize(query):
+            matched: Dict[int, int] = {}
+            for indexed_word in self._words_with_prefix(word):
+                for note_id, count in self._postings[indexed_word].items():
+                    matched[note_id] = matched.get(note_id, 0) + count
+
+            if scores is None:
+                scores = matched
+            else:
+                scores = {note_id: score + matched[note_id]
+                          for note_id, score in scores.items() if note_id in matched}
+            if not scores:
+                return []
+
+        if scores is None:
+            return []
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def _serialize(self) -> dict:
+        """Словарь слово -> {ID заметки: количество} для файла индекса."""
+        return {'postings': self._postings}
+
+    def _restore(self, data: dict):
+        """Восстанавливает словарь слов из файла индекса."""
+        for word, postings in data['postings'].items():
+            self._postings[word] = {int(note_id): count for note_id, count in postings.items()}
+            for note_id in self._postings[word]:
+                self._note_words.setdefault(note_id, []).append(word)
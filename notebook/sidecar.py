@@ -0,0 +1,94 @@
+"""
+Модуль файлов индексов JSON-хранилища.
+
+Содержит базовый класс SidecarIndex. Индексы JSON-хранилища (поисковый
+индекс, индекс дат, счётчики статистики, лента изменений) хранятся в
+файлах рядом с notes.json вместе с отметкой снимка, по которому они
+построены: если снимок тот же, индекс загружается из файла, иначе журнал
+строит его заново. Файл пишется через locking.atomic_write, поэтому
+несколько процессов, сохраняющих индекс одновременно, не портят файлы
+друг друга.
+"""
+
+import json
+
+from .locking import atomic_write
+
+
+class SidecarIndex:
+    """Индекс заметок, который сохраняется в файл рядом с notes.json.
+
+    Подкласс хранит своё состояние и реализует три метода: _clear
+    (пустое состояние), _serialize (состояние в виде словаря для JSON) и
+    _restore (состояние из такого словаря). Методы load, dumps и save
+    вызывает журнал (см. NoteJournal).
+
+    Attributes:
+        path (str): Путь к файлу индекса.
+    """
+
+    def __init__(self, path: str):
+        """Инициализирует пустой индекс.
+
+        Args:
+            path (str): Путь к файлу индекса.
+        """
+        self.path = path
+        self._clear()
+
+    def _clear(self):
+        """Сбрасывает индекс в пустое состояние."""
+        raise NotImplementedError
+
+    def _serialize(self) -> dict:
+        """Состояние индекса для записи в файл (без отметки снимка)."""
+        raise NotImplementedError
+
+    def _restore(self, data: dict):
+        """Восстанавливает состояние индекса из результата _serialize.
+
+        Args:
+            data (dict): Содержимое файла индекса.
+        """
+        raise NotImplementedError
+
+    def load(self, stamp) -> bool:
+        """Загружает индекс из файла, если он построен по тому же снимку.
+
+        Args:
+            stamp: Отметка текущего снимка.
+
+        Returns:
+            bool: True если индекс загружен, False если его нужно построить заново.
+        """
+        self._clear()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return False
+        if data.get('stamp') != list(stamp):
+            return False
+
+        self._restore(data)
+        return True
+
+    def dumps(self, stamp) -> str:
+        """Сериализует индекс вместе с отметкой снимка.
+
+        Args:
+            stamp: Отметка снимка, по которому построен индекс.
+
+        Returns:
+            str: Индекс в формате JSON.
+        """
+        return json.dumps({'stamp': list(stamp), **self._serialize()}, ensure_ascii=False)
+
+    def save(self, data: str):
+        """Записывает сериализованный индекс в файл (через временный файл процесса).
+
+        Args:
+            data (str): Результат dumps.
+        """
+        with atomic_write(self.path) as f:
+            f.write(data)
@@ -0,0 +1,519 @@
+"""
+Модуль хранилища заметок в SQLite.
+
+Содержит класс SQLiteDatabase - замену Database для локального файла
+SQLite (режим WAL, индекс по дате создания, полнотекстовый поиск FTS5) -
+и класс SQLiteNoteStorage, который работает с ним вместо PostgreSQL.
+Сервер базы данных не нужен, поэтому хранилище открывается за
+миллисекунды; это удобно для одного компьютера и для тестов.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from .dates import iso_range
+from .metrics import registry as metrics, timed
+from .models import Note
+from .query import NoteQuery, SQLitePlanner
+from .storage import NoteStorage
+
+_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT,
+        change_seq INTEGER
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS notes_created_at_id_idx ON notes (created_at, id)",
+]
+
+# Полнотекстовый индекс хранит только токены, сам текст берётся из notes
+_FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        title, content, content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 0'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    ''',
+]
+
+# Счётчики заметок по дням для статистики (см. NoteStorage.note_stats).
+# День - в местном времени, как stats.local_day: дата с часовым поясом
+# переводится в местный пояс, дата без пояса уже местная.
+_LOCAL_DAY = ("CASE WHEN {0} GLOB '*[+-][0-9][0-9]:[0-9][0-9]' OR {0} GLOB '*Z' "
+              "THEN date({0}, 'localtime') ELSE substr({0}, 1, 10) END")
+
+_STATS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS notes_daily_stats (
+        day TEXT PRIMARY KEY,
+        notes INTEGER NOT NULL,
+        content_bytes INTEGER NOT NULL
+    )
+'''
+
+_STATS_FILL = '''
+    INSERT INTO notes_daily_stats (day, notes, content_bytes)
+    SELECT {day}, count(*), sum(length(CAST(content AS BLOB)))
+    FROM notes GROUP BY 1
+'''.format(day=_LOCAL_DAY.format('created_at'))
+
+_STATS_ADD = '''
+    INSERT INTO notes_daily_stats (day, notes, content_bytes)
+    VALUES ({day}, 1, length(CAST(new.content AS BLOB)))
+    ON CONFLICT (day) DO UPDATE SET notes = notes + 1,
+        content_bytes = content_bytes + excluded.content_bytes;
+'''.format(day=_LOCAL_DAY.format('new.created_at'))
+
+_STATS_SUBTRACT = '''
+    UPDATE notes_daily_stats SET notes = notes - 1,
+        content_bytes = content_bytes - length(CAST(old.content AS BLOB))
+    WHERE day = {day};
+    DELETE FROM notes_daily_stats WHERE day = {day} AND notes <= 0;
+'''.format(day=_LOCAL_DAY.format('old.created_at'))
+
+_STATS_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS notes_stats_insert AFTER INSERT ON notes BEGIN {_STATS_ADD} END",
+    f"CREATE TRIGGER IF NOT EXISTS notes_stats_delete AFTER DELETE ON notes BEGIN {_STATS_SUBTRACT} END",
+    f"CREATE TRIGGER IF NOT EXISTS notes_stats_update AFTER UPDATE OF content, created_at ON notes BEGIN "
+    f"{_STATS_SUBTRACT} {_STATS_ADD} END",
+]
+
+# Лента изменений (см. changes.py). Номер изменения - следующий после
+# наибольшего номера заметок и надгробий (оба по индексу); запись в SQLite
+# идёт по одной транзакции за раз, поэтому номера растут в порядке фиксации.
+# Триггеры FTS и статистики срабатывают только на изменение своих столбцов
+# и не повторяются, когда триггер ленты записывает change_seq.
+_NEXT_SEQ = '''(SELECT coalesce(max(seq), 0) + 1 FROM (
+    SELECT max(change_seq) AS seq FROM notes
+    UNION ALL SELECT max(change_seq) FROM notes_tombstones))'''
+_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+_CHANGES_SCHEMA = [
+    "CREATE INDEX IF NOT EXISTS notes_change_seq_idx ON notes (change_seq)",
+    '''
+    CREATE TABLE IF NOT EXISTS notes_tombstones (
+        id INTEGER PRIMARY KEY,
+        change_seq INTEGER NOT NULL,
+        deleted_at TEXT NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS notes_tombstones_change_seq_idx ON notes_tombstones (change_seq)",
+    f'''
+    CREATE TRIGGER IF NOT EXISTS notes_change_insert AFTER INSERT ON notes BEGIN
+        UPDATE notes SET change_seq = {_NEXT_SEQ}, updated_at = {_NOW} WHERE id = new.id;
+        DELETE FROM notes_tombstones WHERE id = new.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS notes_change_update AFTER UPDATE OF title, content ON notes
+    WHEN new.title IS NOT old.title OR new.content IS NOT old.content BEGIN
+        UPDATE notes SET change_seq = {_NEXT_SEQ}, updated_at = {_NOW} WHERE id = new.id;
+    END
+    ''',
+    # Удалённая строка уже не входит в max(change_seq), поэтому номер
+    # надгробия не меньше её номера + 1
+    f'''
+    CREATE TRIGGER IF NOT EXISTS notes_change_delete AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_tombstones (id, change_seq, deleted_at)
+        VALUES (old.id, max({_NEXT_SEQ}, coalesce(old.change_seq, 0) + 1), {_NOW})
+        ON CONFLICT (id) DO UPDATE SET change_seq = excluded.change_seq,
+            deleted_at = excluded.deleted_at;
+    END
+    ''',
+]
+
+
+def _adapt(params):
+    """Приводит параметры запроса к типам SQLite: даты - к строкам ISO."""
+    return [param.isoformat() if isinstance(param, datetime) else param for param in params]
+
+
+class _Cursor:
+    """Курсор sqlite3, принимающий запросы с параметрами %s, как psycopg2."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+        self.itersize = 500
+        self.closed = False
+
+    def execute(self, sql: str, params=()):
+        if not metrics.enabled:
+            self._cursor.execute(sql.replace('%s', '?'), _adapt(params))
+            return
+        metrics.inc('notebook_queries_total', backend='sqlite')
+        with metrics.timer('notebook_query_seconds', backend='sqlite'):
+            self._cursor.execute(sql.replace('%s', '?'), _adapt(params))
+
+    def executemany(self, sql: str, seq_of_params):
+        self._cursor.executemany(sql.replace('%s', '?'), (_adapt(p) for p in seq_of_params))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        while True:
+            rows = self._cursor.fetchmany(self.itersize)
+            if not rows:
+                return
+            yield from rows
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+        self.closed = True
+
+
+class _Connection:
+    """Подключение sqlite3 с интерфейсом подключения psycopg2."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self.closed = False
+
+    def cursor(self, name: Optional[str] = None) -> _Cursor:
+        # Именованных (серверных) курсоров нет - курсор SQLite и так читает строки по мере выдачи
+        return _Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+        self.closed = True
+
+
+class SQLiteDatabase:
+    """База данных SQLite с тем же интерфейсом, что и Database.
+
+    Каждый поток получает своё подключение к файлу базы данных. Файл
+    работает в режиме WAL: чтение не блокируется записью из другого
+    процесса.
+
+    Attributes:
+        path (str): Путь к файлу базы данных.
+        fts (bool): Доступен ли полнотекстовый поиск FTS5.
+    """
+
+    def __init__(self, path: str = "notes.db"):
+        """Открывает базу данных и создаёт схему, если её нет.
+
+        Args:
+            path (str, optional): Путь к файлу базы данных. По умолчанию "notes.db".
+        """
+        self.path = path
+        self.fts = False
+        self._local = threading.local()
+        self._init_db()
+
+    def get_connection(self) -> _Connection:
+        """Возвращает подключение текущего потока.
+
+        Каждый вызов должен завершаться вызовом release_connection.
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None or conn.closed:
+            raw = sqlite3.connect(self.path, timeout=10)
+            raw.execute("PRAGMA synchronous=NORMAL")
+            conn = _Connection(raw)
+            self._local.connection = conn
+        return conn
+
+    def release_connection(self):
+        """Подключение остаётся открытым для следующих запросов потока."""
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер, выдающий подключение текущего потока.
+
+        Yields:
+            Подключение к базе данных.
+        """
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            self.release_connection()
+
+    def close_connection(self):
+        """Закрывает подключение текущего потока."""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            self._local.connection = None
+            conn.close()
+
+    def _init_db(self):
+        """Включает режим WAL и создаёт таблицу, индексы, счётчики по дням, ленту изменений и FTS5."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                cursor.execute(statement)
+            cursor.execute("PRAGMA table_info(notes)")
+            if 'change_seq' not in {row[1] for row in cursor.fetchall()}:
+                # Таблица прежней версии: триггеры на любое UPDATE заменяются
+                # триггерами на свои столбцы, заметки получают номера по ID
+                cursor.execute("DROP TRIGGER IF EXISTS notes_fts_update")
+                cursor.execute("DROP TRIGGER IF EXISTS notes_stats_update")
+                cursor.execute("ALTER TABLE notes ADD COLUMN updated_at TEXT")
+                cursor.execute("ALTER TABLE notes ADD COLUMN change_seq INTEGER")
+                cursor.execute("UPDATE notes SET updated_at = created_at, change_seq = id")
+            for statement in _CHANGES_SCHEMA:
+                cursor.execute(statement)
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'notes_stats_insert'")
+            row = cursor.fetchone()
+            if row is not None and 'localtime' not in row[0]:
+                # Прежние счётчики брали день из строки даты без перевода
+                # в местное время - они пересчитываются заново
+                for event in ('insert', 'delete', 'update'):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS notes_stats_{event}")
+                cursor.execute("DROP TABLE notes_daily_stats")
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_daily_stats'")
+            if cursor.fetchone() is None:
+                # Новая таблица счётчиков заполняется по уже сохранённым заметкам
+                cursor.execute(_STATS_TABLE)
+                cursor.execute(_STATS_FILL)
+            for statement in _STATS_TRIGGERS:
+                cursor.execute(statement)
+            conn.commit()
+        finally:
+            cursor.close()
+
+        cursor = conn.cursor()
+        try:
+            for statement in _FTS_SCHEMA:
+                cursor.execute(statement)
+            conn.commit()
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"⚠️ Полнотекстовый поиск FTS5 недоступен, поиск идёт по JSON-индексу: {e}")
+        finally:
+            cursor.close()
+
+
+class SQLiteNoteStorage(NoteStorage):
+    """Хранилище заметок в файле SQLite и JSON-файле.
+
+    Запросы NoteStorage, которые пишутся одинаково в PostgreSQL и SQLite,
+    выполняются без изменений; здесь переопределены только запросы,
+    использующие возможности PostgreSQL (полнотекстовый поиск, COPY,
+    execute_values, = ANY). Дата создания хранится строкой ISO, поэтому
+    фильтры по дате сравнивают строки по индексу notes_created_at_id_idx.
+
+    Attributes:
+        db (SQLiteDatabase): База данных SQLite.
+    """
+
+    _after_condition = "(created_at, id) < (%s, %s)"
+    # Запись в SQLite идёт по одной транзакции за раз, поэтому номера
+    # change_seq выдаются в порядке фиксации и служат номером изменения
+    _changes_sql = (
+        "SELECT change_seq, id, title, content, created_at, updated_at, FALSE FROM notes "
+        "WHERE change_seq > %s "
+        "UNION ALL SELECT change_seq, id, NULL, NULL, NULL, deleted_at, TRUE FROM notes_tombstones "
+        "WHERE change_seq > %s ORDER BY 1"
+    )
+    _changes_limit = " LIMIT %s"
+    # Счётчики по местным дням ведут триггеры (см. _STATS_ADD)
+    _stats_sql = "SELECT day, notes, content_bytes FROM notes_daily_stats"
+    _planner = SQLitePlanner()
+
+    def __init__(self, filename: str = "notes.json", path: str = "notes.db",
+                 flush_interval: Optional[float] = None):
+        """Инициализирует хранилище заметок.
+
+        Args:
+            filename (str, optional): Имя JSON-файла. По умолчанию "notes.json".
+            path (str, optional): Путь к файлу SQLite. По умолчанию "notes.db".
+            flush_interval (float, optional): Интервал записи в JSON-хранилище
+                (см. NoteStorage).
+        """
+        super().__init__(filename, flush_interval=flush_interval, db=SQLiteDatabase(path))
+
+    @staticmethod
+    def _date_condition(date_filter: Optional[str]):
+        """Переводит фильтр даты в условие на created_at (строки ISO)."""
+        if not date_filter:
+            return [], []
+        start, end = iso_range(date_filter)
+        if end is None:
+            return ["created_at >= %s"], [start]
+        return ["created_at >= %s", "created_at < %s"], [start, end]
+
+    def _stream_cursor(self, conn, itersize: int):
+        """Курсор SQLite, читающий строки порциями по itersize."""
+        cursor = conn.cursor()
+        cursor.itersize = itersize
+        return cursor
+
+    def _insert_new(self, cursor, notes: List[Note]):
+        """Вставляет новые заметки по одной (execute_values в SQLite нет) и заполняет их ID."""
+        for note in notes:
+            cursor.execute(
+                "INSERT INTO notes (title, content, created_at) VALUES (%s, %s, %s) RETURNING id",
+                (note.title, note.content, note.created_at)
+            )
+            note.id = cursor.fetchone()[0]
+
+    @timed('storage')
+    def save_many(self, notes: List[Note]) -> List[Note]:
+        """Сохраняет несколько заметок в одной транзакции.
+
+        Args:
+            notes (List[Note]): Заметки для сохранения.
+
+        Returns:
+            List[Note]: Сохранённые заметки с присвоенными ID.
+        """
+        new_notes = [note for note in notes if note.id is None]
+        conn = cursor = None
+
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            for note in notes:
+                if note.id is None:
+                    self._insert_new(cursor, [note])
+                else:
+                    cursor.execute(
+                        "UPDATE notes SET title = %s, content = %s WHERE id = %s",
+                        (note.title, note.content, note.id)
+                    )
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            for note in new_notes:
+                note.id = None
+            print(f"Ошибка при сохранении заметок в БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='save_many')
+        finally:
+            self._release(conn, cursor)
+
+        self._mirror_saved(notes)
+        return notes
+
+    @timed('storage')
+    def import_batch(self, notes: List[Note], keep_ids: bool = False) -> List[Note]:
+        """Загружает пачку новых заметок одной транзакцией (см. save_many).
+
+        С keep_ids заметки вставляются со своими ID через INSERT OR IGNORE:
+        заметки, чьи ID уже есть в таблице, пропускаются (см.
+        NoteStorage.import_batch). AUTOINCREMENT сам сдвигает счётчик ID за
+        наибольший вставленный.
+        """
+        if not keep_ids:
+            return self.save_many(notes)
+
+        conn = cursor = None
+
+        saved = None
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            saved = []
+            for note in notes:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO notes (id, title, content, created_at) "
+                    "VALUES (%s, %s, %s, %s) RETURNING id",
+                    (note.id, note.title, note.content, note.created_at)
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    note.id = row[0]
+                    saved.append(note)
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            saved = None
+            print(f"Ошибка при загрузке заметок в БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='import_batch')
+        finally:
+            self._release(conn, cursor)
+
+        return self._mirror_imported(notes, saved, keep_ids)
+
+    @timed('storage')
+    def copy_out(self, file) -> bool:
+        """COPY в SQLite нет - экспорт идёт через iter_notes.
+
+        Returns:
+            bool: Всегда False.
+        """
+        return False
+
+    @timed('storage')
+    def delete_many(self, note_ids: List[int]) -> List[int]:
+        """Удаляет несколько заметок в одной транзакции.
+
+        Args:
+            note_ids (List[int]): ID заметок для удаления.
+
+        Returns:
+            List[int]: ID заметок, которые были найдены и удалены.
+        """
+        conn = cursor = None
+
+        db_deleted = set()
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(note_ids))
+            cursor.execute(
+                f"DELETE FROM notes WHERE id IN ({placeholders}) RETURNING id", list(note_ids)
+            )
+            db_deleted = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            db_deleted = set()
+            print(f"Ошибка при удалении заметок из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='delete_many')
+        finally:
+            self._release(conn, cursor)
+
+        return self._mirror_deleted(note_ids, db_deleted)
+
+    def _run_query(self, query: NoteQuery, operation: str) -> List[Note]:
+        """Выполняет запрос (см. NoteStorage._run_query).
+
+        Без FTS5 поиск по тексту идёт по индексу JSON-хранилища.
+        """
+        if query.text is not None and not self.db.fts:
+            return [] if query.matches_nothing else self._query_json(query)
+        return super()._run_query(query, operation)
@@ -0,0 +1,242 @@
+"""
+Модуль статистики заметок.
+
+Содержит класс NoteStats - количество заметок и объём содержания по
+дням, месяцам и годам, первую и последнюю дату создания, - и класс
+StatsIndex, который поддерживает эти счётчики для JSON-хранилища.
+
+Счётчики обновляются при каждом сохранении и удалении заметки (в
+PostgreSQL и SQLite - триггерами на таблице notes, в JSON-хранилище -
+индексом StatsIndex вместе с журналом), поэтому статистика читается
+за время, которое зависит от числа дней с заметками, а не от числа
+заметок. Месяцы и годы складываются из дней при чтении.
+
+День заметки - дата создания в местном времени (local_day), как в
+фильтре --date, во всех хранилищах. PostgreSQL хранит счётчики по
+отрезкам в 15 минут (UTC) и складывает их в местные дни при чтении
+(NoteStats.from_buckets): процессы в разных часовых поясах видят свои дни.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .sidecar import SidecarIndex
+
+# Длина ключа периода в дате ISO: ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ
+PERIODS = {'day': 10, 'month': 7, 'year': 4}
+
+
+def content_bytes(content: str) -> int:
+    """Размер содержания заметки в байтах UTF-8 (как octet_length в PostgreSQL)."""
+    return len(content.encode('utf-8'))
+
+
+def local_day(created_at: Union[str, datetime]) -> str:
+    """День создания ГГГГ-ММ-ДД в местном времени.
+
+    Дата без часового пояса (заметки, созданные программой) уже записана
+    в местном времени; дата с поясом (например, из PostgreSQL)
+    переводится в местный пояс.
+
+    Args:
+        created_at (str или datetime): Дата создания (строка ISO).
+
+    Returns:
+        str: День в формате ISO.
+    """
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone()
+    return created_at.date().isoformat()
+
+
+class NoteStats:
+    """Статистика заметок.
+
+    Attributes:
+        days (Dict[str, Tuple[int, int]]): День ГГГГ-ММ-ДД -> (количество
+            заметок, объём содержания в байтах), по возрастанию дня.
+        first (str): Дата создания самой старой заметки (ISO) или None.
+        last (str): Дата создания самой новой заметки (ISO) или None.
+        total (int): Количество заметок.
+        content_bytes (int): Общий объём содержания в байтах.
+    """
+
+    def __init__(self, days: Dict[str, Tuple[int, int]], first: Optional[str] = None,
+                 last: Optional[str] = None):
+        """Инициализирует статистику.
+
+        Args:
+            days (Dict[str, Tuple[int, int]]): Счётчики по дням.
+            first (str, optional): Дата самой старой заметки.
+            last (str, optional): Дата самой новой заметки.
+        """
+        self.days = dict(sorted(days.items()))
+        self.first = first
+        self.last = last
+        self.total = sum(count for count, _ in self.days.values())
+        self.content_bytes = sum(size for _, size in self.days.values())
+
+    @classmethod
+    def from_buckets(cls, buckets: Iterable[Tuple[datetime, int, int]], first: Optional[str] = None,
+                     last: Optional[str] = None) -> 'NoteStats':
+        """Статистика по счётчикам отрезков времени (PostgreSQL).
+
+        Args:
+            buckets (Iterable[Tuple[datetime, int, int]]): Начало отрезка
+                (с часовым поясом), количество заметок и объём в байтах.
+            first (str, optional): Дата самой старой заметки.
+            last (str, optional): Дата самой новой заметки.
+
+        Returns:
+            NoteStats: Счётчики, сложенные по местным дням.
+        """
+        days = {}
+        for bucket, count, size in buckets:
+            day = local_day(bucket)
+            total_count, total_size = days.get(day, (0, 0))
+            days[day] = (total_count + count, total_size + size)
+        return cls(days, first, last)
+
+    def by(self, period: str) -> Dict[str, Tuple[int, int]]:
+        """Счётчики по дням, месяцам или годам.
+
+        Args:
+            period (str): day, month или year.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: Период (ГГГГ-ММ-ДД, ГГГГ-ММ или
+            ГГГГ) -> (количество заметок, объём в байтах), по возрастанию.
+
+        Raises:
+            ValueError: Если период неизвестен.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Неизвестный период статистики: {period}")
+        length = PERIODS[period]
+        result = {}
+        for day, (count, size) in self.days.items():
+            key = day[:length]
+            total_count, total_size = result.get(key, (0, 0))
+            result[key] = (total_count + count, total_size + size)
+        return result
+
+    def to_dict(self) -> dict:
+        """Статистика в виде словаря для JSON (для панелей мониторинга).
+
+        Returns:
+            dict: Итоги, первая и последняя дата и счётчики по периодам.
+        """
+        data = {'total': self.total, 'content_bytes': self.content_bytes,
+                'first': self.first, 'last': self.last}
+        for period in PERIODS:
+            data[period] = {key: {'notes': count, 'content_bytes': size}
+                            for key, (count, size) in self.by(period).items()}
+        return data
+
+
+class StatsIndex(SidecarIndex):
+    """Счётчики заметок по дням для JSON-хранилища.
+
+    Индекс обновляется журналом вместе с поисковым индексом и индексом
+    дат и хранится рядом с notes.json. Для каждой заметки запоминаются
+    её день (local_day) и размер, чтобы при удалении или изменении
+    вычесть их.
+
+    Attributes:
+        path (str): Путь к файлу индекса.
+    """
+
+    def _clear(self):
+        """Сбрасывает индекс в пустое состояние."""
+        self._notes: Dict[int, Tuple[str, int]] = {}
+        self._days: Dict[str, List[int]] = {}
+        self._local_days = False
+
+    def load(self, stamp) -> bool:
+        """Загружает индекс из файла (см. SidecarIndex.load).
+
+        Файл прежней версии, где день брался из строки даты без перевода
+        в местное время, не загружается - индекс строится заново.
+        """
+        if super().load(stamp) and self._local_days:
+            return True
+        self._clear()
+        return False
+
+    def add(self, note_data: dict):
+        """Учитывает заметку (или её новую версию).
+
+        Args:
+            note_data (dict): Словарь с данными заметки.
+        """
+        self.remove(note_data['id'])
+        self._count(note_data['id'], local_day(note_data['created_at']),
+                    content_bytes(note_data['content']))
+
+    def _count(self, note_id: int, day: str, size: int):
+        """Прибавляет заметку к счётчикам её дня."""
+        self._notes[note_id] = (day, size)
+        counters = self._days.setdefault(day, [0, 0])
+        counters[0] += 1
+        counters[1] += size
+
+    @staticmethod
+    def extract_shard(notes_data: Iterable[dict]) -> List[Tuple[int, str, int]]:
+        """Собирает (ID, день, размер) части заметок для merge (в отдельном процессе).
+
+        Args:
+            notes_data (Iterable[dict]): Словари с данными заметок.
+
+        Returns:
+            List[Tuple[int, str, int]]: Тройки в порядке заметок.
+        """
+        return [(note_data['id'], local_day(note_data['created_at']), content_bytes(note_data['content']))
+                for note_data in notes_data]
+
+    def merge(self, parts: List[List[Tuple[int, str, int]]]):
+        """Добавляет в индекс результаты extract_shard.
+
+        Args:
+            parts (List[List[Tuple[int, str, int]]]): Результаты extract_shard.
+        """
+        for part in parts:
+            for note_id, day, size in part:
+                self.remove(note_id)
+                self._count(note_id, day, size)
+
+    def remove(self, note_id: int):
+        """Вычитает заметку из счётчиков.
+
+        Args:
+            note_id (int): ID заметки.
+        """
+        entry = self._notes.pop(note_id, None)
+        if entry is None:
+            return
+        day, size = entry
+        counters = self._days[day]
+        counters[0] -= 1
+        counters[1] -= size
+        if counters[0] == 0:
+            del self._days[day]
+
+    def days(self) -> Dict[str, Tuple[int, int]]:
+        """Счётчики по дням.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: День -> (количество заметок, объём в байтах).
+        """
+        return {day: (count, size) for day, (count, size) in self._days.items()}
+
+    def _serialize(self) -> dict:
+        """Тройки (ID, день, размер) для файла индекса."""
+        return {'days': 'local',
+                'notes': [[note_id, day, size] for note_id, (day, size) in self._notes.items()]}
+
+    def _restore(self, data: dict):
+        """Восстанавливает счётчики из файла индекса."""
+        self._local_days = data.get('days') == 'local'
+        for note_id, day, size in data['notes']:
+            self._count(note_id, day, size)
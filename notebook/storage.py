@@ -4,30 +4,101 @@
 Отвечает за сохранение, чтение, удаление и поиск заметок в JSON-файле и базе данных PostgreSQL.
 """
 
+import csv
+import io
 import json
 import os
+import time
 import psycopg2
-from datetime import datetime, date, timedelta
-from typing import List
+from psycopg2.extras import execute_values
+from typing import Iterator, List, Optional, Tuple
+from .changes import Change, ChangeSet
 from .models import Note
 from .database import Database
+from .dates import DateIndex, date_range, iso_range, local_moment
+from .journal import NoteJournal
+from .locking import FileLock
+from .metrics import registry as metrics, timed
+from .mirror import JournalMirror
+from .query import NoteQuery, SQLPlanner, plan_json
+from .search import SearchIndex
+from .stats import NoteStats, StatsIndex
+
+# Пауза в секундах перед повторной попыткой перенести в базу данных
+# заметки, созданные без неё
+OFFLINE_RETRY_INTERVAL = float(os.getenv('NOTES_OFFLINE_RETRY_INTERVAL', '30'))
 
 class NoteStorage:
     """Класс для работы с файлом заметок в формате JSON и базой данных PostgreSQL.
     
     Attributes:
         filename (str): Имя файла для хранения заметок.
+        journal (NoteJournal): Журнал изменений JSON-хранилища.
+        mirror (JournalMirror): Очередь отложенной записи в журнал.
+        search_index (SearchIndex): Поисковый индекс JSON-хранилища.
+        date_index (DateIndex): Индекс дат создания JSON-хранилища.
+        stats_index (StatsIndex): Счётчики заметок по дням JSON-хранилища.
+        listeners (list): Подписчики на изменения заметок.
     """
     
-    def __init__(self, filename: str = "notes.json"):
+    # Условие постраничной навигации: заметки старше курсора (created_at, id)
+    _after_condition = "(created_at, id) < (%s::timestamptz, %s)"
+    
+    # Лента изменений: заметки и надгробия после номера одним запросом,
+    # чтобы обе части были из одного снимка данных. Номер изменения - ID
+    # транзакции (change_xid); выдаются только транзакции старше самой
+    # старой незавершённой во всём кластере (xmin снимка), поэтому транзакция с меньшим
+    # номером не зафиксируется после того, как читатель прошёл её номер
+    _changes_sql = (
+        "WITH horizon AS (SELECT pg_snapshot_xmin(pg_current_snapshot()) AS xmin) "
+        "SELECT change_xid::text::bigint, id, title, content, created_at, updated_at, FALSE "
+        "FROM notes, horizon WHERE change_xid > %s::text::xid8 AND change_xid < horizon.xmin "
+        "UNION ALL SELECT change_xid::text::bigint, id, NULL, NULL, NULL, deleted_at, TRUE "
+        "FROM notes_tombstones, horizon WHERE change_xid > %s::text::xid8 AND change_xid < horizon.xmin "
+        "ORDER BY 1"
+    )
+    # Ограничение количества изменений: изменения одной транзакции
+    # (с одним номером) не разделяются между ответами
+    _changes_limit = " FETCH FIRST %s ROWS WITH TIES"
+    
+    # Счётчики статистики: изменения по отрезкам времени складываются при
+    # чтении (строки только добавляются, см. Database._init_stats)
+    _stats_sql = (
+        "SELECT bucket, sum(notes)::bigint, sum(content_bytes)::bigint FROM notes_stats "
+        "GROUP BY bucket HAVING sum(notes) > 0"
+    )
+    
+    # Планировщик составных запросов (см. query.py)
+    _planner = SQLPlanner()
+    
+    def __init__(self, filename: str = "notes.json", flush_interval: Optional[float] = None,
+                 db=None):
         """Инициализирует хранилище заметок.
         
         Args:
             filename (str, optional): Имя файла для хранения. По умолчанию "notes.json".
+            flush_interval (float, optional): Интервал записи изменений в
+                JSON-хранилище в секундах; 0 - записывать сразу. По умолчанию
+                берётся из переменной окружения NOTES_FLUSH_INTERVAL (1 секунда).
+            db (optional): Объект базы данных с методами get_connection и
+                release_connection. По умолчанию Database (PostgreSQL).
         """
         self.filename = filename
-        self.db = Database()
+        self.db = db if db is not None else Database()
         self._ensure_storage_file()
+        self.search_index = SearchIndex(filename + '.index')
+        self.date_index = DateIndex(filename + '.dates')
+        self.stats_index = StatsIndex(filename + '.stats')
+        self.journal = NoteJournal(filename, indexes=[self.search_index, self.date_index,
+                                                      self.stats_index])
+        if flush_interval is None:
+            flush_interval = float(os.getenv('NOTES_FLUSH_INTERVAL', '1'))
+        self.mirror = JournalMirror(self.journal, flush_interval)
+        self.listeners = []
+        # Заметки с временными ID (созданные без базы данных): None - ещё не проверялось
+        self._offline_pending: Optional[bool] = None
+        self._offline_retry_at = 0.0
+        self._sync_lock = FileLock(filename + '.sync.lock')
     
     def _ensure_storage_file(self):
         """Создает файл для хранения заметок, если он не существует."""
@@ -36,64 +107,423 @@ class NoteStorage:
                 json.dump([], f)
             print(f"📁 Создан новый файл для заметок: {self.filename}")
     
+    def add_listener(self, listener):
+        """Подписывает объект на изменения заметок.
+        
+        У подписчика вызываются методы on_saved(notes) после сохранения
+        заметок и on_deleted(note_ids) после удаления.
+        
+        Args:
+            listener: Подписчик, например ColumnarNoteCache.
+        """
+        self.listeners.append(listener)
+    
+    def _notify_saved(self, notes: List[Note]):
+        """Сообщает подписчикам о сохранённых заметках."""
+        for listener in self.listeners:
+            listener.on_saved(notes)
+    
+    def _notify_deleted(self, note_ids: List[int]):
+        """Сообщает подписчикам об удалённых заметках."""
+        if note_ids:
+            for listener in self.listeners:
+                listener.on_deleted(note_ids)
+    
     def _read_notes(self) -> List[dict]:
-        """Читает все заметки из файла.
+        """Читает все заметки из JSON-хранилища (снимок и журнал).
         
         Returns:
             List[dict]: Список словарей с данными заметок.
-            
-        Raises:
-            FileNotFoundError: Если файл не найден.
-            json.JSONDecodeError: Если файл поврежден.
         """
+        self.mirror.flush()
+        return self.journal.notes()
+    
+    def compact(self):
+        """Собирает notes.json из журнала изменений."""
+        self.mirror.flush()
+        self.journal.compact()
+    
+    def close(self):
+        """Записывает отложенные изменения в JSON-хранилище и останавливает фоновую запись."""
+        self.mirror.close()
+    
+    def _mirror_saved(self, notes: List[Note]):
+        """Ставит сохранённые заметки в очередь JSON-хранилища и сообщает подписчикам.
+        
+        Заметки, которые не попали в базу данных, записываются в журнал
+        сразу с временными отрицательными ID (см. NoteJournal.put_new) и
+        переносятся в базу данных, когда она снова доступна.
+        """
+        saved = [note for note in notes if note.id is not None]
+        unsaved = [note for note in notes if note.id is None]
+        if unsaved:
+            for note, note_id in zip(unsaved, self.mirror.put_new([note.to_dict() for note in unsaved])):
+                note.id = note_id
+            self._offline_pending = True
+        self.mirror.put_many([note.to_dict() for note in saved])
+        self._notify_saved(notes)
+        if not unsaved:
+            self._sync_offline()
+    
+    @staticmethod
+    def _rollback(conn):
+        """Откатывает транзакцию после ошибки, если подключение было получено.
+        
+        Если подключение оборвалось, откатывать нечего - исходная ошибка
+        остаётся причиной перехода на JSON-хранилище.
+        """
+        if conn is None:
+            return
         try:
-            with open(self.filename, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+    
+    def _release(self, conn, cursor):
+        """Закрывает курсор и возвращает подключение, если они были получены.
+        
+        Подключение получается внутри try: база данных, к которой нельзя
+        подключиться, обрабатывается так же, как ошибка запроса.
+        """
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            self.db.release_connection()
+    
+    def _insert_new(self, cursor, notes: List[Note]):
+        """Вставляет новые заметки одним запросом и заполняет их ID.
+        
+        Args:
+            cursor: Курсор открытой транзакции.
+            notes (List[Note]): Заметки без ID.
+        """
+        rows = execute_values(
+            cursor,
+            "INSERT INTO notes (title, content, created_at) VALUES %s RETURNING id",
+            [(note.title, note.content, note.created_datetime) for note in notes],
+            fetch=True
+        )
+        for note, row in zip(notes, rows):
+            note.id = row[0]
+    
+    def _sync_offline(self):
+        """Переносит заметки с временными ID в базу данных, если они есть.
+        
+        После неудачной попытки следующая делается не раньше чем через
+        OFFLINE_RETRY_INTERVAL секунд, чтобы недоступная база данных не
+        замедляла каждую операцию.
+        """
+        if self._offline_pending is False or time.monotonic() < self._offline_retry_at:
+            return
+        self.sync_offline_notes()
+    
+    def sync_offline_notes(self) -> List[Note]:
+        """Переносит в базу данных заметки, созданные, пока она была недоступна.
+        
+        Такие заметки хранятся в JSON-хранилище с временными отрицательными
+        ID. В базе данных они получают постоянные ID из её последовательности,
+        и в JSON-хранилище временные ID заменяются постоянными. Перенос
+        выполняет один процесс за раз (блокировка notes.json.sync.lock).
+        Вызывается автоматически при чтении и после успешного сохранения.
+        
+        Returns:
+            List[Note]: Перенесённые заметки с новыми ID (пустой список, если
+            переносить нечего или база данных недоступна).
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            # Заметки уже переносит другой процесс или поток
             return []
+        try:
+            temporary_ids = self.mirror.temporary_ids()
+            if not temporary_ids:
+                self._offline_pending = False
+                return []
+            notes_by_id = self.mirror.load()
+            notes = [Note.from_dict(notes_by_id[note_id]) for note_id in temporary_ids]
+            for note in notes:
+                note.id = None
+            
+            try:
+                conn = self.db.get_connection()
+            except Exception as e:
+                self._offline_retry_at = time.monotonic() + OFFLINE_RETRY_INTERVAL
+                print(f"Заметки, созданные без базы данных, не перенесены в БД: {e}")
+                return []
+            cursor = conn.cursor()
+            try:
+                self._insert_new(cursor, notes)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                self._offline_retry_at = time.monotonic() + OFFLINE_RETRY_INTERVAL
+                print(f"Заметки, созданные без базы данных, не перенесены в БД: {e}")
+                metrics.inc('notebook_json_fallbacks_total', operation='sync_offline_notes')
+                return []
+            finally:
+                cursor.close()
+                self.db.release_connection()
+            
+            self.mirror.replace_ids([note.to_dict() for note in notes], temporary_ids)
+            self._offline_pending = False
+        finally:
+            self._sync_lock.release()
+        
+        print(f"📤 В базу данных перенесены заметки, созданные без неё: {len(notes)}")
+        self._notify_deleted(temporary_ids)
+        self._notify_saved(notes)
+        return notes
     
-    def _write_notes(self, notes_data: List[dict]):
-        """Записывает заметки в файл.
+    def _mirror_deleted(self, note_ids: List[int], db_deleted) -> List[int]:
+        """Удаляет заметки из JSON-хранилища и сообщает подписчикам.
+        
+        Удалённые из базы данных заметки удаляются из журнала в фоне;
+        остальные - сразу, чтобы узнать, были ли они в JSON-хранилище.
         
         Args:
-            notes_data (List[dict]): Список словарей с данными заметок.
+            note_ids (List[int]): ID заметок.
+            db_deleted: ID заметок, удалённых из базы данных.
+            
+        Returns:
+            List[int]: ID заметок, которые были найдены и удалены.
+        """
+        self.mirror.delete_many([note_id for note_id in note_ids if note_id in db_deleted])
+        json_deleted = set(self.mirror.delete_existing(
+            [note_id for note_id in note_ids if note_id not in db_deleted]
+        ))
+        deleted = [note_id for note_id in dict.fromkeys(note_ids)
+                   if note_id in db_deleted or note_id in json_deleted]
+        self._notify_deleted(deleted)
+        return deleted
+    
+    @staticmethod
+    def _date_condition(date_filter: Optional[str]):
+        """Переводит фильтр даты в условие на created_at для SQL.
+        
+        Args:
+            date_filter (str, optional): Фильтр даты.
+            
+        Returns:
+            tuple: Список условий и список параметров.
             
         Raises:
-            IOError: Если произошла ошибка записи в файл.
+            ValueError: Если фильтр не распознан.
         """
-        with open(self.filename, 'w') as f:
-            json.dump(notes_data, f, indent=2)
+        if not date_filter:
+            return [], []
+        start, end = date_range(date_filter)
+        if end is None:
+            return ["created_at >= %s"], [local_moment(start)]
+        return ["created_at >= %s", "created_at < %s"], [local_moment(start), local_moment(end)]
     
-    def get_all_notes(self) -> List[Note]:
+    @timed('storage')
+    def get_all_notes(self, date_filter: Optional[str] = None) -> List[Note]:
         """Получает все заметки в виде объектов Note.
         
+        Фильтр даты выполняется в базе данных по индексу на created_at.
+        
+        Args:
+            date_filter (str, optional): Фильтр даты (today, week, month, year,
+                ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ). По умолчанию None.
+        
         Returns:
             List[Note]: Список объектов заметок.
         """
-        # Получаем заметки из базы данных
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        try:
+            query = NoteQuery().dated(date_filter)
+        except ValueError:
+            return []
+        return self._run_query(query, 'get_all_notes')
+    
+    @timed('storage')
+    def query(self, query: NoteQuery) -> List[Note]:
+        """Выполняет составной запрос (см. NoteQuery).
+        
+        Запрос целиком переводится в один параметризованный SQL-запрос, поэтому
+        поиск по тексту, фильтр даты, интервал ID, порядок и страница
+        выполняются базой данных по индексам. Если база данных недоступна,
+        запрос выполняется по индексам JSON-хранилища.
+        
+        Args:
+            query (NoteQuery): Запрос.
+        
+        Returns:
+            List[Note]: Найденные заметки в порядке запроса.
+        """
+        return self._run_query(query, 'query')
+    
+    def _run_query(self, query: NoteQuery, operation: str) -> List[Note]:
+        """Выполняет запрос в базе данных, а при ошибке - в JSON-хранилище.
+        
+        Args:
+            query (NoteQuery): Запрос.
+            operation (str): Имя операции для метрик.
+        
+        Returns:
+            List[Note]: Найденные заметки.
+        """
+        if query.matches_nothing:
+            return []
+        sql, params = self._planner.plan(query)
+        self._sync_offline()
+        
+        conn = cursor = None
         
         try:
-            cursor.execute(
-                "SELECT id, title, content, created_at FROM notes ORDER BY created_at DESC"
-            )
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
             rows = cursor.fetchall()
-            
+            metrics.inc('notebook_rows_fetched_total', len(rows), operation=operation)
+        
             notes = []
             for row in rows:
                 note = Note.from_db_row(row)
                 notes.append(note)
-            
+        
             return notes
         except Exception as e:
+            self._rollback(conn)
             print(f"Ошибка при получении заметок из БД: {e}")
-            # Если ошибка с БД, возвращаем заметки из JSON файла
-            notes_data = self._read_notes()
-            return [Note.from_dict(note_data) for note_data in notes_data]
+            metrics.inc('notebook_json_fallbacks_total', operation=operation)
+            # Если ошибка с БД, выполняем запрос по индексам JSON-хранилища
+            return self._query_json(query)
+        finally:
+            self._release(conn, cursor)
+    
+    def _query_json(self, query: NoteQuery) -> List[Note]:
+        """Выполняет запрос по индексам JSON-хранилища (см. plan_json).
+        
+        Args:
+            query (NoteQuery): Запрос.
+        
+        Returns:
+            List[Note]: Найденные заметки.
+        """
+        notes_data = plan_json(query, self.mirror.load(), self.search_index, self.date_index)
+        return [Note.from_dict(note_data) for note_data in notes_data]
+    
+    @timed('storage')
+    def get_note(self, note_id: int) -> Optional[Note]:
+        """Получает одну заметку по ID.
+        
+        Args:
+            note_id (int): ID заметки.
+            
+        Returns:
+            Optional[Note]: Заметка или None, если её нет.
+        """
+        self._sync_offline()
+        conn = cursor = None
+        
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, title, content, created_at FROM notes WHERE id = %s", (note_id,)
+            )
+            row = cursor.fetchone()
+            metrics.inc('notebook_rows_fetched_total', 1 if row else 0, operation='get_note')
+            return Note.from_db_row(row) if row else None
+        except Exception as e:
+            self._rollback(conn)
+            print(f"Ошибка при получении заметки из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='get_note')
+            # Если ошибка с БД, ищем заметку в JSON-хранилище
+            note_data = self.mirror.load().get(note_id)
+            return Note.from_dict(note_data) if note_data else None
         finally:
+            self._release(conn, cursor)
+    
+    def iter_notes(self, date_filter: Optional[str] = None, limit: Optional[int] = None,
+                   after: Optional[str] = None, itersize: int = 500) -> Iterator[Note]:
+        """Перебирает заметки от новых к старым, не загружая все сразу.
+        
+        Используется постраничная навигация по ключу (created_at, id): вместо
+        OFFSET запрос продолжается с последней показанной заметки. Строки из
+        базы данных читаются серверным курсором порциями по itersize.
+        
+        Args:
+            date_filter (str, optional): Фильтр даты. По умолчанию None.
+            limit (int, optional): Максимальное количество заметок. По умолчанию без ограничения.
+            after (str, optional): Курсор страницы (см. page_cursor): выдаются
+                заметки старше указанной. По умолчанию с самой новой.
+            itersize (int, optional): Размер порции серверного курсора. По умолчанию 500.
+            
+        Yields:
+            Note: Очередная заметка.
+            
+        Raises:
+            ValueError: Если курсор страницы некорректен.
+        """
+        try:
+            conditions, params = self._date_condition(date_filter)
+        except ValueError:
+            return
+        after_key = parse_page_cursor(after) if after else None
+        if after_key:
+            conditions.append(self._after_condition)
+            params.extend(after_key)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        sql = "SELECT id, title, content, created_at FROM notes" + where + " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(limit)
+        
+        self._sync_offline()
+        conn = cursor = None
+        yielded = 0
+        try:
+            conn = self.db.get_connection()
+            cursor = self._stream_cursor(conn, itersize)
+            cursor.execute(sql, params)
+            for row in cursor:
+                yield Note.from_db_row(row)
+                yielded += 1
+            # Серверный курсор закрывается до фиксации: после неё его уже нет
+            # на сервере, и close() выбросил бы ProgrammingError
             cursor.close()
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            if yielded:
+                # Часть заметок уже выдана - продолжить из JSON нельзя без повторов
+                print(f"Ошибка при чтении заметок из БД: {e}")
+                return
+            print(f"Ошибка при получении заметок из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='iter_notes')
+            # Если ошибка с БД, читаем заметки из JSON-хранилища
+            yield from self._iter_json_notes(date_filter, limit, after_key)
+        finally:
+            metrics.inc('notebook_rows_fetched_total', yielded, operation='iter_notes')
+            if cursor is not None and not cursor.closed:
+                cursor.close()
+            if conn is not None:
+                self.db.release_connection()
     
+    def _stream_cursor(self, conn, itersize: int):
+        """Создаёт серверный курсор, читающий строки порциями по itersize."""
+        cursor = conn.cursor(name='notes_stream')
+        cursor.itersize = itersize
+        return cursor
+    
+    def _iter_json_notes(self, date_filter: Optional[str], limit: Optional[int],
+                         after_key: Optional[Tuple[str, int]]) -> Iterator[Note]:
+        """Перебирает заметки JSON-хранилища по индексу дат.
+        
+        Args:
+            date_filter (str, optional): Фильтр даты.
+            limit (int, optional): Максимальное количество заметок.
+            after_key (tuple, optional): Ключ (created_at, id) последней показанной заметки.
+            
+        Yields:
+            Note: Очередная заметка.
+        """
+        start, end = iso_range(date_filter) if date_filter else (None, None)
+        notes_by_id = self.mirror.load()
+        for note_id in self.date_index.range(start, end, before=after_key, limit=limit):
+            yield Note.from_dict(notes_by_id[note_id])
+    
+    @timed('storage')
     def save_note(self, note: Note) -> Note:
         """Сохраняет заметку в файл и базу данных.
         
@@ -110,15 +540,16 @@ class NoteStorage:
             IOError: Если произошла ошибка записи в файл.
         """
         # Сохраняем в базу данных
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        conn = cursor = None
         
         try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
             if note.id is None:
                 # Вставка новой заметки
                 cursor.execute(
                     "INSERT INTO notes (title, content, created_at) VALUES (%s, %s, %s) RETURNING id",
-                    (note.title, note.content, note.created_at)
+                    (note.title, note.content, note.created_datetime)
                 )
                 note.id = cursor.fetchone()[0]
             else:
@@ -130,33 +561,207 @@ class NoteStorage:
             
             conn.commit()
         except Exception as e:
-            conn.rollback()
+            self._rollback(conn)
             print(f"Ошибка при сохранении заметки в БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='save_note')
         
         finally:
-            cursor.close()
+            self._release(conn, cursor)
+        
+        # Копия в JSON-хранилище записывается в фоне
+        self._mirror_saved([note])
+        return note
+    
+    @timed('storage')
+    def save_many(self, notes: List[Note]) -> List[Note]:
+        """Сохраняет несколько заметок в одной транзакции.
         
-        # Также сохраняем в JSON файл для обратной совместимости
-        notes_data = self._read_notes()
+        Новые заметки вставляются одним запросом INSERT ... VALUES ...
+        RETURNING id, существующие обновляются одним UPDATE ... FROM (VALUES ...).
+        В JSON-журнал вся пачка дописывается одной записью в файл.
         
-        if note.id is None:
-            if notes_data:
-                note.id = max([n['id'] for n in notes_data]) + 1
-            else:
-                note.id = 1
-            notes_data.append(note.to_dict())
-        else:
-            # Обновляем существующую заметку в JSON
-            for i, note_data in enumerate(notes_data):
-                if note_data['id'] == note.id:
-                    notes_data[i] = note.to_dict()
-                    break
+        Args:
+            notes (List[Note]): Заметки для сохранения.
+            
+        Returns:
+            List[Note]: Сохранённые заметки с присвоенными ID.
+        """
+        new_notes = [note for note in notes if note.id is None]
+        changed_notes = [note for note in notes if note.id is not None]
+        
+        conn = cursor = None
+        
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            if new_notes:
+                self._insert_new(cursor, new_notes)
+            if changed_notes:
+                execute_values(
+                    cursor,
+                    "UPDATE notes SET title = data.title, content = data.content "
+                    "FROM (VALUES %s) AS data (id, title, content) WHERE notes.id = data.id",
+                    [(note.id, note.title, note.content) for note in changed_notes]
+                )
+            
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            for note in new_notes:
+                note.id = None
+            print(f"Ошибка при сохранении заметок в БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='save_many')
+        finally:
+            self._release(conn, cursor)
+        
+        # Копия в JSON-хранилище записывается в фоне
+        self._mirror_saved(notes)
+        return notes
+    
+    @timed('storage')
+    def import_batch(self, notes: List[Note], keep_ids: bool = False) -> List[Note]:
+        """Загружает пачку новых заметок одной операцией.
+        
+        В базу данных строки передаются через COPY во временную таблицу и
+        переносятся в notes одним INSERT ... SELECT, который возвращает
+        присвоенные ID. В JSON-журнал пачка дописывается одной записью в файл.
+        
+        С keep_ids заметки сохраняют свои ID, а заметки, чьи ID уже есть в
+        таблице, пропускаются - повторный импорт той же выгрузки не создаёт
+        дубликатов. Заметки без ID получают новые, последовательность
+        notes_id_seq сдвигается за наибольший загруженный ID.
+        
+        Args:
+            notes (List[Note]): Новые заметки (без ID, если не задан keep_ids).
+            keep_ids (bool, optional): Сохранить ID заметок. По умолчанию False.
+            
+        Returns:
+            List[Note]: Сохранённые заметки с присвоенными ID (без пропущенных).
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for note in notes:
+            row = [note.title, note.content, note.created_at]
+            writer.writerow([note.id] + row if keep_ids else row)
+        buffer.seek(0)
+        
+        conn = cursor = None
+        
+        saved = None
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            if keep_ids:
+                saved = self._import_with_ids(cursor, buffer)
             else:
-                notes_data.append(note.to_dict())
+                cursor.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS notes_import "
+                    "(title TEXT, content TEXT, created_at TIMESTAMPTZ) ON COMMIT DELETE ROWS"
+                )
+                cursor.copy_expert(
+                    "COPY notes_import (title, content, created_at) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+                cursor.execute(
+                    "INSERT INTO notes (title, content, created_at) "
+                    "SELECT title, content, created_at FROM notes_import "
+                    "RETURNING id, title, content, created_at"
+                )
+                saved = [Note.from_db_row(row) for row in cursor.fetchall()]
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            saved = None
+            print(f"Ошибка при загрузке заметок в БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='import_batch')
+        finally:
+            self._release(conn, cursor)
         
-        self._write_notes(notes_data)
-        return note
+        return self._mirror_imported(notes, saved, keep_ids)
+    
+    @staticmethod
+    def _import_with_ids(cursor, buffer) -> List[Note]:
+        """Переносит пачку из COPY в notes с ID из файла (см. import_batch).
+        
+        Первичный ключ секционированной таблицы - (id, created_at), поэтому
+        ON CONFLICT ловит только точный повтор строки; заметку с тем же ID и
+        другой датой отсекает NOT EXISTS.
+        """
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS notes_import_ids "
+            "(id INTEGER, title TEXT, content TEXT, created_at TIMESTAMPTZ) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(
+            "COPY notes_import_ids (id, title, content, created_at) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        cursor.execute(
+            "INSERT INTO notes (id, title, content, created_at) "
+            "SELECT coalesce(i.id, nextval('notes_id_seq')), i.title, i.content, i.created_at "
+            "FROM notes_import_ids i "
+            "WHERE i.id IS NULL OR NOT EXISTS (SELECT 1 FROM notes n WHERE n.id = i.id) "
+            "ON CONFLICT DO NOTHING "
+            "RETURNING id, title, content, created_at"
+        )
+        saved = [Note.from_db_row(row) for row in cursor.fetchall()]
+        if saved:
+            # nextval внутри greatest сдвигает последовательность и тогда,
+            # когда она ещё не выдавала ни одного значения
+            cursor.execute(
+                "SELECT setval('notes_id_seq', greatest(max(id), nextval('notes_id_seq'))) FROM notes"
+            )
+        return saved
+    
+    def _mirror_imported(self, notes: List[Note], saved: Optional[List[Note]],
+                         keep_ids: bool) -> List[Note]:
+        """Записывает импортированную пачку в JSON-журнал (см. import_batch).
+        
+        Если база данных недоступна, пачка уходит в журнал с временными ID.
+        С keep_ids заметки, чьи ID уже есть в журнале, при этом пропускаются,
+        а ID остальных из файла не сохраняются: постоянные ID выдаёт только
+        база данных при переносе заметок (см. NoteJournal.put_new).
+        """
+        if saved is None:
+            saved = notes
+            if keep_ids:
+                existing = self.mirror.load()
+                saved = [note for note in notes if note.id is None or note.id not in existing]
+                for note in saved:
+                    note.id = None
+        self._mirror_saved(saved)
+        return saved
     
+    @timed('storage')
+    def copy_out(self, file) -> bool:
+        """Выгружает все заметки в CSV через COPY TO STDOUT.
+        
+        Args:
+            file: Текстовый файл, открытый на запись.
+            
+        Returns:
+            bool: True если выгрузка выполнена, False если база данных недоступна.
+        """
+        conn = cursor = None
+        
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.copy_expert(
+                "COPY (SELECT id, title, content, created_at FROM notes "
+                "ORDER BY created_at DESC, id DESC) TO STDOUT WITH (FORMAT csv, HEADER)",
+                file
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            self._rollback(conn)
+            print(f"Ошибка при выгрузке заметок из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='copy_out')
+            return False
+        finally:
+            self._release(conn, cursor)
+    
+    @timed('storage')
     def delete_note(self, note_id: int) -> bool:
         """Удаляет заметку по ID.
         
@@ -167,113 +772,240 @@ class NoteStorage:
             bool: True если удаление успешно, False если заметка не найдена.
         """
         # Удаляем из базы данных
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        conn = cursor = None
         
         db_deleted = False
         try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
             cursor.execute("DELETE FROM notes WHERE id = %s", (note_id,))
             conn.commit()
             db_deleted = cursor.rowcount > 0
         except Exception as e:
-            conn.rollback()
+            self._rollback(conn)
             print(f"Ошибка при удалении заметки из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='delete_note')
         finally:
-            cursor.close()
+            self._release(conn, cursor)
         
-        # Удаляем из JSON файла
-        notes_data = self._read_notes()
-        initial_length = len(notes_data)
+        # Удаляем из JSON-хранилища
+        return bool(self._mirror_deleted([note_id], {note_id} if db_deleted else set()))
+    
+    @timed('storage')
+    def delete_many(self, note_ids: List[int]) -> List[int]:
+        """Удаляет несколько заметок в одной транзакции.
         
-        notes_data = [note for note in notes_data if note['id'] != note_id]
+        Args:
+            note_ids (List[int]): ID заметок для удаления.
+            
+        Returns:
+            List[int]: ID заметок, которые были найдены и удалены.
+        """
+        # Удаляем из базы данных
+        conn = cursor = None
         
-        json_deleted = len(notes_data) < initial_length
-        if json_deleted:
-            self._write_notes(notes_data)
+        db_deleted = set()
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM notes WHERE id = ANY(%s) RETURNING id", (list(note_ids),))
+            db_deleted = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            db_deleted = set()
+            print(f"Ошибка при удалении заметок из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='delete_many')
+        finally:
+            self._release(conn, cursor)
         
-        return db_deleted or json_deleted
+        # Удаляем из JSON-хранилища
+        return self._mirror_deleted(note_ids, db_deleted)
     
-    def search_notes(self, query: str) -> List[Note]:
+    @timed('storage')
+    def search_notes(self, query: str, date_filter: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[Note]:
         """Ищет заметки по тексту в заголовке или содержании.
         
+        В базе данных используется полнотекстовый поиск (русская и английская
+        морфология) по GIN-индексу. Слова запроса ищутся как начала слов,
+        как в SQLite и JSON-хранилище (см. query.py). Фильтр даты входит в
+        тот же запрос. Результаты упорядочены по релевантности.
+        
         Args:
             query (str): Текст для поиска.
-            
+            date_filter (str, optional): Фильтр даты. По умолчанию None.
+            limit (int, optional): Сколько самых релевантных заметок вернуть.
+                По умолчанию все.
+        
         Returns:
             List[Note]: Список найденных заметок.
         """
-        # Ищем в базе данных
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        try:
+            note_query = NoteQuery(text=query, limit=limit).dated(date_filter)
+        except ValueError:
+            return []
+        return self._run_query(note_query, 'search_notes')
+    
+    @timed('storage')
+    def note_stats(self) -> NoteStats:
+        """Возвращает статистику заметок: количество и объём по дням, месяцам и годам.
+        
+        Счётчики ведут триггеры на таблице notes, поэтому заметки не
+        просматриваются; первая и последняя дата создания берутся по
+        индексу на created_at. День - местный, как в фильтре --date (см.
+        stats.local_day). Если база данных недоступна, статистика берётся
+        из индекса StatsIndex JSON-хранилища.
+        
+        Returns:
+            NoteStats: Статистика заметок.
+        """
+        conn = cursor = None
         
         try:
-            cursor.execute(
-                "SELECT id, title, content, created_at FROM notes WHERE title ILIKE %s OR content ILIKE %s ORDER BY created_at DESC",
-                (f'%{query}%', f'%{query}%')
-            )
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(self._stats_sql)
+            buckets = cursor.fetchall()
+            cursor.execute("SELECT min(created_at), max(created_at) FROM notes")
+            first, last = cursor.fetchone()
+            return NoteStats.from_buckets(buckets, _isoformat(first), _isoformat(last))
+        except Exception as e:
+            self._rollback(conn)
+            print(f"Ошибка при получении статистики из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='note_stats')
+            # Если ошибка с БД, берём счётчики JSON-хранилища
+            self.mirror.load()
+            return NoteStats(self.stats_index.days(), *self.date_index.bounds())
+        finally:
+            self._release(conn, cursor)
+    
+    @timed('storage')
+    def changes_since(self, seq: int = 0, limit: Optional[int] = None) -> ChangeSet:
+        """Возвращает изменения заметок после номера seq (см. changes.py).
+        
+        Изменённые заметки находятся по индексу на номере изменения,
+        удалённые - по надгробиям, поэтому потребитель получает только
+        разницу, а не весь блокнот. Следующий запрос делается с номером
+        ChangeSet.last_seq. В PostgreSQL номер изменения - ID транзакции:
+        изменения транзакций, которые ещё могут зафиксироваться с меньшим
+        номером, выдаются следующими запросами. Горизонт общий для всего
+        кластера: любая долгая транзакция с ID (которая что-то записала) в
+        любой базе данных сервера, в том числе чужой программы или
+        подготовленная (PREPARE TRANSACTION), задерживает выдачу всех более
+        поздних изменений до своего завершения. Если база данных
+        недоступна, изменения берутся из ленты JSON-хранилища - у неё свои
+        номера (ChangeSet.source = 'json').
+        
+        Args:
+            seq (int, optional): Номер последнего полученного изменения;
+                0 - все заметки. По умолчанию 0.
+            limit (int, optional): Максимальное количество изменений
+                (в PostgreSQL изменения последней транзакции выдаются
+                целиком, даже если их больше). По умолчанию все.
+        
+        Returns:
+            ChangeSet: Изменения по возрастанию номера.
+        """
+        sql, params = self._changes_sql, [seq, seq]
+        if limit is not None:
+            sql += self._changes_limit
+            params.append(limit)
+        
+        conn = cursor = None
+        
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
             rows = cursor.fetchall()
-            
-            notes = []
-            for row in rows:
-                note = Note.from_db_row(row)
-                notes.append(note)
-            
-            return notes
+            metrics.inc('notebook_rows_fetched_total', len(rows), operation='changes_since')
+            changes = []
+            for change_seq, note_id, title, content, created_at, updated_at, deleted in rows:
+                note = None if deleted else Note.from_db_row((note_id, title, content, created_at))
+                changes.append(Change(change_seq, note_id, note, _isoformat(updated_at)))
+            return ChangeSet(changes, seq, 'database')
         except Exception as e:
-            print(f"Ошибка при поиске заметок в БД: {e}")
-            # Если ошибка с БД, ищем в JSON файле
-            notes = self.get_all_notes()
-            query = query.lower()
-            
-            return [
-                note for note in notes 
-                if query in note.title.lower() or query in note.content.lower()
-            ]
+            self._rollback(conn)
+            print(f"Ошибка при получении изменений из БД: {e}")
+            metrics.inc('notebook_json_fallbacks_total', operation='changes_since')
+            # Если ошибка с БД, берём изменения из ленты JSON-хранилища
+            return self._json_changes(seq, limit)
         finally:
-            cursor.close()
+            self._release(conn, cursor)
+    
+    def _json_changes(self, seq: int, limit: Optional[int]) -> ChangeSet:
+        """Изменения из ленты JSON-хранилища (см. ChangeLog)."""
+        notes_by_id = self.mirror.load()
+        changelog = self.journal.changes
+        changes = []
+        for change_seq, note_id, deleted in changelog.since(seq, limit):
+            if deleted:
+                changes.append(Change(change_seq, note_id))
+            else:
+                note_data = notes_by_id[note_id]
+                changes.append(Change(change_seq, note_id, Note.from_dict(note_data),
+                                      note_data.get('updated_at')))
+        return ChangeSet(changes, seq, 'json', changelog.complete(seq))
     
+    @timed('storage')
     def filter_notes_by_date(self, notes: List[Note], date_filter: str) -> List[Note]:
         """Фильтрует заметки по дате создания.
         
+        Фильтр разбирается один раз, даты заметок сравниваются как строки ISO.
+        
         Args:
             notes (List[Note]): Список заметок для фильтрации.
-            date_filter (str): Фильтр даты (today, week, month, ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ).
+            date_filter (str): Фильтр даты (today, week, month, year, ГГГГ-ММ-ДД, ГГГГ-ММ, ГГГГ).
             
         Returns:
             List[Note]: Отфильтрованный список заметок.
         """
-        today = datetime.now().date()
-        filtered_notes = []
+        try:
+            start, end = iso_range(date_filter)
+        except ValueError:
+            return []
         
-        for note in notes:
-            try:
-                note_date = datetime.fromisoformat(note.created_at).date()
-                
-                if date_filter == 'today':
-                    if note_date == today:
-                        filtered_notes.append(note)
-                elif date_filter == 'week':
-                    week_ago = today - timedelta(days=7)
-                    if note_date >= week_ago:
-                        filtered_notes.append(note)
-                elif date_filter == 'month':
-                    month_ago = today - timedelta(days=30)
-                    if note_date >= month_ago:
-                        filtered_notes.append(note)
-                elif len(date_filter) == 10:  # ГГГГ-ММ-ДД
-                    filter_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
-                    if note_date == filter_date:
-                        filtered_notes.append(note)
-                elif len(date_filter) == 7:  # ГГГГ-ММ
-                    filter_year, filter_month = map(int, date_filter.split('-'))
-                    if note_date.year == filter_year and note_date.month == filter_month:
-                        filtered_notes.append(note)
-                elif len(date_filter) == 4:  # ГГГГ
-                    filter_year = int(date_filter)
-                    if note_date.year == filter_year:
-                        filtered_notes.append(note)
-                        
-            except (ValueError, AttributeError):
-                continue
-        
-        return filtered_notes
\ No newline at end of file
+        return [note for note in notes if _in_range(note.created_at, start, end)]
+
+
+def page_cursor(note: Note) -> str:
+    """Возвращает курсор страницы для продолжения списка после заметки.
+    
+    Args:
+        note (Note): Последняя показанная заметка.
+        
+    Returns:
+        str: Курсор вида "created_at,id".
+    """
+    return f"{note.created_at},{note.id}"
+
+
+def parse_page_cursor(cursor: str) -> Tuple[str, int]:
+    """Разбирает курсор страницы.
+    
+    Args:
+        cursor (str): Курсор, полученный из page_cursor.
+        
+    Returns:
+        Tuple[str, int]: Дата создания и ID заметки.
+        
+    Raises:
+        ValueError: Если курсор некорректен.
+    """
+    created_at, _, note_id = cursor.rpartition(',')
+    if not created_at:
+        raise ValueError(f"Некорректный курсор страницы: {cursor}")
+    return created_at, int(note_id)
+
+
+def _isoformat(value) -> Optional[str]:
+    """Дата из базы данных в формате ISO (SQLite возвращает даты строками)."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _in_range(created_at: str, start: Optional[str], end: Optional[str]) -> bool:
+    """Проверяет, что дата создания в формате ISO попадает в интервал [start, end)."""
+    return (start is None or created_at >= start) and (end is None or created_at < end)
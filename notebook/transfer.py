@@ -0,0 +1,233 @@
+"""
+Модуль массового импорта и экспорта заметок.
+
+Поддерживаются форматы JSON Lines (.jsonl), CSV (.csv) и формат notes.json
+(.json; сжатое содержание из notes.json прежней версии раскодируется, см. codec.py). Импорт идёт пачками через NoteStorage.import_batch, а после каждой
+пачки прогресс сохраняется в файл рядом с источником, поэтому прерванный
+импорт можно продолжить с того же места.
+"""
+
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+from .codec import decode_content
+from .models import Note
+from .storage import NoteStorage
+
+FORMATS = ('jsonl', 'csv', 'json')
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Определяет формат файла по явному указанию или расширению.
+
+    Args:
+        path (str): Путь к файлу.
+        fmt (str, optional): Явно указанный формат.
+
+    Returns:
+        str: Один из FORMATS.
+
+    Raises:
+        ValueError: Если формат не поддерживается.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат: {fmt or path} (доступны: {', '.join(FORMATS)})")
+    return fmt
+
+
+def _normalize_created_at(value) -> Optional[str]:
+    """Приводит дату создания к формату ISO.
+
+    В CSV, выгруженном через COPY, дата записана в формате PostgreSQL
+    ("2024-01-01 10:00:00+03"), а в JSON-хранилище даты сравниваются как строки ISO.
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value).isoformat()
+
+
+def _normalize_id(value) -> Optional[int]:
+    """Приводит ID из файла к числу.
+
+    В CSV ID записан строкой. Отрицательные ID - временные ID заметок,
+    не перенесённых в базу данных (см. NoteJournal.put_new), - не сохраняются.
+    """
+    if value in (None, ''):
+        return None
+    note_id = int(value)
+    return note_id if note_id > 0 else None
+
+
+def read_records(path: str, fmt: str) -> Iterator[dict]:
+    """Читает записи заметок из файла.
+
+    Args:
+        path (str): Путь к файлу.
+        fmt (str): Формат файла.
+
+    Yields:
+        dict: Словарь с полями id, title, content и created_at.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'jsonl':
+            records = (json.loads(line) for line in f if line.strip())
+        elif fmt == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = json.load(f)
+
+        for record in records:
+            yield {
+                'id': _normalize_id(record.get('id')),
+                'title': record['title'],
+                'content': decode_content(record['content']),
+                'created_at': _normalize_created_at(record.get('created_at')),
+            }
+
+
+def write_records(file, fmt: str, notes: Iterable[Note],
+                  progress: Optional[Callable[[int], None]] = None) -> int:
+    """Записывает заметки в файл потоком, не собирая их в памяти.
+
+    Args:
+        file: Текстовый файл, открытый на запись.
+        fmt (str): Формат файла.
+        notes (Iterable[Note]): Заметки.
+        progress (Callable, optional): Вызывается с количеством записанных заметок.
+
+    Returns:
+        int: Количество записанных заметок.
+    """
+    count = 0
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(file)
+        writer.writerow(['id', 'title', 'content', 'created_at'])
+    elif fmt == 'json':
+        file.write('[')
+
+    for note in notes:
+        if fmt == 'csv':
+            writer.writerow([note.id, note.title, note.content, note.created_at])
+        elif fmt == 'jsonl':
+            file.write(json.dumps(note.to_dict(), ensure_ascii=False) + '\n')
+        else:
+            file.write((',\n' if count else '\n') + json.dumps(note.to_dict(), ensure_ascii=False))
+        count += 1
+        if progress and count % 10000 == 0:
+            progress(count)
+
+    if fmt == 'json':
+        file.write('\n]\n')
+    return count
+
+
+def _print_progress(count: int, started: float, action: str):
+    """Печатает количество обработанных заметок и скорость."""
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(f"⏳ {action} заметок: {count} ({count / elapsed:.0f} в секунду)")
+
+
+def import_notes(storage: NoteStorage, path: str, fmt: Optional[str] = None,
+                 batch_size: int = 1000, resume: bool = True, keep_ids: bool = False) -> int:
+    """Импортирует заметки из файла пачками.
+
+    Прогресс хранится в файле path + '.progress'. Если импорт прервался,
+    повторный запуск пропускает уже загруженные записи.
+
+    По умолчанию ID заметок из файла не сохраняются - хранилище присваивает
+    новые, поэтому повторный импорт той же выгрузки создаёт дубликаты. С
+    keep_ids заметки сохраняют ID из файла, а заметки, чьи ID уже есть в
+    хранилище, пропускаются (см. NoteStorage.import_batch).
+
+    Args:
+        storage (NoteStorage): Хранилище заметок.
+        path (str): Путь к файлу.
+        fmt (str, optional): Формат файла. По умолчанию по расширению.
+        batch_size (int, optional): Размер пачки. По умолчанию 1000.
+        resume (bool, optional): Продолжить прерванный импорт. По умолчанию True.
+        keep_ids (bool, optional): Сохранить ID из файла. По умолчанию False.
+
+    Returns:
+        int: Количество импортированных в этот запуск заметок (без пропущенных).
+    """
+    fmt = detect_format(path, fmt)
+    progress_path = path + '.progress'
+
+    done = 0
+    if resume and os.path.exists(progress_path):
+        with open(progress_path, 'r', encoding='utf-8') as f:
+            done = json.load(f)['done']
+        print(f"↪️ Продолжаю импорт с записи {done + 1}")
+
+    started = time.monotonic()
+    imported = 0
+    batch = []
+    for position, record in enumerate(read_records(path, fmt)):
+        if position < done:
+            continue
+        batch.append(Note(record['title'], record['content'],
+                          id=record['id'] if keep_ids else None,
+                          created_at=record['created_at']))
+
+        if len(batch) >= batch_size:
+            imported += len(storage.import_batch(batch, keep_ids=keep_ids))
+            batch = []
+            # Пропущенные заметки тоже считаются загруженными записями
+            _save_progress(progress_path, position + 1)
+            _print_progress(imported, started, 'Импортировано')
+
+    if batch:
+        imported += len(storage.import_batch(batch, keep_ids=keep_ids))
+
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+    return imported
+
+
+def _save_progress(progress_path: str, done: int):
+    """Атомарно сохраняет количество загруженных записей."""
+    tmp_path = progress_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'done': done}, f)
+    os.replace(tmp_path, progress_path)
+
+
+def export_notes(storage: NoteStorage, path: str, fmt: Optional[str] = None,
+                 date_filter: Optional[str] = None) -> Optional[int]:
+    """Экспортирует заметки в файл.
+
+    Полная выгрузка в CSV идёт через COPY TO STDOUT; остальные случаи -
+    потоком через NoteStorage.iter_notes.
+
+    Args:
+        storage (NoteStorage): Хранилище заметок.
+        path (str): Путь к файлу.
+        fmt (str, optional): Формат файла. По умолчанию по расширению.
+        date_filter (str, optional): Фильтр по дате. По умолчанию все заметки.
+
+    Returns:
+        Optional[int]: Количество выгруженных заметок или None, если
+        выгрузка шла через COPY и количество неизвестно.
+    """
+    fmt = detect_format(path, fmt)
+    started = time.monotonic()
+    tmp_path = path + '.tmp'
+
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv' and not date_filter and storage.copy_out(f):
+            count = None
+        else:
+            f.seek(0)
+            f.truncate()
+            count = write_records(
+                f, fmt, storage.iter_notes(date_filter=date_filter),
+                progress=lambda n: _print_progress(n, started, 'Выгружено')
+            )
+    os.replace(tmp_path, path)
+    return count
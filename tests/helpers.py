@@ -0,0 +1,86 @@
+"""
+Общие вспомогательные функции для тестов.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from notebook.models import Note
+from notebook.query import NoteQuery
+
+
+
+def query_notes():
+    """Заметки для сравнения запросов в разных хранилищах (получают ID 1-4)."""
+    return [
+        Note("Покупки", "Молоко и хлеб", created_at='2024-01-01T10:00:00'),
+        Note("Работа", "Отчёт по проекту", created_at='2024-01-02T10:00:00'),
+        Note("Проект", "Молоко для кофе", created_at='2024-02-01T10:00:00'),
+        Note("Молоко", "Купить молоко", created_at='2024-02-03T10:00:00'),
+    ]
+
+
+# Запросы к query_notes() и ожидаемые ID - одинаковые для PostgreSQL,
+# SQLite и JSON-хранилища: слова ищутся как начала слов, а не подстроки
+QUERY_CASES = [
+    (NoteQuery(text="молоко"), [4, 3, 1]),
+    (NoteQuery(text="мол"), [4, 3, 1]),
+    (NoteQuery(text="локо"), []),
+    (NoteQuery(text="кофе мол"), [3]),
+    (NoteQuery(text="отч", order='oldest'), [2]),
+    (NoteQuery(text="молоко", order='oldest').page(limit=2, offset=1), [3, 4]),
+    (NoteQuery(text="молоко").dated("2024-02"), [4, 3]),
+    (NoteQuery().dated("2024-01"), [2, 1]),
+    (NoteQuery(order='oldest').ids(2, 3), [2, 3]),
+    (NoteQuery().page(limit=2, offset=1), [3, 2]),
+    (NoteQuery(text="!!!"), []),
+]
+
+def make_note(note_id, title='Заметка', content='Текст', created_at='2024-01-01T10:00:00',
+              **fields):
+    """Создаёт словарь с данными заметки (как в JSON-хранилище).
+
+    Args:
+        note_id: ID заметки.
+        title (str, optional): Заголовок.
+        content (str, optional): Содержание.
+        created_at (optional): Дата создания.
+        **fields: Дополнительные поля (например, change_seq).
+
+    Returns:
+        dict: Данные заметки; Note(**make_note(...)) создаёт объект заметки,
+        если дополнительных полей нет.
+    """
+    return {'id': note_id, 'title': title, 'content': content, 'created_at': created_at, **fields}
+
+
+class TempDirTestCase(unittest.TestCase):
+    """Тест с временной папкой self.tmpdir и путём self.path к notes.json в ней."""
+
+    def setUp(self):
+        """Создаёт временную папку."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'notes.json')
+
+    def tearDown(self):
+        """Удаляет временную папку."""
+        self.tmpdir.cleanup()
+
+
+@contextmanager
+def local_timezone(name):
+    """Временно меняет местный часовой пояс процесса (переменная TZ).
+
+    Args:
+        name (str): Часовой пояс, например 'Asia/Kolkata'.
+    """
+    try:
+        with patch.dict(os.environ, {'TZ': name}):
+            time.tzset()
+            yield
+    finally:
+        time.tzset()
@@ -0,0 +1,121 @@
+"""
+Тесты для асинхронного хранилища и асинхронных команд.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.async_commands import AsyncNoteCommands
+from notebook.async_storage import AsyncNoteStorage
+from notebook.models import Note
+
+
+class FakePool:
+    """Пул asyncpg с одним замоканным подключением."""
+
+    def __init__(self):
+        self.conn = MagicMock()
+        self.conn.fetch = AsyncMock(return_value=[])
+        self.conn.fetchval = AsyncMock(return_value=None)
+        self.conn.execute = AsyncMock()
+        self.close = AsyncMock()
+
+    def acquire(self):
+        conn = self.conn
+
+        class Acquire:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+        return Acquire()
+
+
+class TestAsyncNoteStorage(unittest.IsolatedAsyncioTestCase):
+    """Тесты для класса AsyncNoteStorage (с моками)."""
+
+    async def asyncSetUp(self):
+        """Открывает хранилище с замоканными пулом и базой данных."""
+        self.db_patcher = patch('notebook.storage.Database')
+        self.db_patcher.start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = FakePool()
+        with patch('sys.stdout'):
+            self.storage = await AsyncNoteStorage(
+                os.path.join(self.tmpdir.name, 'notes.json'), pool=self.pool
+            ).open()
+
+    async def asyncTearDown(self):
+        """Закрывает хранилище и удаляет временные файлы."""
+        await self.storage.close()
+        self.db_patcher.stop()
+        self.tmpdir.cleanup()
+
+    async def test_save_note(self):
+        """Заметка получает ID из базы данных и попадает в журнал."""
+        self.pool.conn.fetchval.return_value = 7
+
+        note = await self.storage.save_note(Note("Тест", "Текст"))
+
+        self.assertEqual(note.id, 7)
+        self.assertIn(7, self.storage.storage.mirror.load())
+
+    async def test_save_note_db_error(self):
+        """При ошибке базы данных JSON-хранилище выдаёт временный ID."""
+        self.pool.conn.fetchval.side_effect = OSError("нет подключения")
+
+        with patch('sys.stdout'):
+            note = await self.storage.save_note(Note("Тест", "Текст"))
+
+        self.assertEqual(note.id, -1)
+
+    async def test_search_notes_params(self):
+        """Параметры поиска нумеруются по порядку, включая фильтр и лимит."""
+        self.pool.conn.fetch.return_value = [(1, "Тест", "Текст", "2024-01-01T10:00:00")]
+
+        notes = await self.storage.search_notes("тест", date_filter="2024", limit=5)
+
+        self.assertEqual([note.id for note in notes], [1])
+        sql, *params = self.pool.conn.fetch.call_args.args
+        self.assertIn("created_at >= $3 AND created_at < $4", sql)
+        self.assertTrue(sql.endswith("LIMIT $5"))
+        self.assertEqual(len(params), 5)
+
+    async def test_get_all_notes_fallback(self):
+        """При ошибке базы данных заметки читаются из JSON-хранилища."""
+        self.pool.conn.fetchval.side_effect = OSError("нет подключения")
+        self.pool.conn.fetch.side_effect = OSError("нет подключения")
+        with patch('sys.stdout'):
+            await self.storage.save_note(Note("Тест", "Текст"))
+            notes = await self.storage.get_all_notes()
+
+        self.assertEqual([note.title for note in notes], ["Тест"])
+
+    async def test_delete_note(self):
+        """Удаление возвращает True, если заметка была в базе данных."""
+        self.pool.conn.fetchval.return_value = 3
+
+        self.assertTrue(await self.storage.delete_note(3))
+
+    async def test_commands(self):
+        """Асинхронные команды выводят те же сообщения, что и обычные."""
+        commands = AsyncNoteCommands(self.storage)
+        self.pool.conn.fetchval.return_value = 2
+
+        with patch('builtins.print') as mock_print:
+            await commands.add_note("Тест", "Текст")
+            await commands.list_notes()
+
+        mock_print.assert_any_call("Заметка добавлена успешно! (ID: 2)")
+        mock_print.assert_any_call("Заметок пока нет. Создайте первую!")
+
+
+if __name__ == '__main__':
+    unittest.main()
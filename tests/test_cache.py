@@ -0,0 +1,122 @@
+"""
+Тесты для модуля кэширования запросов.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.cache import CachedNoteStorage, LRUCache
+from notebook.models import Note
+
+
+class TestLRUCache(unittest.TestCase):
+    """Тесты для класса LRUCache."""
+
+    def test_evicts_least_recently_used(self):
+        """При переполнении вытесняется давно не использованная запись."""
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_ttl(self):
+        """Просроченная запись считается промахом."""
+        cache = LRUCache(ttl=10)
+        with patch('notebook.cache.time.monotonic', return_value=100.0):
+            cache.put('a', 1)
+        with patch('notebook.cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class TestCachedNoteStorage(unittest.TestCase):
+    """Тесты для класса CachedNoteStorage."""
+
+    def setUp(self):
+        """Создаёт мок хранилища с JSON-файлами во временной папке."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = MagicMock()
+        self.storage.filename = os.path.join(self.tmpdir.name, 'notes.json')
+        self.storage.journal.journal_path = self.storage.filename + '.journal'
+        self.listener = MagicMock()
+        self.listener.notifies = []
+        self.storage.db.listen.return_value = self.listener
+        self.storage.get_all_notes.return_value = [Note("Тест", "Текст", id=1)]
+        self.storage.get_note.side_effect = lambda note_id: Note("Тест", "Текст", id=note_id)
+        self.cached = CachedNoteStorage(self.storage)
+
+    def tearDown(self):
+        """Удаляет временную папку."""
+        self.tmpdir.cleanup()
+
+    def test_read_through(self):
+        """Повторный запрос берётся из кэша."""
+        self.cached.get_all_notes()
+        self.cached.get_all_notes()
+        self.cached.get_all_notes('today')
+
+        self.assertEqual(self.storage.get_all_notes.call_count, 2)
+        self.assertEqual(self.cached.stats(), {'hits': 1, 'misses': 2, 'size': 2})
+
+    def test_returns_copies(self):
+        """Изменение полученной заметки не меняет закэшированную."""
+        self.cached.get_all_notes()[0].title = "Изменено"
+        self.cached.get_note(2).content = "Изменено"
+
+        self.assertEqual(self.cached.get_all_notes()[0].title, "Тест")
+        self.assertEqual(self.cached.get_note(2).content, "Текст")
+        self.assertEqual(self.cached.stats()['hits'], 2)
+
+    def test_saved_note_invalidates_lists_and_note(self):
+        """Сохранение сбрасывает списки и запись этой заметки, но не другие заметки."""
+        self.cached.get_all_notes()
+        self.cached.get_note(1)
+        self.cached.get_note(2)
+
+        self.storage.add_listener.assert_called_once_with(self.cached)
+        self.cached.on_saved([Note("Тест", "Новый текст", id=1)])
+        self.cached.get_all_notes()
+        self.cached.get_note(1)
+        self.cached.get_note(2)
+
+        self.assertEqual(self.storage.get_all_notes.call_count, 2)
+        self.assertEqual(self.storage.get_note.call_count, 3)
+
+    def test_notification_from_other_process(self):
+        """Уведомление PostgreSQL очищает кэш."""
+        self.cached.get_all_notes()
+        self.listener.notifies.append(MagicMock(channel='notes_changed'))
+
+        self.cached.get_all_notes()
+
+        self.listener.poll.assert_called()
+        self.assertEqual(self.storage.get_all_notes.call_count, 2)
+
+    def test_file_change_from_other_process(self):
+        """Изменение JSON-файлов другим процессом очищает кэш."""
+        self.cached.get_all_notes()
+        with open(self.storage.journal.journal_path, 'w', encoding='utf-8') as f:
+            f.write('{"op": "delete", "id": 1}\n')
+
+        self.cached.get_all_notes()
+
+        self.assertEqual(self.storage.get_all_notes.call_count, 2)
+
+    def test_delegates_other_methods(self):
+        """Остальные методы вызываются у исходного хранилища."""
+        self.cached.delete_note(1)
+        self.storage.delete_note.assert_called_once_with(1)
+
+
+if __name__ == '__main__':
+    unittest.main()
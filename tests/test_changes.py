@@ -0,0 +1,98 @@
+"""
+Тесты для ленты изменений.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.changes import LEGACY_SEQ, Change, ChangeLog, ChangeSet
+from notebook.journal import NoteJournal
+from notebook.models import Note
+from notebook.parallel import build_indexes
+from notebook.records import RecordReader, write_records
+from tests.helpers import TempDirTestCase, make_note
+
+
+
+class TestChanges(TempDirTestCase):
+    """Тесты для ChangeSet, ChangeLog и ленты журнала."""
+
+    def test_change_set(self):
+        """Набор делит изменения на заметки и удаления и знает следующий номер."""
+        note = Note.from_dict(make_note(1))
+        changes = ChangeSet([Change(3, 1, note), Change(5, 2)], 2, 'json')
+
+        self.assertEqual((changes.notes, changes.deleted, changes.last_seq), ([note], [2], 5))
+        self.assertEqual(ChangeSet([], 7, 'database').last_seq, 7)
+
+    def test_log_since(self):
+        """Заметки и надгробия выдаются вместе по возрастанию номера, повторное добавление убирает надгробие."""
+        log = ChangeLog(self.path + '.changes')
+        log.add(make_note(1, change_seq=10))
+        log.add(make_note(2, change_seq=20))
+        log.add(make_note(3))
+        log.tombstone(2, 30)
+        log.add(make_note(1, change_seq=40))
+
+        self.assertEqual(log.since(0), [(LEGACY_SEQ, 3, False), (30, 2, True), (40, 1, False)])
+        self.assertEqual(log.since(30), [(40, 1, False)])
+        self.assertEqual(log.since(0, limit=2), [(LEGACY_SEQ, 3, False), (30, 2, True)])
+        self.assertEqual(log.max_seq, 40)
+
+        log.add(make_note(2, change_seq=50))
+        self.assertEqual(log.since(30), [(40, 1, False), (50, 2, False)])
+
+    def test_parallel_build(self):
+        """Лента строится по частям так же, как последовательно."""
+        records_path = self.path + '.records'
+        write_records(records_path, (make_note(i, change_seq=100 - i) for i in range(1, 31)), (0, 0))
+        sequential, parallel = ChangeLog('a'), ChangeLog('b')
+        build_indexes(RecordReader(records_path), [sequential], workers=1)
+        build_indexes(RecordReader(records_path), [parallel], workers=2, min_records=0)
+
+        self.assertEqual(parallel.since(0), sequential.since(0))
+        self.assertEqual(sequential.since(0)[0], (70, 30, False))
+
+    def test_journal_feed(self):
+        """Журнал выдаёт растущие номера, в том числе из другого экземпляра, и помнит удаления после сжатия."""
+        journal = NoteJournal(self.path)
+        journal.put_many([make_note(1), make_note(2)])
+        journal.delete(2)
+        other = NoteJournal(self.path)
+        other.put(make_note(1, 'Изменена'))
+        other.compact()
+
+        notes = other.load()
+        self.assertIn('updated_at', notes[1])
+        entries = other.changes.since(0)
+        self.assertEqual([(note_id, deleted) for _, note_id, deleted in entries], [(2, True), (1, False)])
+        self.assertEqual(entries[-1][0], notes[1]['change_seq'])
+
+        reopened = NoteJournal(self.path)
+        reopened.load()
+        self.assertEqual(reopened.changes.since(0), entries)
+        reopened.put(make_note(3))
+        self.assertGreater(reopened.load()[3]['change_seq'], entries[-1][0])
+
+    def test_lost_tombstones(self):
+        """Если лента построена заново по снимку, старые удаления считаются потерянными."""
+        journal = NoteJournal(self.path)
+        journal.put_many([make_note(1), make_note(2)])
+        seq = journal.changes.max_seq
+        journal.delete(2)
+        journal.compact()
+        os.remove(self.path + '.changes')
+
+        reopened = NoteJournal(self.path)
+        reopened.load()
+        self.assertFalse(reopened.changes.complete(seq))
+        self.assertTrue(reopened.changes.complete(0))
+        reopened.put(make_note(3))
+        self.assertTrue(reopened.changes.complete(reopened.changes.max_seq))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Тесты для кодирования заметок в файлах JSON-хранилища.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.codec import COMPRESS_MIN_BYTES, decode_content, decode_note, encode_content, encode_note
+from notebook.journal import NoteJournal
+from notebook.records import RecordReader
+from notebook.transfer import read_records
+from tests.helpers import TempDirTestCase, make_note
+
+LONG_CONTENT = "Купить молоко и хлеб, позвонить в банк. " * 200
+
+
+
+class TestCodec(TempDirTestCase):
+    """Тесты для codec и его использования журналом и файлом записей."""
+
+    def test_round_trip(self):
+        """Большое содержание сжимается, короткое остаётся строкой."""
+        self.assertGreaterEqual(len(LONG_CONTENT.encode('utf-8')), COMPRESS_MIN_BYTES)
+        encoded = encode_content(LONG_CONTENT)
+
+        self.assertEqual(encoded['codec'], 'zlib1')
+        self.assertLess(len(encoded['data']), len(LONG_CONTENT.encode('utf-8')) // 10)
+        self.assertEqual(decode_content(encoded), LONG_CONTENT)
+        self.assertEqual(encode_content('Текст'), 'Текст')
+        note = make_note(1)
+        self.assertIs(encode_note(note), note)
+        self.assertIs(decode_note(note), note)
+
+    def test_unknown_codec(self):
+        """Неизвестный кодек - ошибка, а не пустое содержание."""
+        with self.assertRaises(ValueError):
+            decode_content({'codec': 'lz77', 'data': ''})
+
+    def test_files_are_compact(self):
+        """Журнал и файл записей сжимают большое содержание, notes.json остаётся обычным JSON."""
+        journal = NoteJournal(self.path)
+        journal.put_many([make_note(1), make_note(2, content=LONG_CONTENT)])
+
+        with open(journal.journal_path, encoding='utf-8') as f:
+            text = f.read()
+        self.assertIn('"title": "Заметка"', text)
+        self.assertNotIn('позвонить', text)
+
+        journal.compact()
+        with open(self.path, encoding='utf-8') as f:
+            text = f.read()
+        self.assertEqual([note['content'] for note in json.loads(text)], ['Текст', LONG_CONTENT])
+        self.assertIn('"title": "Заметка"', text)
+
+        reopened = NoteJournal(self.path).load()
+        self.assertEqual(reopened[2]['content'], LONG_CONTENT)
+        self.assertEqual(RecordReader(journal.records_path).get(2)['content'], LONG_CONTENT)
+        self.assertLess(os.path.getsize(journal.records_path), len(LONG_CONTENT))
+
+    def test_compressed_snapshot_is_read(self):
+        """notes.json прежней версии со сжатым содержанием читается и переписывается обычным."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([encode_note(make_note(1, content=LONG_CONTENT))], f)
+
+        journal = NoteJournal(self.path)
+        self.assertEqual(journal.load()[1]['content'], LONG_CONTENT)
+        journal.put(make_note(2))
+        journal.compact()
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['content'], LONG_CONTENT)
+
+    def test_import_compressed_snapshot(self):
+        """Импорт из notes.json раскодирует сжатое содержание."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([encode_note(make_note(1, content=LONG_CONTENT))], f)
+
+        records = list(read_records(self.path, 'json'))
+
+        self.assertEqual(records[0]['content'], LONG_CONTENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Тесты для колоночного кэша заметок.
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import columnar
+from notebook.models import Note
+from tests.helpers import make_note
+
+
+def note_at(note_id, created_at, title='Заметка'):
+    """Создаёт объект заметки с заданными ID и датой."""
+    return Note(**make_note(note_id, title, f'Текст {note_id}', created_at))
+
+
+@unittest.skipIf(columnar.np is None, "NumPy не установлен")
+class TestColumnarNoteCache(unittest.TestCase):
+    """Тесты для класса ColumnarNoteCache."""
+
+    def setUp(self):
+        """Заполняет кэш несколькими заметками."""
+        self.cache = columnar.ColumnarNoteCache([
+            note_at(1, '2024-01-01T10:00:00'),
+            note_at(2, '2024-01-01T12:00:00'),
+            note_at(3, '2024-01-03T09:00:00'),
+            note_at(4, datetime(2024, 2, 1, 8, 30)),
+        ])
+
+    def test_filter_and_sort(self):
+        """Фильтр по дате возвращает ID от новых к старым."""
+        self.assertEqual(self.cache.filter_ids().tolist(), [4, 3, 2, 1])
+        self.assertEqual(self.cache.filter_ids('2024-01').tolist(), [3, 2, 1])
+
+    def test_count_by_day(self):
+        """Подсчёт заметок по дням."""
+        self.assertEqual(self.cache.count_by_day('2024-01'),
+                         [(date(2024, 1, 1), 2), (date(2024, 1, 3), 1)])
+
+    def test_incremental_changes(self):
+        """Изменения хранилища применяются к кэшу через подписку."""
+        self.cache.on_saved([note_at(2, '2024-02-05T00:00:00', 'Новая')])
+        self.cache.on_deleted([1])
+
+        notes = self.cache.notes()
+        self.assertEqual([note.id for note in notes], [2, 4, 3])
+        self.assertEqual(notes[0].title, 'Новая')
+        self.assertEqual(notes[0].content, 'Текст 2')
+        self.assertEqual(len(self.cache), 3)
+
+    def test_from_storage_subscribes(self):
+        """Кэш загружается из хранилища и подписывается на изменения."""
+        storage = MagicMock()
+        storage.iter_notes.return_value = iter([note_at(1, '2024-01-01T10:00:00')])
+
+        cache = columnar.ColumnarNoteCache.from_storage(storage)
+
+        storage.add_listener.assert_called_once_with(cache)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,12 @@ import sys
 import os
 from unittest.mock import Mock, patch
 import io
+import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from notebook.commands import NoteCommands
 from notebook.models import Note
+from notebook.stats import NoteStats
 
 class TestNoteCommands(unittest.TestCase):
     
@@ -34,7 +36,7 @@ class TestNoteCommands(unittest.TestCase):
             self.commands.add_note("Заголовок", "")
     
     def test_list_notes_empty(self):
-        self.mock_storage.get_all_notes.return_value = []
+        self.mock_storage.iter_notes.return_value = iter([])
         
         with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
             self.commands.list_notes()
@@ -44,13 +46,23 @@ class TestNoteCommands(unittest.TestCase):
     def test_list_notes_with_data(self):
         note = Note("Тест", "Текст")
         note.id = 1
-        self.mock_storage.get_all_notes.return_value = [note]
+        self.mock_storage.iter_notes.return_value = iter([note])
         
         with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
             self.commands.list_notes()
             output = fake_out.getvalue()
             self.assertIn("Тест", output)
     
+    def test_list_notes_next_page_cursor(self):
+        note = Note("Тест", "Текст")
+        note.id = 7
+        self.mock_storage.iter_notes.return_value = iter([note])
+        
+        with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
+            self.commands.list_notes(limit=1)
+            output = fake_out.getvalue()
+            self.assertIn(f"--after \"{note.created_at},7\"", output)
+    
     def test_search_notes_empty(self):
         with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
             self.commands.search_notes("")
@@ -73,5 +85,40 @@ class TestNoteCommands(unittest.TestCase):
             output = fake_out.getvalue()
             self.assertIn("не найдена", output)
 
+    def test_add_notes_batch(self):
+        self.mock_storage.save_many.side_effect = lambda notes: notes
+        
+        with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
+            self.commands.add_notes([("A", "a"), ("B", "b")])
+            output = fake_out.getvalue()
+            self.assertIn("Добавлено заметок: 2", output)
+        self.mock_storage.save_many.assert_called_once()
+    
+    def test_delete_notes_batch(self):
+        self.mock_storage.delete_many.return_value = [1]
+        
+        with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
+            self.commands.delete_notes([1, 2])
+            output = fake_out.getvalue()
+            self.assertIn("Удалены заметки с ID: 1", output)
+            self.assertIn("Не найдены заметки с ID: 2", output)
+    
+    def test_show_stats(self):
+        self.mock_storage.note_stats.return_value = NoteStats(
+            {'2024-01-01': (2, 10), '2024-01-15': (1, 5), '2024-02-01': (1, 4)},
+            '2024-01-01T10:00:00', '2024-02-01T09:00:00'
+        )
+        
+        with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
+            self.commands.show_stats('month')
+            output = fake_out.getvalue()
+            self.assertIn("Всего заметок: 4", output)
+            self.assertIn("2024-01: 3 заметок, 15 байт", output)
+        
+        with patch('sys.stdout', new_callable=io.StringIO) as fake_out:
+            self.commands.show_stats(fmt='json')
+            data = json.loads(fake_out.getvalue())
+            self.assertEqual(data['year'], {'2024': {'notes': 4, 'content_bytes': 19}})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
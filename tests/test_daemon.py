@@ -0,0 +1,82 @@
+"""
+Тесты для фонового режима (демона) и клиента.
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.daemon import NoteServer, send_command
+
+
+def fake_run(argv):
+    """Команда, которая печатает аргументы или завершается как argparse."""
+    if argv == ['--help']:
+        print("usage: main.py")
+        raise SystemExit(0)
+    if argv == ['--fail']:
+        raise RuntimeError("нет подключения")
+    print(' '.join(argv))
+
+
+class TestNoteServer(unittest.TestCase):
+    """Тесты для класса NoteServer и функции send_command."""
+
+    def setUp(self):
+        """Запускает сервер на сокете во временной папке."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, 'notes.sock')
+        self.server = NoteServer(self.socket_path, fake_run)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        self.thread.start()
+
+    def tearDown(self):
+        """Останавливает сервер и удаляет временную папку."""
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_command_output_is_returned(self):
+        """Клиент получает то, что команда напечатала."""
+        self.assertEqual(send_command(['--search', 'молоко'], self.socket_path),
+                         "--search молоко\n")
+
+    def test_exit_and_errors_do_not_stop_server(self):
+        """SystemExit и исключения команды превращаются в вывод."""
+        self.assertEqual(send_command(['--help'], self.socket_path), "usage: main.py\n")
+        self.assertEqual(send_command(['--fail'], self.socket_path),
+                         "Произошла ошибка: нет подключения\n")
+        self.assertEqual(send_command(['--list'], self.socket_path), "--list\n")
+
+    def test_socket_removed_on_close(self):
+        """После остановки сервера файл сокета удаляется."""
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertIsNone(send_command(['--list'], self.socket_path))
+
+
+class TestSendCommand(unittest.TestCase):
+    """Тесты для клиента без запущенного демона."""
+
+    def test_stale_socket(self):
+        """Оставшийся файл сокета без демона - команда выполняется локально."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            socket_path = os.path.join(tmpdir, 'notes.sock')
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(socket_path)
+            stale.close()
+
+            self.assertIsNone(send_command(['--list'], socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,349 @@
+"""
+Тесты для пула подключений и класса Database.
+"""
+
+import os
+import sys
+import threading
+import unittest
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import database
+from notebook.database import ConnectionPool, Database, PoolError, add_months, partition_name
+
+
+def make_connection():
+    """Создаёт мок подключения psycopg2 к пустой базе данных."""
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = 0
+    conn.cursor.return_value.fetchone.return_value = None
+    conn.cursor.return_value.fetchall.return_value = []
+    return conn
+
+
+def executed_sql(cursor) -> list:
+    """Тексты всех запросов, выполненных через мок курсора."""
+    return [' '.join(call.args[0].split()) for call in cursor.execute.call_args_list]
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Тесты для класса ConnectionPool."""
+
+    def setUp(self):
+        """Подменяет psycopg2.connect."""
+        self.connect_patcher = patch('notebook.database.psycopg2.connect',
+                                     side_effect=lambda **kw: make_connection())
+        self.mock_connect = self.connect_patcher.start()
+
+    def tearDown(self):
+        """Снимает подмену."""
+        self.connect_patcher.stop()
+
+    def test_connection_is_reused(self):
+        """Возвращённое подключение выдаётся повторно."""
+        pool = ConnectionPool(minconn=1, maxconn=2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(self.mock_connect.call_count, 1)
+
+    def test_exhausted_pool_raises(self):
+        """При заполненном пуле после таймаута выбрасывается PoolError."""
+        pool = ConnectionPool(minconn=0, maxconn=1, wait_timeout=0.01)
+        pool.getconn()
+
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+    def test_closed_connection_is_replaced(self):
+        """Закрытое подключение не выдаётся."""
+        pool = ConnectionPool(minconn=1, maxconn=2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.closed = 1
+
+        self.assertIsNot(pool.getconn(), conn)
+
+    def test_idle_connections_are_evicted(self):
+        """Лишние простаивающие подключения закрываются."""
+        pool = ConnectionPool(minconn=1, maxconn=3, idle_timeout=0)
+        first, second = pool.getconn(), pool.getconn()
+        pool.putconn(first)
+        pool.putconn(second)
+
+        pool.getconn()
+
+        self.assertEqual(pool.size, 1)
+
+    def test_slow_connect_does_not_block_pool(self):
+        """Пока одно подключение открывается, свободные выдаются и возвращаются."""
+        pool = ConnectionPool(minconn=1, maxconn=2)
+        idle = pool.getconn()
+        pool.putconn(idle)
+        connecting, release = threading.Event(), threading.Event()
+
+        def slow_connect(**kw):
+            connecting.set()
+            release.wait(5)
+            return make_connection()
+
+        self.mock_connect.side_effect = slow_connect
+        first = pool.getconn()
+        thread = threading.Thread(target=pool.getconn)
+        thread.start()
+        connecting.wait(5)
+
+        pool.putconn(first)
+        self.assertIs(pool.getconn(), idle)
+        release.set()
+        thread.join()
+        self.assertEqual(pool.size, 2)
+
+    def test_failed_connect_frees_slot(self):
+        """Если подключение не открылось, его место в пуле освобождается."""
+        pool = ConnectionPool(minconn=0, maxconn=1, wait_timeout=0.01)
+        self.mock_connect.side_effect = psycopg2.OperationalError("нет соединения")
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn()
+
+        self.assertEqual(pool.size, 0)
+
+
+class TestDatabase(unittest.TestCase):
+    """Тесты для класса Database."""
+
+    def setUp(self):
+        """Сбрасывает общие пулы и подменяет psycopg2.connect."""
+        database._pools.clear()
+        database._schema_ready.clear()
+        self.connect_patcher = patch('notebook.database.psycopg2.connect',
+                                     side_effect=lambda **kw: make_connection())
+        self.mock_connect = self.connect_patcher.start()
+
+    def tearDown(self):
+        """Снимает подмену."""
+        self.connect_patcher.stop()
+        database._pools.clear()
+        database._schema_ready.clear()
+
+    def test_schema_initialized_once_per_dsn(self):
+        """CREATE TABLE выполняется один раз для одной базы данных."""
+        first = Database(dbname='notes_db')
+        conn = first.get_connection()
+        first.release_connection()
+        ddl_calls = conn.cursor.return_value.execute.call_count
+
+        second = Database(dbname='notes_db')
+        second.get_connection()
+        second.release_connection()
+
+        self.assertGreater(ddl_calls, 0)
+        self.assertEqual(conn.cursor.return_value.execute.call_count, ddl_calls)
+        self.assertEqual(self.mock_connect.call_count, 1)
+
+    def test_failed_schema_init_is_retried(self):
+        """После сбоя DDL схема создаётся при следующем подключении."""
+        conn = make_connection()
+        cursor = conn.cursor.return_value
+        cursor.execute.side_effect = [None, psycopg2.OperationalError("lock timeout")]
+        self.mock_connect.side_effect = lambda **kw: conn
+        db = Database(dbname='notes_db')
+
+        with patch('sys.stdout'):
+            db.get_connection()
+        db.release_connection()
+        self.assertNotIn(db._key, database._schema_ready)
+
+        cursor.execute.side_effect = None
+        db.get_connection()
+        db.release_connection()
+
+        self.assertIn(db._key, database._schema_ready)
+        self.assertEqual(db._local.depth, 0)
+        conn.commit.assert_called_once()
+
+    def test_connect_is_deferred(self):
+        """Создание Database не открывает подключений."""
+        Database(dbname='notes_db')
+
+        self.assertEqual(self.mock_connect.call_count, 0)
+
+    def test_schema_marker_skips_ddl(self):
+        """Если отметка версии схемы актуальна, DDL не выполняется."""
+        db = Database(dbname='notes_db')
+        conn = make_connection()
+        conn.cursor.return_value.fetchone.return_value = (database.SCHEMA_VERSION, date.max)
+        self.mock_connect.side_effect = lambda **kw: conn
+
+        db.get_connection()
+        db.release_connection()
+
+        conn.cursor.return_value.execute.assert_called_once_with(
+            "SELECT version, partitions_until FROM notebook_schema"
+        )
+
+    def test_new_database_is_partitioned(self):
+        """В новой базе notes секционирована по месяцам, секции созданы наперёд."""
+        db = Database(dbname='notes_db')
+        conn = db.get_connection()
+        db.release_connection()
+
+        sql = executed_sql(conn.cursor.return_value)
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        self.assertTrue(any(query.endswith("PARTITION BY RANGE (created_at)") for query in sql))
+        self.assertIn("CREATE TABLE notes_default PARTITION OF notes DEFAULT", sql)
+        for ahead in range(database.PARTITION_MONTHS_AHEAD + 1):
+            self.assertIn(f"CREATE TABLE IF NOT EXISTS {partition_name(add_months(this_month, ahead))} "
+                          "PARTITION OF notes FOR VALUES FROM (%s) TO (%s)", sql)
+        conn.cursor.return_value.execute.assert_any_call(
+            "INSERT INTO notebook_schema (version, partitions_until) VALUES (%s, %s)",
+            (database.SCHEMA_VERSION, add_months(this_month, database.PARTITION_MONTHS_AHEAD + 1))
+        )
+        conn.commit.assert_called_once()
+
+    def test_legacy_table_is_migrated(self):
+        """Таблица без секций переносится в секции своих месяцев с сохранением ID."""
+        conn = make_connection()
+        conn.cursor.return_value.fetchone.side_effect = [
+            None,  # отметки версии схемы нет
+            ('r',),  # notes - обычная таблица
+            (datetime(2024, 1, 5, tzinfo=timezone.utc), datetime(2024, 2, 10, tzinfo=timezone.utc)),
+            (False,),  # таблицы статистики нет
+        ]
+        self.mock_connect.side_effect = lambda **kw: conn
+
+        db = Database(dbname='notes_db')
+        db.get_connection()
+        db.release_connection()
+
+        sql = executed_sql(conn.cursor.return_value)
+        order = [sql.index(query) for query in (
+            "ALTER TABLE notes RENAME TO notes_unpartitioned",
+            "ALTER SEQUENCE notes_id_seq OWNED BY NONE",
+            "CREATE TABLE IF NOT EXISTS notes_p2024_01 PARTITION OF notes FOR VALUES FROM (%s) TO (%s)",
+            "CREATE TABLE IF NOT EXISTS notes_p2024_02 PARTITION OF notes FOR VALUES FROM (%s) TO (%s)",
+            "INSERT INTO notes (id, title, content, created_at) SELECT id, title, content, "
+            "COALESCE(created_at, CURRENT_TIMESTAMP) FROM notes_unpartitioned",
+            "DROP TABLE notes_unpartitioned",
+            "CREATE OR REPLACE TRIGGER notes_stats_insert AFTER INSERT ON notes "
+            "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notes_stats_apply()",
+            "INSERT INTO notes_stats (bucket, notes, content_bytes) "
+            f"SELECT {database._STATS_BUCKET}, count(*), sum(octet_length(content)) FROM notes GROUP BY 1",
+        )]
+        self.assertEqual(order, sorted(order))
+        conn.commit.assert_called_once()
+
+    def test_existing_stats_are_not_refilled(self):
+        """Таблица статистики заполняется по заметкам только при создании."""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (True,)
+
+        Database(dbname='notes_db')._init_stats(cursor)
+
+        sql = executed_sql(cursor)
+        self.assertIn("CREATE OR REPLACE TRIGGER notes_stats_delete AFTER DELETE ON notes "
+                      "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT "
+                      "EXECUTE FUNCTION notes_stats_apply()", sql)
+        self.assertFalse(any(query.startswith("INSERT INTO notes_stats") for query in sql))
+        self.assertIn("DROP TABLE IF EXISTS notes_daily_stats", sql)
+
+    def test_change_feed_triggers(self):
+        """Изменения помечаются ID транзакции без общей блокировки, удаления оставляют надгробия."""
+        cursor = MagicMock()
+
+        Database(dbname='notes_db')._init_changes(cursor)
+
+        sql = executed_sql(cursor)
+        self.assertIn("ALTER TABLE notes ADD COLUMN IF NOT EXISTS change_seq BIGINT "
+                      "NOT NULL DEFAULT nextval('notes_change_seq')", sql)
+        self.assertIn("ALTER TABLE notes ADD COLUMN IF NOT EXISTS change_xid xid8 "
+                      "NOT NULL DEFAULT pg_current_xact_id()", sql)
+        self.assertIn("ALTER TABLE notes_tombstones ADD COLUMN IF NOT EXISTS change_xid xid8 "
+                      "NOT NULL DEFAULT pg_current_xact_id()", sql)
+        self.assertIn("DROP TRIGGER IF EXISTS notes_change_lock ON notes", sql)
+        self.assertFalse(any('pg_advisory' in query for query in sql))
+        self.assertTrue(any("NEW.change_xid := pg_current_xact_id();" in query for query in sql))
+        self.assertIn("CREATE OR REPLACE TRIGGER notes_tombstones_delete AFTER DELETE ON notes "
+                      "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT "
+                      "EXECUTE FUNCTION notes_track_tombstones()", sql)
+
+    def test_stray_rows_are_moved_without_triggers(self):
+        """Строки из секции по умолчанию переносятся в новую секцию без DELETE и INSERT через notes."""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [('notes_default',)],  # месячных секций нет
+            [(date(2020, 1, 1),)],  # в notes_default есть строки за январь 2020
+        ]
+
+        Database(dbname='notes_db')._maintain_partitions(cursor)
+
+        sql = executed_sql(cursor)
+        moving = sql[sql.index("ALTER TABLE notes DETACH PARTITION notes_default"):]
+        self.assertEqual(moving[:5], [
+            "ALTER TABLE notes DETACH PARTITION notes_default",
+            "CREATE TABLE notes_p2020_01 (LIKE notes INCLUDING DEFAULTS INCLUDING GENERATED)",
+            "WITH moved AS (DELETE FROM notes_default WHERE created_at >= %s AND created_at < %s "
+            f"RETURNING {database._MOVED_COLUMNS}) INSERT INTO notes_p2020_01 ({database._MOVED_COLUMNS}) "
+            "SELECT * FROM moved",
+            "ALTER TABLE notes ATTACH PARTITION notes_p2020_01 FOR VALUES FROM (%s) TO (%s)",
+            "ALTER TABLE notes ATTACH PARTITION notes_default DEFAULT",
+        ])
+        cursor.execute.assert_any_call(
+            "ALTER TABLE notes ATTACH PARTITION notes_p2020_01 FOR VALUES FROM (%s) TO (%s)",
+            ('2020-01-01 00:00:00+00', '2020-02-01 00:00:00+00')
+        )
+        self.assertFalse(any(query.startswith(("DELETE FROM notes ", "INSERT INTO notes ")) for query in sql))
+        self.assertEqual(sum(query.startswith("CREATE TABLE IF NOT EXISTS notes_p") for query in sql),
+                         database.PARTITION_MONTHS_AHEAD + 1)
+
+    def test_old_partitions_are_archived(self):
+        """Секции старше срока хранения отключаются и переносятся в архив."""
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [('notes_p2020_01',), ('notes_default',), (partition_name(this_month),)],
+            [],
+        ]
+
+        with patch.dict(os.environ, {'NOTES_PARTITION_RETENTION_MONTHS': '12'}), \
+                patch('sys.stdout'):
+            Database(dbname='notes_db')._maintain_partitions(cursor)
+
+        sql = executed_sql(cursor)
+        self.assertIn("ALTER TABLE notes DETACH PARTITION notes_p2020_01", sql)
+        self.assertIn("ALTER TABLE notes_p2020_01 SET SCHEMA notes_archive", sql)
+        cursor.execute.assert_any_call("DELETE FROM notes_stats WHERE bucket >= %s AND bucket < %s",
+                                       ('2020-01-01 00:00:00+00', '2020-02-01 00:00:00+00'))
+        self.assertTrue(sql[-1].startswith("WITH old AS (DELETE FROM notes_stats"))
+        self.assertFalse(any(partition_name(this_month) in query and 'DETACH' in query for query in sql))
+
+    def test_add_months(self):
+        """Месяцы считаются через границу года в обе стороны."""
+        self.assertEqual(add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(partition_name(date(2024, 3, 1)), 'notes_p2024_03')
+
+    def test_nested_calls_share_connection(self):
+        """Вложенные вызовы в одном потоке получают одно подключение."""
+        db = Database(dbname='notes_db')
+
+        outer = db.get_connection()
+        inner = db.get_connection()
+        db.release_connection()
+
+        self.assertIs(outer, inner)
+        self.assertEqual(db.pool.size, 1)
+        db.release_connection()
+        self.assertIs(db.pool.getconn(), outer)
+
+
+if __name__ == '__main__':
+    unittest.main()
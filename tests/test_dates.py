@@ -0,0 +1,59 @@
+"""
+Тесты для модуля фильтрации по дате.
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.dates import DateIndex, date_range
+
+
+class TestDateRange(unittest.TestCase):
+    """Тесты для функции date_range."""
+
+    def test_relative_filters(self):
+        """today, week, month и year считаются от текущей даты."""
+        today = date(2024, 3, 10)
+        self.assertEqual(date_range('today', today),
+                         (datetime(2024, 3, 10), datetime(2024, 3, 11)))
+        self.assertEqual(date_range('week', today), (datetime(2024, 3, 3), None))
+        self.assertEqual(date_range('month', today), (datetime(2024, 2, 9), None))
+        self.assertEqual(date_range('year', today), (datetime(2023, 3, 11), None))
+
+    def test_calendar_filters(self):
+        """День, месяц и год дают полуоткрытый интервал."""
+        self.assertEqual(date_range('2024-02-29'), (datetime(2024, 2, 29), datetime(2024, 3, 1)))
+        self.assertEqual(date_range('2024-12'), (datetime(2024, 12, 1), datetime(2025, 1, 1)))
+        self.assertEqual(date_range('2024'), (datetime(2024, 1, 1), datetime(2025, 1, 1)))
+
+    def test_unknown_filter(self):
+        """Нераспознанный фильтр вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            date_range('вчера')
+
+
+class TestDateIndex(unittest.TestCase):
+    """Тесты для класса DateIndex."""
+
+    def test_range_lookup(self):
+        """Заметки за интервал возвращаются от новых к старым."""
+        index = DateIndex('notes.json.dates')
+        index.add({'id': 1, 'created_at': '2024-01-01T10:00:00'})
+        index.add({'id': 2, 'created_at': '2024-01-02T00:00:00'})
+        index.add({'id': 3, 'created_at': '2024-01-01T23:59:59.5'})
+        index.add({'id': 4, 'created_at': '2023-12-31T12:00:00'})
+
+        self.assertEqual(index.range('2024-01-01T00:00:00', '2024-01-02T00:00:00'), [3, 1])
+        self.assertEqual(index.range('2024-01-01T00:00:00'), [2, 3, 1])
+
+        index.remove(3)
+        index.add({'id': 1, 'created_at': '2024-02-01T00:00:00'})
+        self.assertEqual(index.range(), [1, 2, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Тесты для журнала изменений JSON-хранилища.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.journal import NoteJournal
+from tests.helpers import TempDirTestCase, make_note
+
+
+class TestNoteJournal(TempDirTestCase):
+    """Тесты для класса NoteJournal."""
+
+    def test_existing_file_becomes_snapshot(self):
+        """Старый notes.json читается как первый снимок."""
+        with open(self.path, 'w') as f:
+            json.dump([make_note(1), make_note(2)], f)
+
+        journal = NoteJournal(self.path)
+
+        self.assertEqual([n['id'] for n in journal.notes()], [1, 2])
+        self.assertEqual(journal.max_id(), 2)
+
+    def test_replay_after_restart(self):
+        """Изменения из журнала восстанавливаются новым экземпляром."""
+        journal = NoteJournal(self.path)
+        journal.put(make_note(1))
+        journal.put(make_note(2))
+        journal.put(make_note(1, 'Обновлённая'))
+        self.assertTrue(journal.delete(2))
+        self.assertFalse(journal.delete(99))
+
+        restored = NoteJournal(self.path).notes()
+
+        self.assertEqual(len(restored), 1)
+        self.assertEqual(restored[0]['title'], 'Обновлённая')
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_compact_writes_snapshot(self):
+        """Сжатие переносит журнал в notes.json."""
+        journal = NoteJournal(self.path)
+        journal.put(make_note(1))
+        journal.put(make_note(2))
+        journal.delete(1)
+
+        journal.compact()
+
+        with open(self.path) as f:
+            self.assertEqual([n['id'] for n in json.load(f)], [2])
+        self.assertFalse(os.path.exists(journal.journal_path))
+        self.assertEqual([n['id'] for n in NoteJournal(self.path).notes()], [2])
+
+    def test_threshold_triggers_compaction(self):
+        """При достижении порога журнал сжимается автоматически."""
+        journal = NoteJournal(self.path, compact_threshold=3)
+        for note_id in range(1, 5):
+            journal.put(make_note(note_id))
+        journal.compact()
+
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 4)
+
+    def test_close_waits_for_compaction(self):
+        """close дожидается фонового сжатия, поэтому выход не прерывает запись снимка."""
+        journal = NoteJournal(self.path)
+        journal.put(make_note(1))
+        journal.compact(wait=False)
+
+        journal.close()
+
+        self.assertFalse(journal._compaction.is_alive())
+        with open(self.path) as f:
+            self.assertEqual([n['id'] for n in json.load(f)], [1])
+
+    def test_orphaned_files_removed_on_open(self):
+        """Временные файлы завершившегося процесса удаляются при открытии журнала."""
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        orphaned = [f"{self.path}.{process.pid}.tmp", f"{self.path}.records.{process.pid}"]
+        kept = [f"{self.path}.{os.getpid()}.tmp", self.path + '.backup']
+        for path in orphaned + kept:
+            open(path, 'w').close()
+
+        NoteJournal(self.path).load()
+
+        self.assertFalse(any(os.path.exists(path) for path in orphaned))
+        self.assertTrue(all(os.path.exists(path) for path in kept))
+
+
+if __name__ == '__main__':
+    unittest.main()
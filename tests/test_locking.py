@@ -0,0 +1,121 @@
+"""
+Тесты для совместной работы нескольких процессов с JSON-хранилищем.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import locking
+from notebook.journal import NoteJournal
+from notebook.locking import atomic_write
+from tests.helpers import TempDirTestCase, make_note
+
+
+
+def add_notes(path, count):
+    """Добавляет заметки с новыми ID из отдельного процесса."""
+    journal = NoteJournal(path, compact_threshold=7)
+    for number in range(count):
+        journal.put_new([make_note(None, f"Заметка {os.getpid()}-{number}")])
+    journal.compact()
+
+
+class TestLocking(TempDirTestCase):
+    """Тесты для FileLock, atomic_write и журналов в нескольких процессах."""
+
+    def test_atomic_write_keeps_old_file_on_error(self):
+        """Ошибка во время записи не портит прежний файл."""
+        with atomic_write(self.path) as f:
+            f.write('[]')
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as f:
+                f.write('[{"id": ')
+                raise RuntimeError("сбой")
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '[]')
+        self.assertEqual(os.listdir(self.tmpdir.name), ['notes.json'])
+
+    def test_journals_see_each_other(self):
+        """Журнал дочитывает записи и снимки другого экземпляра."""
+        first, second = NoteJournal(self.path), NoteJournal(self.path)
+        first.put(make_note(1))
+        second.put(make_note(2))
+        self.assertEqual(sorted(first.load()), [1, 2])
+
+        first.compact()
+        second.delete(1)
+
+        self.assertEqual(list(first.load()), [2])
+        self.assertEqual(list(NoteJournal(self.path).load()), [2])
+
+    def test_put_new_ids_are_unique(self):
+        """Два экземпляра не выдают один и тот же временный ID."""
+        first, second = NoteJournal(self.path), NoteJournal(self.path)
+        first.load()
+
+        self.assertEqual(second.put_new([make_note(None), make_note(None)]), [-1, -2])
+        self.assertEqual(first.put_new([make_note(None)]), [-3])
+
+    def test_stale_snapshot_is_not_written(self):
+        """Снимок, собранный до чужого сжатия, не затирает записи другого процесса."""
+        first, second = NoteJournal(self.path), NoteJournal(self.path)
+        first.put(make_note(1))
+        with patch.object(first, '_write_snapshot', MagicMock()) as write_snapshot:
+            first.compact()
+        state = write_snapshot.call_args.args
+
+        second.put(make_note(2))
+        second.compact()
+        first._write_snapshot(*state)
+
+        self.assertEqual(sorted(NoteJournal(self.path).load()), [1, 2])
+        with open(self.path) as f:
+            self.assertEqual(sorted(note['id'] for note in json.load(f)), [1, 2])
+
+    def test_corrupted_snapshot_is_not_overwritten(self):
+        """Повреждённый notes.json не читается как пустой и не перезаписывается."""
+        with open(self.path, 'w') as f:
+            f.write('[{"id": 1, "title"')
+        journal = NoteJournal(self.path)
+
+        with self.assertRaises(ValueError):
+            journal.put(make_note(2))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '[{"id": 1, "title"')
+
+    def test_torn_journal_line(self):
+        """Оборванная сбоем строка журнала не портит следующую запись."""
+        journal = NoteJournal(self.path)
+        journal.put(make_note(1))
+        with open(journal.journal_path, 'a') as f:
+            f.write('{"op": "put", "note": {"id": 9')
+
+        NoteJournal(self.path).put(make_note(2))
+
+        self.assertEqual(sorted(NoteJournal(self.path).load()), [1, 2])
+
+    @unittest.skipIf(locking.fcntl is None or 'fork' not in multiprocessing.get_all_start_methods(),
+                     "нужны fcntl и fork")
+    def test_parallel_processes(self):
+        """Процессы, одновременно добавляющие и сжимающие заметки, ничего не теряют."""
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=add_notes, args=(self.path, 25)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        notes = NoteJournal(self.path).load()
+        self.assertEqual(sorted(notes), list(range(-100, 0)))
+        self.assertEqual(len({notes[note_id]['title'] for note_id in notes}), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Тесты для модуля metrics.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.metrics import MetricsRegistry, registry, timed
+from notebook.models import Note
+from notebook.sqlite_storage import SQLiteNoteStorage
+from notebook.storage import NoteStorage
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Тесты для класса MetricsRegistry."""
+
+    def test_disabled_registry_collects_nothing(self):
+        """Выключенный реестр не собирает метрики."""
+        metrics = MetricsRegistry()
+        metrics.inc('notebook_queries_total')
+        with metrics.timer('notebook_query_seconds'):
+            pass
+        self.assertEqual(metrics.snapshot(), {'counters': [], 'timers': []})
+
+    def test_counters_and_timers(self):
+        """Счётчики суммируются по меткам, таймер хранит количество, сумму и максимум."""
+        metrics = MetricsRegistry(enabled=True)
+        metrics.inc('notebook_queries_total', backend='sqlite')
+        metrics.inc('notebook_queries_total', 2, backend='sqlite')
+        metrics.inc('notebook_queries_total', backend='postgres')
+        metrics.observe('notebook_query_seconds', 0.5)
+        metrics.observe('notebook_query_seconds', 1.5)
+
+        snapshot = metrics.snapshot()
+        counters = {counter['labels']['backend']: counter['value'] for counter in snapshot['counters']}
+        self.assertEqual(counters, {'postgres': 1, 'sqlite': 3})
+        self.assertEqual(snapshot['timers'], [
+            {'name': 'notebook_query_seconds', 'labels': {}, 'count': 2, 'sum': 2.0, 'max': 1.5},
+        ])
+
+    def test_prometheus_format(self):
+        """Метрики выводятся в текстовом формате Prometheus."""
+        metrics = MetricsRegistry(enabled=True)
+        metrics.inc('notebook_json_fallbacks_total', operation='search_notes')
+        metrics.observe('notebook_operation_seconds', 0.25, component='storage', operation='get_note')
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE notebook_json_fallbacks_total counter\n', text)
+        self.assertIn('notebook_json_fallbacks_total{operation="search_notes"} 1\n', text)
+        self.assertIn('# TYPE notebook_operation_seconds summary\n', text)
+        self.assertIn(
+            'notebook_operation_seconds_count{component="storage",operation="get_note"} 1\n', text)
+        self.assertIn(
+            'notebook_operation_seconds_sum{component="storage",operation="get_note"} 0.250000\n', text)
+
+    def test_json_and_reset(self):
+        """JSON повторяет snapshot, reset обнуляет метрики."""
+        metrics = MetricsRegistry(enabled=True)
+        metrics.inc('notebook_cache_hits_total', kind='all')
+        self.assertEqual(json.loads(metrics.to_json()), metrics.snapshot())
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {'counters': [], 'timers': []})
+
+    def test_timed_decorator(self):
+        """Декоратор timed замеряет метод только при включённом реестре."""
+        @timed('commands')
+        def add_note():
+            return 42
+
+        registry.reset()
+        self.assertEqual(add_note(), 42)
+        self.assertEqual(registry.snapshot()['timers'], [])
+
+        registry.enable()
+        try:
+            add_note()
+        finally:
+            registry.disable()
+        timer, = registry.snapshot()['timers']
+        self.assertEqual(timer['labels'], {'component': 'commands', 'operation': 'add_note'})
+        self.assertEqual(timer['count'], 1)
+        registry.reset()
+
+
+class TestStorageMetrics(unittest.TestCase):
+    """Тесты метрик хранилища заметок."""
+
+    def setUp(self):
+        """Включает общий реестр метрик."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        registry.reset()
+        registry.enable()
+
+    def tearDown(self):
+        """Выключает реестр и удаляет временную папку."""
+        registry.disable()
+        registry.reset()
+        self.tmpdir.cleanup()
+
+    def counter(self, name, **labels):
+        """Значение счётчика или 0."""
+        for counter in registry.snapshot()['counters']:
+            if counter['name'] == name and counter['labels'] == labels:
+                return counter['value']
+        return 0
+
+    def test_fallback_to_json_is_counted(self):
+        """Ошибка БД учитывается как переход на JSON-хранилище."""
+        db = MagicMock()
+        db.get_connection.return_value.cursor.return_value.execute.side_effect = Exception("нет связи")
+        with patch('sys.stdout', new_callable=io.StringIO):
+            storage = NoteStorage(os.path.join(self.tmpdir.name, 'notes.json'), flush_interval=0, db=db)
+            storage.save_note(Note("Покупки", "Молоко"))
+            storage.search_notes("молоко")
+        storage.close()
+
+        self.assertEqual(self.counter('notebook_json_fallbacks_total', operation='save_note'), 1)
+        self.assertEqual(self.counter('notebook_json_fallbacks_total', operation='search_notes'), 1)
+        self.assertGreater(self.counter('notebook_json_bytes_written_total', file='journal'), 0)
+
+    def test_queries_and_rows_are_counted(self):
+        """Запросы SQLite, полученные строки и время операций попадают в реестр."""
+        with patch('sys.stdout', new_callable=io.StringIO):
+            storage = SQLiteNoteStorage(os.path.join(self.tmpdir.name, 'notes.json'),
+                                        path=os.path.join(self.tmpdir.name, 'notes.db'),
+                                        flush_interval=0)
+        storage.save_many([Note("Покупки", "Молоко"), Note("Работа", "Отчёт")])
+        registry.reset()
+
+        self.assertEqual(len(storage.get_all_notes()), 2)
+        storage.close()
+        storage.db.close_connection()
+
+        self.assertEqual(self.counter('notebook_queries_total', backend='sqlite'), 1)
+        self.assertEqual(self.counter('notebook_rows_fetched_total', operation='get_all_notes'), 2)
+        operations = {timer['labels'].get('operation') for timer in registry.snapshot()['timers']}
+        self.assertIn('get_all_notes', operations)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Тесты для отложенной записи в JSON-хранилище.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.journal import NoteJournal
+from notebook.mirror import JournalMirror
+
+
+def note_data(note_id, title='Заметка'):
+    """Данные заметки для журнала."""
+    return {'id': note_id, 'title': title, 'content': 'Текст',
+            'created_at': '2024-01-01T10:00:00'}
+
+
+class TestJournalMirror(unittest.TestCase):
+    """Тесты для класса JournalMirror."""
+
+    def setUp(self):
+        """Создаёт журнал во временной папке и очередь без автоматической записи."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.journal = NoteJournal(os.path.join(self.tmpdir.name, 'notes.json'))
+        self.mirror = JournalMirror(self.journal, flush_interval=3600)
+
+    def tearDown(self):
+        """Останавливает очередь и удаляет временную папку."""
+        self.mirror.close()
+        self.tmpdir.cleanup()
+
+    def test_changes_are_coalesced(self):
+        """Несколько изменений одной заметки записываются одной записью журнала."""
+        self.journal.commit = MagicMock(wraps=self.journal.commit)
+        self.mirror.put_many([note_data(1, 'Первая версия')])
+        self.mirror.put_many([note_data(1, 'Вторая версия'), note_data(2)])
+        self.mirror.delete_many([2])
+
+        self.assertFalse(os.path.exists(self.journal.journal_path))
+        notes = self.mirror.load()
+
+        self.assertEqual(list(notes), [1])
+        self.assertEqual(notes[1]['title'], 'Вторая версия')
+        self.journal.commit.assert_called_once_with([note_data(1, 'Вторая версия')], [2])
+
+    def test_max_id_includes_pending(self):
+        """Новый ID выдаётся после ID, ещё не записанных в журнал."""
+        self.mirror.put_many([note_data(4)])
+
+        self.assertEqual(self.mirror.max_id(), 4)
+
+    def test_failed_flush_is_requeued(self):
+        """Если запись в журнал не удалась, изменения остаются в очереди, более новые не затираются."""
+        self.mirror.put_many([note_data(1, 'Первая версия'), note_data(2)])
+        commit = self.journal.commit
+
+        def failing_commit(puts, deletes):
+            self.mirror.put_many([note_data(1, 'Вторая версия')])
+            raise OSError("нет места на диске")
+
+        self.journal.commit = failing_commit
+        with self.assertRaises(OSError):
+            self.mirror.flush()
+        self.journal.commit = commit
+
+        notes = self.mirror.load()
+        self.assertEqual(sorted(notes), [1, 2])
+        self.assertEqual(notes[1]['title'], 'Вторая версия')
+
+    def test_delete_existing(self):
+        """Немедленное удаление сообщает, какие заметки были в журнале."""
+        self.mirror.put_many([note_data(1)])
+
+        self.assertEqual(self.mirror.delete_existing([1, 2]), [1])
+        self.assertEqual(self.mirror.load(), {})
+
+    def test_close_flushes(self):
+        """При закрытии очередь записывается в журнал."""
+        self.mirror.put_many([note_data(1)])
+        self.mirror.close()
+
+        self.assertEqual(list(NoteJournal(self.journal.snapshot_path).load()), [1])
+
+    def test_background_flush(self):
+        """Фоновый поток записывает очередь через flush_interval."""
+        mirror = JournalMirror(self.journal, flush_interval=0.01)
+        mirror.put_many([note_data(1)])
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.journal.journal_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        mirror.close()
+
+        self.assertTrue(os.path.exists(self.journal.journal_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 # tests/test_models.py
 import unittest
+from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -27,5 +28,32 @@ class TestNote(unittest.TestCase):
         self.assertEqual(note.id, 1)
         self.assertEqual(note.title, 'Тест')
 
+    def test_note_uses_slots(self):
+        note = Note("Заголовок", "Текст")
+        self.assertFalse(hasattr(note, '__dict__'))
+        with self.assertRaises(AttributeError):
+            note.tags = []
+    
+    def test_from_db_row_keeps_datetime(self):
+        created = datetime(2024, 1, 1, 10, 0)
+        note = Note.from_db_row((1, 'Тест', 'Текст', created))
+        self.assertIs(note.created_datetime, created)
+        self.assertEqual(note.created_at, '2024-01-01T10:00:00')
+    
+    def test_created_at_parsed_once(self):
+        note = Note.from_dict({'id': 1, 'title': 'Тест', 'content': 'Текст',
+                               'created_at': '2024-01-01T10:00:00'})
+        first = note.created_datetime
+        self.assertEqual(first, datetime(2024, 1, 1, 10, 0))
+        self.assertIs(note.created_datetime, first)
+    
+    def test_copy(self):
+        note = Note("Заголовок", "Текст", id=1, created_at=datetime(2024, 1, 1, 10, 0))
+        copy = note.copy()
+        copy.title = "Другой"
+        self.assertIsNot(copy, note)
+        self.assertEqual(note.title, "Заголовок")
+        self.assertEqual(copy.to_dict(), dict(note.to_dict(), title="Другой"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
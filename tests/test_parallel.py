@@ -0,0 +1,131 @@
+"""
+Тесты для параллельного построения индексов JSON-хранилища.
+"""
+
+import io
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import database
+from notebook.database import Database
+from notebook.dates import DateIndex
+from notebook.journal import NoteJournal
+from notebook.parallel import build_indexes, shard_bounds
+from notebook.records import RecordReader, write_records
+from notebook.search import SearchIndex
+from notebook.storage import NoteStorage
+from tests.helpers import TempDirTestCase, make_note
+
+WORDS = ['молоко', 'хлеб', 'отчёт', 'проект', 'кофе', 'python']
+
+
+def varied_note(note_id):
+    """Заметка с разными словами; даты идут не по порядку ID."""
+    return make_note(note_id, WORDS[note_id % len(WORDS)],
+                     f"{WORDS[note_id * 7 % len(WORDS)]} {WORDS[note_id * 3 % len(WORDS)]}",
+                     f"2024-{note_id * 5 % 12 + 1:02d}-{note_id % 28 + 1:02d}T10:00:00")
+
+
+class TestParallel(TempDirTestCase):
+    """Тесты для shard_bounds и build_indexes."""
+
+    def setUp(self):
+        """Создаёт файл записей из нескольких десятков заметок."""
+        super().setUp()
+        path = self.path + '.records'
+        write_records(path, (varied_note(note_id) for note_id in range(1, 61)), (0, 0))
+        self.records = RecordReader(path)
+
+    def _indexes(self):
+        return [SearchIndex(os.path.join(self.tmpdir.name, 'index')),
+                DateIndex(os.path.join(self.tmpdir.name, 'dates'))]
+
+    def test_shard_bounds(self):
+        """Части покрывают все позиции без пропусков и пустых частей."""
+        self.assertEqual(shard_bounds(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(shard_bounds(2, 8), [(0, 1), (1, 2)])
+        self.assertEqual(shard_bounds(0, 4), [])
+
+    def test_parallel_matches_sequential(self):
+        """Индексы, построенные по частям в нескольких процессах, совпадают с построенными подряд."""
+        sequential, parallel = self._indexes(), self._indexes()
+        build_indexes(self.records, sequential, workers=1)
+        build_indexes(self.records, parallel, workers=2, min_records=0)
+
+        for word in WORDS + ['мол', 'про']:
+            with self.subTest(word=word):
+                self.assertEqual(parallel[0].search(word), sequential[0].search(word))
+        self.assertEqual(parallel[1].range(), sequential[1].range())
+        self.assertEqual(parallel[1].range('2024-03-01', '2024-05-01'),
+                         sequential[1].range('2024-03-01', '2024-05-01'))
+        self.assertEqual(parallel[1].created_at(7), varied_note(7)['created_at'])
+
+    def test_pool_does_not_fork(self):
+        """Процессы пула не наследуют блокировки, захваченные другими потоками."""
+        with patch('notebook.parallel.ProcessPoolExecutor', side_effect=OSError("нет процессов")) as pool, \
+                patch('sys.stdout', new_callable=io.StringIO):
+            build_indexes(self.records, self._indexes(), workers=2, min_records=0)
+
+        self.assertIn(pool.call_args.kwargs['mp_context'].get_start_method(), ('forkserver', 'spawn'))
+
+    def test_falls_back_when_pool_unavailable(self):
+        """Если пул процессов не запускается, индексы строятся в одном процессе."""
+        indexes = self._indexes()
+        with patch('notebook.parallel.ProcessPoolExecutor', side_effect=OSError("нет процессов")), \
+                patch('sys.stdout', new_callable=io.StringIO) as output:
+            build_indexes(self.records, indexes, workers=2, min_records=0)
+
+        self.assertIn("в одном процессе", output.getvalue())
+        self.assertEqual(len(indexes[1].range()), 60)
+
+
+class TestUnreachableDatabase(TempDirTestCase):
+    """Запросы без базы данных идут по индексам, построенным параллельно."""
+
+    def setUp(self):
+        """Создаёт снимок JSON-хранилища без файлов индексов."""
+        super().setUp()
+        database._pools.clear()
+        database._schema_ready.clear()
+        journal = NoteJournal(self.path)
+        for note_id in range(1, 61):
+            journal.put(varied_note(note_id))
+        journal.compact()
+        for name in os.listdir(self.tmpdir.name):
+            if name.endswith(('.index', '.dates', '.stats', '.changes')):
+                os.remove(os.path.join(self.tmpdir.name, name))
+
+    def tearDown(self):
+        """Сбрасывает общие пулы."""
+        database._pools.clear()
+        database._schema_ready.clear()
+        super().tearDown()
+
+    def test_queries_use_parallel_indexes(self):
+        """Сервер на порту 1 не отвечает: поиск и фильтр даты берутся из JSON-индексов."""
+        db = Database(host='127.0.0.1', port=1, dbname='notes_db', connect_timeout=1)
+        storage = NoteStorage(self.path, flush_interval=0, db=db)
+        parallel = patch('notebook.journal.build_indexes',
+                         side_effect=lambda records, indexes: build_indexes(records, indexes,
+                                                                            workers=2, min_records=0))
+        with parallel as mock_build, patch('sys.stdout', new_callable=io.StringIO) as output:
+            found = storage.search_notes('молоко')
+            dated = storage.get_all_notes('2024-03')
+        storage.close()
+
+        mock_build.assert_called_once()
+        self.assertIn("Ошибка при получении заметок из БД", output.getvalue())
+        self.assertEqual(sorted(note.id for note in found),
+                         sorted(note_id for note_id in range(1, 61) if 'молоко' in
+                                (varied_note(note_id)['title'] + ' ' + varied_note(note_id)['content'])))
+        self.assertEqual(sorted(note.id for note in dated),
+                         [note_id for note_id in range(1, 61)
+                          if varied_note(note_id)['created_at'].startswith('2024-03')])
+
+
+if __name__ == '__main__':
+    unittest.main()
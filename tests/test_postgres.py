@@ -0,0 +1,380 @@
+"""
+Интеграционные тесты с настоящим сервером PostgreSQL.
+
+Запускаются, только если задана переменная окружения NOTES_TEST_DSN
+(строка подключения libpq, например "host=127.0.0.1 port=5432
+user=postgres dbname=postgres"). Каждый тест создаёт отдельную базу
+данных и удаляет её после себя; базу из .env тесты не трогают.
+"""
+
+import os
+import sys
+import unittest
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import database, transfer
+from notebook.database import Database, add_months, partition_name
+from notebook.models import Note
+from notebook.storage import NoteStorage
+from tests.helpers import QUERY_CASES, TempDirTestCase, local_timezone, query_notes
+
+TEST_DSN = os.getenv('NOTES_TEST_DSN')
+
+# Таблица notes в том виде, в каком её создавала первая версия программы
+BASELINE_NOTES = '''
+    CREATE TABLE IF NOT EXISTS notes (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+@unittest.skipUnless(TEST_DSN, "сервер PostgreSQL не задан (NOTES_TEST_DSN)")
+class PostgresTestCase(TempDirTestCase):
+    """Тест с пустой временной базой данных на сервере NOTES_TEST_DSN."""
+
+    def setUp(self):
+        """Создаёт временную базу данных."""
+        super().setUp()
+        self.admin_params = parse_dsn(TEST_DSN)
+        self.dbname = f"notes_test_{os.getpid()}"
+        self._admin(f"DROP DATABASE IF EXISTS {self.dbname}")
+        self._admin(f"CREATE DATABASE {self.dbname}")
+        self.params = {**self.admin_params, 'dbname': self.dbname}
+        database._pools.clear()
+        database._schema_ready.clear()
+        self.connections = []
+        # Ошибка запроса не должна скрываться переходом на JSON-хранилище
+        fallback = patch.object(NoteStorage, '_rollback',
+                                side_effect=AssertionError("запрос к базе данных не выполнен"))
+        fallback.start()
+        self.addCleanup(fallback.stop)
+
+    def tearDown(self):
+        """Закрывает подключения и удаляет временную базу данных."""
+        for conn in self.connections:
+            conn.close()
+        for pool in database._pools.values():
+            pool.closeall()
+        database._pools.clear()
+        database._schema_ready.clear()
+        self._admin(f"DROP DATABASE IF EXISTS {self.dbname}")
+        super().tearDown()
+
+    def _admin(self, sql):
+        conn = psycopg2.connect(**self.admin_params)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql)
+        finally:
+            conn.close()
+
+    def connect(self, autocommit=False):
+        """Отдельное подключение к временной базе данных."""
+        conn = psycopg2.connect(**self.params)
+        conn.autocommit = autocommit
+        self.connections.append(conn)
+        return conn
+
+    def fetch(self, sql, params=None):
+        """Выполняет запрос в отдельном подключении и возвращает все строки."""
+        with self.connect(autocommit=True).cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def storage(self):
+        """Хранилище заметок на временной базе данных."""
+        with patch('sys.stdout'):
+            storage = NoteStorage(self.path, flush_interval=0, db=Database(**self.params))
+            storage.db.get_connection()
+            storage.db.release_connection()
+        self.addCleanup(storage.close)
+        return storage
+
+
+class TestPartitionMigration(PostgresTestCase):
+    """Перевод таблицы notes на секции и обслуживание секций."""
+
+    def test_baseline_table_is_migrated(self):
+        """Таблица первой версии переносится в секции с теми же ID и последовательностью."""
+        conn = self.connect()
+        with conn.cursor() as cursor:
+            cursor.execute(BASELINE_NOTES)
+            cursor.execute(
+                "INSERT INTO notes (title, content, created_at) VALUES "
+                "('Январь', 'a', '2024-01-05 10:00+00'), ('Февраль', 'b', '2024-02-10 10:00+00'), "
+                "('Удалена', 'c', '2024-02-11 10:00+00'), ('Без даты', 'd', NULL)"
+            )
+            cursor.execute("DELETE FROM notes WHERE title = 'Удалена'")
+        conn.commit()
+
+        storage = self.storage()
+
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        self.assertEqual(self.fetch("SELECT relkind FROM pg_class WHERE relname = 'notes'"), [('p',)])
+        self.assertEqual(self.fetch("SELECT to_regclass('notes_unpartitioned')"), [(None,)])
+        self.assertEqual(
+            self.fetch("SELECT id, title, tableoid::regclass::text FROM notes ORDER BY id"),
+            [(1, 'Январь', 'notes_p2024_01'), (2, 'Февраль', 'notes_p2024_02'),
+             (4, 'Без даты', partition_name(this_month))]
+        )
+        self.assertEqual(self.fetch("SELECT pg_get_serial_sequence('notes', 'id')"),
+                         [('public.notes_id_seq',)])
+        with patch('sys.stdout'):
+            self.assertEqual(storage.save_note(Note("Новая", "Текст")).id, 5)
+        self.assertEqual(storage.note_stats().total, 4)
+
+    def test_default_partition_is_split_without_triggers(self):
+        """Строки из notes_default переносятся в свою секцию без триггеров статистики и ленты."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            note = storage.save_note(Note("Старая", "Текст", created_at='2019-05-03T10:00:00+00:00'))
+        self.assertEqual(self.fetch("SELECT tableoid::regclass::text FROM notes WHERE id = %s",
+                                    (note.id,)), [('notes_default',)])
+        before = self.fetch("SELECT id, change_seq, change_xid::text, updated_at FROM notes")
+        stats = storage.note_stats().days
+        last_seq = storage.changes_since().last_seq
+        listener = storage.db.listen('notes_changed')
+        self.connections.append(listener)
+
+        with patch('sys.stdout'):
+            storage.db.maintain_partitions()
+
+        self.assertEqual(self.fetch("SELECT tableoid::regclass::text FROM notes WHERE id = %s",
+                                    (note.id,)), [('notes_p2019_05',)])
+        self.assertEqual(self.fetch("SELECT count(*) FROM notes_default"), [(0,)])
+        self.assertEqual(self.fetch("SELECT id, change_seq, change_xid::text, updated_at FROM notes"),
+                         before)
+        self.assertEqual(storage.note_stats().days, stats)
+        self.assertEqual(self.fetch("SELECT count(*) FROM notes_tombstones"), [(0,)])
+        self.assertEqual(storage.changes_since(last_seq).changes, [])
+        listener.poll()
+        self.assertEqual(listener.notifies, [])
+        self.assertEqual(
+            self.fetch("SELECT partition_bound FROM (SELECT pg_get_expr(c.relpartbound, c.oid) "
+                       "AS partition_bound FROM pg_class c WHERE c.relname = 'notes_default') b"),
+            [('DEFAULT',)]
+        )
+
+    def test_old_partitions_are_archived(self):
+        """Секции старше срока хранения переносятся в схему notes_archive вместе со строками."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            old = storage.save_note(Note("Старая", "Текст", created_at='2019-05-03T10:00:00+00:00'))
+            storage.save_note(Note("Новая", "Текст"))
+            storage.db.maintain_partitions()
+            with patch.dict(os.environ, {'NOTES_PARTITION_RETENTION_MONTHS': '12'}):
+                storage.db.maintain_partitions()
+
+        self.assertEqual(self.fetch("SELECT id FROM notes_archive.notes_p2019_05"), [(old.id,)])
+        self.assertEqual(self.fetch("SELECT count(*) FROM notes WHERE id = %s", (old.id,)), [(0,)])
+        self.assertEqual(self.fetch("SELECT count(*) FROM notes_stats WHERE bucket < '2020-01-01'"),
+                         [(0,)])
+        self.assertEqual(storage.note_stats().total, 1)
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        self.assertEqual(
+            self.fetch("SELECT count(*) FROM pg_inherits WHERE inhparent = 'notes'::regclass"),
+            [(database.PARTITION_MONTHS_AHEAD + 2,)]  # секции наперёд и notes_default
+        )
+        self.assertIn((partition_name(add_months(this_month, 1)),),
+                      self.fetch("SELECT c.relname::text FROM pg_inherits i JOIN pg_class c "
+                                 "ON c.oid = i.inhrelid WHERE i.inhparent = 'notes'::regclass"))
+        self.assertLess(date(2019, 5, 1), this_month)
+
+
+class TestNoteStats(PostgresTestCase):
+    """Счётчики статистики notes_stats."""
+
+    def test_writers_of_one_day_do_not_wait(self):
+        """Заметки одного дня из разных транзакций не ждут друг друга на счётчиках."""
+        storage = self.storage()
+        first, second = self.connect(), self.connect()
+        for conn in (first, second):
+            with conn.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '2s'")
+                cursor.execute("INSERT INTO notes (title, content, created_at) "
+                               "VALUES ('Заметка', 'Текст', '2024-03-01 10:00+00')")
+        second.commit()
+        first.commit()
+
+        with local_timezone('UTC'):
+            self.assertEqual(storage.note_stats().days, {'2024-03-01': (2, 20)})
+
+    def test_changes_are_summed_and_compacted(self):
+        """Изменение и удаление вычитают счётчики, обслуживание секций складывает строки."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            kept = storage.save_note(Note("Первая", "Текст", created_at='2024-03-01T20:00:00+00:00'))
+            deleted = storage.save_note(Note("Вторая", "Текст", created_at='2024-03-01T20:05:00+00:00'))
+            self.fetch("UPDATE notes SET content = 'Текст!' WHERE id = %s RETURNING id", (kept.id,))
+            storage.delete_note(deleted.id)
+            storage.db.maintain_partitions()
+
+        self.assertEqual(self.fetch("SELECT notes, content_bytes FROM notes_stats"), [(1, 11)])
+        with local_timezone('Asia/Kolkata'):
+            self.assertEqual(storage.note_stats().days, {'2024-03-02': (1, 11)})
+
+    def test_date_filter_uses_stats_day(self):
+        """Фильтр --date и статистика относят заметку к одному местному дню."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            note = storage.save_note(Note("Вечер", "Текст", created_at='2024-03-01T20:00:00+00:00'))
+        with local_timezone('Asia/Kolkata'):
+            self.assertEqual([n.id for n in storage.get_all_notes('2024-03-02')], [note.id])
+            self.assertEqual(storage.get_all_notes('2024-03-01'), [])
+            self.assertEqual(list(storage.note_stats().days), ['2024-03-02'])
+
+
+class TestChangeFeed(PostgresTestCase):
+    """Лента изменений по ID транзакций (change_xid)."""
+
+    def test_changes_and_tombstones(self):
+        """Добавление, изменение и удаление выдаются по возрастанию номера."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            first = storage.save_note(Note("Первая", "Текст"))
+            second = storage.save_note(Note("Вторая", "Текст"))
+            start = storage.changes_since()
+            self.fetch("UPDATE notes SET content = 'Новый текст' WHERE id = %s RETURNING id", (first.id,))
+            storage.delete_note(second.id)
+            changes = storage.changes_since(start.last_seq)
+
+        self.assertEqual([change.note_id for change in start.changes], [first.id, second.id])
+        self.assertEqual([(change.note_id, change.note is None) for change in changes.changes],
+                         [(first.id, False), (second.id, True)])
+        self.assertEqual(changes.changes[0].note.content, "Новый текст")
+        self.assertGreater(changes.changes[0].seq, start.last_seq)
+        self.assertLess(changes.changes[0].seq, changes.changes[1].seq)
+        with patch('sys.stdout'):
+            self.assertEqual(storage.changes_since(changes.last_seq).changes, [])
+
+    def test_limit_keeps_transaction_together(self):
+        """Изменения одной транзакции выдаются вместе, даже если их больше limit."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            storage.import_batch([Note(f"Заметка {i}", "Текст") for i in range(3)])
+            storage.save_note(Note("Отдельная", "Текст"))
+            first = storage.changes_since(limit=1)
+            rest = storage.changes_since(first.last_seq, limit=1)
+
+        self.assertEqual(len(first.changes), 3)
+        self.assertEqual(len({change.seq for change in first.changes}), 1)
+        self.assertEqual([change.note.title for change in rest.changes], ["Отдельная"])
+
+    def test_open_transaction_holds_feed_back(self):
+        """Незавершённая транзакция с меньшим ID задерживает более поздние изменения."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            storage.save_note(Note("Первая", "Текст"))
+        start = storage.changes_since()
+
+        writer = self.connect()
+        with writer.cursor() as cursor:
+            cursor.execute("INSERT INTO notes (title, content) VALUES ('Медленная', 'Текст')")
+        with patch('sys.stdout'):
+            storage.save_note(Note("Быстрая", "Текст"))
+            self.assertEqual(storage.changes_since(start.last_seq).changes, [])
+        writer.commit()
+
+        with patch('sys.stdout'):
+            changes = storage.changes_since(start.last_seq)
+        self.assertEqual([change.note.title for change in changes.changes], ["Медленная", "Быстрая"])
+
+    def test_transaction_in_other_database_holds_feed_back(self):
+        """Горизонт ленты общий для кластера: его держит и транзакция в другой базе."""
+        storage = self.storage()
+        start = storage.changes_since()
+        other = psycopg2.connect(**self.admin_params)
+        self.connections.append(other)
+        with other.cursor() as cursor:
+            cursor.execute("SELECT pg_current_xact_id()")
+        with patch('sys.stdout'):
+            storage.save_note(Note("Заметка", "Текст"))
+            self.assertEqual(storage.changes_since(start.last_seq).changes, [])
+        other.rollback()
+        with patch('sys.stdout'):
+            self.assertEqual(len(storage.changes_since(start.last_seq).changes), 1)
+
+    def test_writers_do_not_wait_for_each_other(self):
+        """Запись заметки не ждёт незавершённую транзакцию другого процесса."""
+        self.storage()
+        first, second = self.connect(), self.connect()
+        with first.cursor() as cursor:
+            cursor.execute("INSERT INTO notes (title, content) VALUES ('Первая', 'Текст')")
+        with second.cursor() as cursor:
+            cursor.execute("SET lock_timeout = '2s'")
+            cursor.execute("INSERT INTO notes (title, content) VALUES ('Вторая', 'Текст')")
+            cursor.execute("UPDATE notes SET content = 'Новый' WHERE title = 'Вторая'")
+        second.commit()
+        first.commit()
+        self.assertEqual(self.fetch("SELECT count(*) FROM notes"), [(2,)])
+
+
+class TestImportKeepIds(PostgresTestCase):
+    """Импорт с сохранением ID на настоящем сервере."""
+
+    def test_reimport_of_export_adds_nothing(self):
+        """Повторный импорт выгрузки с keep_ids не создаёт дубликатов."""
+        storage = self.storage()
+        export_path = os.path.join(self.tmpdir.name, 'backup.csv')
+        with patch('sys.stdout'):
+            storage.import_batch([Note(f"Заметка {i}", "Текст") for i in range(3)])
+            self.assertIsNone(transfer.export_notes(storage, export_path))
+            count = transfer.import_notes(storage, export_path, keep_ids=True)
+            duplicates = transfer.import_notes(storage, export_path)
+
+        self.assertEqual(count, 0)
+        self.assertEqual(duplicates, 3)
+        self.assertEqual(self.fetch("SELECT count(*), count(DISTINCT id) FROM notes"), [(6, 6)])
+
+    def test_ids_kept_and_sequence_moved(self):
+        """ID из файла сохраняются, повтор ID с другой датой пропускается, новые ID идут дальше."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            first = storage.save_note(Note("Своя", "Текст"))
+            saved = storage.import_batch([
+                Note("Повтор", "Текст", id=first.id, created_at='2020-01-01T10:00:00+00:00'),
+                Note("Из выгрузки", "Текст", id=100, created_at='2024-01-01T10:00:00+00:00'),
+                Note("Без ID", "Текст", created_at='2024-01-02T10:00:00+00:00'),
+            ], keep_ids=True)
+            new_note = storage.save_note(Note("Новая", "Текст"))
+
+        self.assertEqual([note.title for note in saved], ["Из выгрузки", "Без ID"])
+        self.assertEqual(saved[0].id, 100)
+        self.assertEqual(self.fetch("SELECT title FROM notes WHERE id = %s", (first.id,)), [("Своя",)])
+        self.assertGreater(new_note.id, 100)
+        self.assertIn(100, storage.mirror.load())
+
+
+class TestSearchSemantics(PostgresTestCase):
+    """Запросы в PostgreSQL дают те же заметки, что в SQLite и JSON-хранилище."""
+
+    def test_queries_match_other_backends(self):
+        """Общие запросы (см. test_query.TestStorageQuery); слова ищутся по началу, не подстрокой."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            storage.save_many(query_notes())
+            for query, expected in QUERY_CASES:
+                with self.subTest(query=query):
+                    self.assertEqual([note.id for note in storage.query(query)], expected)
+                    self.assertEqual([note.id for note in storage._query_json(query)], expected)
+
+    def test_morphology(self):
+        """PostgreSQL дополнительно находит другие формы слова."""
+        storage = self.storage()
+        with patch('sys.stdout'):
+            note = storage.save_note(Note("Покупки", "Нет молока"))
+            self.assertEqual([n.id for n in storage.search_notes("молоко")], [note.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Тесты для модуля query.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.query import NoteQuery, SQLitePlanner, SQLPlanner
+from notebook.sqlite_storage import SQLiteNoteStorage
+from tests.helpers import QUERY_CASES, query_notes
+
+
+class TestNoteQuery(unittest.TestCase):
+    """Тесты для NoteQuery и планировщиков SQL."""
+
+    def test_builders_return_new_query(self):
+        """Методы-построители не меняют исходный запрос."""
+        base = NoteQuery().match("молоко")
+        paged = base.dated("2024-01").page(limit=10, offset=20)
+
+        self.assertIsNone(base.start)
+        self.assertEqual(paged.text, "молоко")
+        self.assertEqual((paged.start, paged.end), (datetime(2024, 1, 1), datetime(2024, 2, 1)))
+        self.assertEqual((paged.limit, paged.offset), (10, 20))
+        self.assertEqual(paged, NoteQuery("молоко", paged.start, paged.end, limit=10, offset=20))
+
+    def test_validation(self):
+        """Неизвестный порядок, фильтр даты и отрицательная страница - ошибки."""
+        with self.assertRaises(ValueError):
+            NoteQuery(order='random')
+        with self.assertRaises(ValueError):
+            NoteQuery().dated('вчера')
+        with self.assertRaises(ValueError):
+            NoteQuery().page(limit=-1)
+
+    def test_default_order_and_empty_queries(self):
+        """По умолчанию поиск упорядочен по релевантности; пустые запросы распознаются."""
+        self.assertEqual(NoteQuery().effective_order, 'newest')
+        self.assertEqual(NoteQuery(text="молоко").effective_order, 'relevance')
+        self.assertTrue(NoteQuery(text="!!!").matches_nothing)
+        self.assertTrue(NoteQuery().ids(5, 1).matches_nothing)
+        self.assertFalse(NoteQuery(text="молоко").matches_nothing)
+
+    def test_postgres_plan(self):
+        """Текст, даты, ID и страница собираются в один запрос."""
+        query = NoteQuery(text="молоко").dated("2024").ids(min_id=10).page(limit=5, offset=10)
+
+        sql, params = SQLPlanner().plan(query)
+
+        self.assertEqual(
+            sql,
+            "SELECT id, title, content, created_at FROM notes, "
+            "(SELECT to_tsquery('russian', %s) || to_tsquery('english', %s)) AS q (query) "
+            "WHERE search_vector @@ query AND created_at >= %s AND created_at < %s AND id >= %s "
+            "ORDER BY ts_rank(search_vector, query) DESC, created_at DESC LIMIT %s OFFSET %s"
+        )
+        self.assertEqual(params, ['молоко:*', 'молоко:*',
+                                  datetime(2024, 1, 1).astimezone(), datetime(2025, 1, 1).astimezone(),
+                                  10, 5, 10])
+
+    def test_sqlite_plan(self):
+        """SQLite ищет через FTS5, а OFFSET без LIMIT дополняется LIMIT -1."""
+        sql, params = SQLitePlanner().plan(NoteQuery(text="моло хлеб", order='oldest', offset=3))
+
+        self.assertIn("FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid", sql)
+        self.assertIn("WHERE notes_fts MATCH %s", sql)
+        self.assertTrue(sql.endswith("ORDER BY notes.created_at, notes.id LIMIT -1 OFFSET %s"))
+        self.assertEqual(params, ['"моло"* "хлеб"*', 3])
+
+
+class TestStorageQuery(unittest.TestCase):
+    """Тесты выполнения запросов в SQLite и по индексам JSON-хранилища."""
+
+    def setUp(self):
+        """Создаёт хранилище SQLite с несколькими заметками."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.storage = SQLiteNoteStorage(os.path.join(self.tmpdir.name, 'notes.json'),
+                                             path=os.path.join(self.tmpdir.name, 'notes.db'),
+                                             flush_interval=0)
+        self.storage.save_many(query_notes())
+        self.queries, self.expected = zip(*QUERY_CASES)
+
+    def tearDown(self):
+        """Закрывает хранилище и удаляет временную папку."""
+        self.storage.close()
+        self.storage.db.close_connection()
+        self.tmpdir.cleanup()
+
+    def test_sqlite_queries(self):
+        """Запросы выполняются в SQLite."""
+        for query, expected in zip(self.queries, self.expected):
+            with self.subTest(query=query):
+                self.assertEqual([note.id for note in self.storage.query(query)], expected)
+
+    def test_json_queries(self):
+        """Те же запросы по индексам JSON-хранилища дают тот же результат.
+
+        Те же запросы к PostgreSQL - в test_postgres.TestSearchSemantics.
+        """
+        for query, expected in zip(self.queries, self.expected):
+            with self.subTest(query=query):
+                self.assertEqual([note.id for note in self.storage._query_json(query)], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Тесты для файла записей JSON-хранилища.
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.journal import NoteJournal
+from notebook.records import RecordReader, write_records
+from tests.helpers import TempDirTestCase, make_note
+
+
+
+class TestRecords(TempDirTestCase):
+    """Тесты для write_records, RecordReader и чтения снимка журналом."""
+
+    def test_lookup_by_id(self):
+        """Записи находятся по ID, перебираются по возрастанию ID."""
+        records_path = self.path + '.records'
+        write_records(records_path, (make_note(i, f"Заметка {i}") for i in (5, 2, 9)), (10, 20))
+
+        reader = RecordReader(records_path)
+
+        self.assertEqual(reader.stamp, (10, 20))
+        self.assertEqual((len(reader), reader.max_id), (3, 9))
+        self.assertEqual(reader.get(2)['title'], "Заметка 2")
+        self.assertIsNone(reader.get(3))
+        self.assertNotIn(4, reader)
+        self.assertEqual(list(reader.ids()), [2, 5, 9])
+        self.assertEqual([note['id'] for note in reader], [2, 5, 9])
+
+    def test_corrupted_file(self):
+        """Обрезанный файл не принимается."""
+        records_path = self.path + '.records'
+        write_records(records_path, [make_note(1)], (0, 0))
+        with open(records_path, 'r+b') as f:
+            f.truncate(os.path.getsize(records_path) - 1)
+
+        with self.assertRaises(ValueError):
+            RecordReader(records_path)
+
+    def test_journal_reads_snapshot_lazily(self):
+        """После сжатия журнал держит в памяти только новые изменения."""
+        journal = NoteJournal(self.path)
+        journal.put_many([make_note(1), make_note(2), make_note(3)])
+        journal.compact()
+        journal.put(make_note(2, 'Изменена'))
+        journal.delete(3)
+
+        self.assertEqual(list(journal._notes), [2])
+        notes = journal.load()
+        self.assertEqual((len(notes), list(notes)), (2, [1, 2]))
+        self.assertEqual(notes[2]['title'], 'Изменена')
+        self.assertNotIn(3, notes)
+
+        # Новый процесс не разбирает notes.json целиком
+        with patch.object(NoteJournal, '_read_snapshot',
+                          side_effect=AssertionError("полное чтение снимка")):
+            reopened = NoteJournal(self.path)
+            self.assertEqual(reopened.load()[1]['title'], 'Заметка')
+            self.assertEqual(reopened.max_id(), 3)
+
+    def test_stale_records_are_rebuilt(self):
+        """Если notes.json заменён, файл записей строится заново."""
+        journal = NoteJournal(self.path)
+        journal.put(make_note(1))
+        journal.compact()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([make_note(7, 'Из резервной копии')], f)
+
+        notes = NoteJournal(self.path).load()
+
+        self.assertEqual(list(notes), [7])
+        self.assertEqual(notes[7]['title'], 'Из резервной копии')
+
+
+if __name__ == '__main__':
+    unittest.main()
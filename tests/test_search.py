@@ -0,0 +1,64 @@
+"""
+Тесты для модуля полнотекстового поиска.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.journal import NoteJournal
+from notebook.search import SearchIndex, build_tsquery
+from tests.helpers import TempDirTestCase, make_note
+
+
+
+class TestSearch(TempDirTestCase):
+    """Тесты для SearchIndex и build_tsquery."""
+
+    def setUp(self):
+        """Создаёт индекс с несколькими заметками."""
+        super().setUp()
+        self.index = SearchIndex(self.path + '.index')
+        self.index.add(make_note(1, 'Python программирование', 'Изучаем Python'))
+        self.index.add(make_note(2, 'Покупки', 'Купить молоко'))
+        self.index.add(make_note(3, 'Заметки о PostgreSQL', 'Индексы в Python'))
+
+    def test_build_tsquery(self):
+        """Слова запроса становятся префиксами, спецсимволы отбрасываются."""
+        self.assertEqual(build_tsquery("Заметки & 'PostgreSQL'!"), 'заметки:* & postgresql:*')
+        self.assertEqual(build_tsquery('!!!'), '')
+
+    def test_ranked_prefix_search(self):
+        """Поиск по префиксу, более релевантные заметки выше."""
+        self.assertEqual([note_id for note_id, _ in self.index.search('pyth')], [1, 3])
+        self.assertEqual([note_id for note_id, _ in self.index.search('python индекс')], [3])
+        self.assertEqual(self.index.search('java'), [])
+
+    def test_update_and_remove(self):
+        """Обновление и удаление заметки меняют результаты поиска."""
+        self.index.add(make_note(2, 'Покупки', 'Купить Python-книгу'))
+        self.assertIn(2, dict(self.index.search('python')))
+
+        self.index.remove(2)
+        self.assertEqual(self.index.search('купить'), [])
+
+    def test_index_persisted_with_snapshot(self):
+        """Индекс сохраняется при сжатии журнала и загружается без перестроения."""
+        path = self.path
+        index = SearchIndex(path + '.index')
+        journal = NoteJournal(path, indexes=[index])
+        journal.put(make_note(1, 'Первая', 'Текст'))
+        journal.compact()
+        journal.put(make_note(2, 'Вторая', 'Текст'))
+
+        restored = SearchIndex(path + '.index')
+        NoteJournal(path, indexes=[restored]).load()
+
+        self.assertEqual(sorted(dict(restored.search('текст'))), [1, 2])
+        self.assertFalse([name for name in os.listdir(self.tmpdir.name) if name.endswith('.tmp')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+"""
+Тесты для хранилища заметок в SQLite.
+"""
+
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.backends import create_storage
+from notebook.cache import CachedNoteStorage
+from notebook.models import Note
+from notebook.sqlite_storage import SQLiteNoteStorage
+from notebook.storage import page_cursor
+from tests.helpers import local_timezone
+
+
+class TestSQLiteNoteStorage(unittest.TestCase):
+    """Тесты для класса SQLiteNoteStorage на временном файле базы данных."""
+
+    def setUp(self):
+        """Создаёт хранилище во временной папке."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with patch('sys.stdout', new_callable=io.StringIO):
+            self.storage = SQLiteNoteStorage(self.path('notes.json'), path=self.path('notes.db'),
+                                             flush_interval=0)
+        self.storage.save_many([
+            Note("Покупки", "Молоко и хлеб", created_at='2024-01-01T10:00:00'),
+            Note("Работа", "Отчёт по проекту", created_at='2024-01-02T10:00:00'),
+            Note("Проект", "Молоко для кофе", created_at='2024-02-01T10:00:00'),
+        ])
+
+    def tearDown(self):
+        """Закрывает хранилище и удаляет временную папку."""
+        self.storage.close()
+        self.storage.db.close_connection()
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        """Путь к файлу во временной папке."""
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_wal_mode(self):
+        """База данных работает в режиме WAL."""
+        cursor = self.storage.db.get_connection().cursor()
+        cursor.execute("PRAGMA journal_mode")
+        self.assertEqual(cursor.fetchone()[0], 'wal')
+
+    def test_get_all_notes_with_date_filter(self):
+        """Фильтр по дате и сортировка от новых к старым."""
+        self.assertEqual([note.id for note in self.storage.get_all_notes()], [3, 2, 1])
+        self.assertEqual([note.id for note in self.storage.get_all_notes('2024-01')], [2, 1])
+
+    def test_iter_notes_pages(self):
+        """Постраничный вывод продолжается после курсора."""
+        first_page = list(self.storage.iter_notes(limit=2))
+        second_page = list(self.storage.iter_notes(limit=2, after=page_cursor(first_page[-1])))
+
+        self.assertEqual([note.id for note in first_page], [3, 2])
+        self.assertEqual([note.id for note in second_page], [1])
+
+    def test_search_fts(self):
+        """Поиск по началу слова, с фильтром даты, заголовок важнее текста."""
+        self.assertEqual({note.id for note in self.storage.search_notes("моло")}, {1, 3})
+        self.assertEqual([note.id for note in self.storage.search_notes("моло", "2024-02")], [3])
+        self.assertEqual([note.id for note in self.storage.search_notes("проект")], [3, 2])
+
+    def test_update_and_delete(self):
+        """Изменения попадают в индекс поиска и в JSON-хранилище."""
+        note = self.storage.get_note(1)
+        note.title = "Магазин"
+        self.storage.save_note(note)
+
+        self.assertEqual([n.id for n in self.storage.search_notes("магазин")], [1])
+        self.assertEqual(self.storage.delete_many([1, 5]), [1])
+        self.assertTrue(self.storage.delete_note(2))
+        self.assertEqual(self.storage.search_notes("магазин"), [])
+        self.assertEqual(list(self.storage.mirror.load()), [3])
+
+    def test_note_stats(self):
+        """Счётчики по дням обновляются при изменении, удалении и совпадают с JSON-хранилищем."""
+        note = self.storage.get_note(1)
+        note.content = "Молоко"
+        self.storage.save_note(note)
+        self.storage.delete_note(2)
+
+        stats = self.storage.note_stats()
+        self.assertEqual(stats.total, 2)
+        self.assertEqual(stats.by('month'), {'2024-01': (1, 12), '2024-02': (1, 28)})
+        self.assertEqual(stats.by('year'), {'2024': (2, 40)})
+        self.assertEqual((stats.first, stats.last), ('2024-01-01T10:00:00', '2024-02-01T10:00:00'))
+
+        self.storage.mirror.load()
+        self.assertEqual(self.storage.stats_index.days(), stats.days)
+
+    def test_note_stats_use_local_days(self):
+        """Заметка с часовым поясом считается в местный день, как в JSON-хранилище."""
+        with local_timezone('Asia/Kolkata'):
+            self.storage.save_note(Note("Из базы", "Текст", created_at='2024-03-01T20:00:00+00:00'))
+            stats = self.storage.note_stats()
+            self.storage.mirror.load()
+            self.assertEqual(self.storage.stats_index.days(), stats.days)
+        self.assertEqual(stats.by('day')['2024-03-02'], (1, 10))
+
+    def test_note_stats_with_utc_days_are_recounted(self):
+        """Счётчики прежней версии (день из строки даты) пересчитываются при подключении."""
+        cursor = self.storage.db.get_connection().cursor()
+        cursor.execute("DROP TRIGGER notes_stats_insert")
+        cursor.execute("CREATE TRIGGER notes_stats_insert AFTER INSERT ON notes BEGIN "
+                       "INSERT INTO notes_daily_stats (day, notes, content_bytes) "
+                       "VALUES (substr(new.created_at, 1, 10), 1, 0); END")
+        cursor.execute("DELETE FROM notes_daily_stats")
+        self.storage.db._init_db()
+
+        self.assertEqual(self.storage.note_stats().total, 3)
+
+    def test_note_stats_filled_for_existing_notes(self):
+        """Таблица счётчиков, созданная в базе с заметками, заполняется по ним."""
+        cursor = self.storage.db.get_connection().cursor()
+        cursor.execute("DROP TABLE notes_daily_stats")
+        for event in ('insert', 'update', 'delete'):
+            cursor.execute(f"DROP TRIGGER notes_stats_{event}")
+        self.storage.db._init_db()
+
+        self.assertEqual(self.storage.note_stats().by('day'),
+                         {'2024-01-01': (1, 24), '2024-01-02': (1, 30), '2024-02-01': (1, 28)})
+
+    def test_offline_notes_moved_to_database(self):
+        """Заметка, созданная без базы данных, получает временный ID, а потом - ID из базы."""
+        with patch.object(self.storage, '_insert_new', side_effect=sqlite3.OperationalError("database is locked")), \
+                patch('sys.stdout', new_callable=io.StringIO):
+            note, = self.storage.save_many([Note("Без базы", "Текст")])
+        self.assertEqual(note.id, -1)
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            notes = self.storage.get_all_notes()
+
+        self.assertEqual([n.id for n in notes if n.title == "Без базы"], [4])
+        self.assertEqual(sorted(self.storage.mirror.load()), [1, 2, 3, 4])
+        self.assertEqual(self.storage.journal.temporary_ids(), [])
+        self.assertEqual(self.storage.save_note(Note("Новая", "Текст")).id, 5)
+
+    def test_changes_since(self):
+        """Лента выдаёт изменения после номера, удаления - надгробиями; неизменённая заметка номер не получает."""
+        first = self.storage.changes_since()
+        self.assertEqual([change.note_id for change in first.changes], [1, 2, 3])
+        self.assertEqual(first.source, 'database')
+
+        note = self.storage.get_note(1)
+        self.storage.save_note(note)
+        note.content = "Кефир"
+        self.storage.save_note(note)
+        self.storage.delete_note(2)
+        self.storage.save_note(self.storage.get_note(3))
+
+        changes = self.storage.changes_since(first.last_seq)
+        self.assertEqual([(change.note_id, change.deleted) for change in changes.changes],
+                         [(1, False), (2, True)])
+        self.assertEqual(changes.notes[0].content, "Кефир")
+        self.assertIsNotNone(changes.changes[1].updated_at)
+        self.assertEqual(len(self.storage.changes_since(first.last_seq, limit=1).changes), 1)
+        self.assertEqual(self.storage.changes_since(changes.last_seq).changes, [])
+
+    def test_changes_columns_added_to_existing_notes(self):
+        """В базе прежней версии заметки получают номер и updated_at при открытии."""
+        cursor = self.storage.db.get_connection().cursor()
+        cursor.execute("DROP TABLE notes_tombstones")
+        for trigger in ('notes_change_insert', 'notes_change_update', 'notes_change_delete'):
+            cursor.execute(f"DROP TRIGGER {trigger}")
+        cursor.execute("DROP INDEX notes_change_seq_idx")
+        cursor.execute("ALTER TABLE notes DROP COLUMN change_seq")
+        cursor.execute("ALTER TABLE notes DROP COLUMN updated_at")
+        self.storage.db._init_db()
+
+        changes = self.storage.changes_since()
+        self.assertEqual([change.seq for change in changes.changes], [1, 2, 3])
+        self.assertEqual(changes.changes[0].updated_at, '2024-01-01T10:00:00')
+        self.storage.delete_note(3)
+        self.assertEqual(self.storage.changes_since(3).deleted, [3])
+
+    def test_import_batch_keep_ids(self):
+        """С keep_ids ID сохраняются, повторы пропускаются, новые ID идут после загруженных."""
+        notes = [Note("Повтор", "Текст", id=2, created_at='2024-03-01T10:00:00'),
+                 Note("Из выгрузки", "Текст", id=10, created_at='2024-03-02T10:00:00')]
+
+        saved = self.storage.import_batch(notes, keep_ids=True)
+        new_note = self.storage.save_note(Note("Новая", "Текст"))
+
+        self.assertEqual([note.id for note in saved], [10])
+        self.assertEqual(self.storage.get_note(2).title, "Работа")
+        self.assertEqual(self.storage.get_note(10).title, "Из выгрузки")
+        self.assertEqual(new_note.id, 11)
+        self.assertEqual(self.storage.mirror.load()[10]['title'], "Из выгрузки")
+
+    def test_cache_without_notifications(self):
+        """Кэш поверх SQLite не подписывается на уведомления и не предупреждает об этом."""
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            cached = CachedNoteStorage(self.storage)
+
+        self.assertIsNone(cached._listener)
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertEqual(len(cached.get_all_notes()), 3)
+
+    def test_create_storage_from_env(self):
+        """Хранилище выбирается переменной окружения NOTES_BACKEND."""
+        env = {'NOTES_BACKEND': 'sqlite', 'NOTES_SQLITE_PATH': self.path('other.db')}
+        with patch.dict(os.environ, env), patch('sys.stdout', new_callable=io.StringIO):
+            storage = create_storage(self.path('other.json'))
+        storage.close()
+
+        self.assertIsInstance(storage, SQLiteNoteStorage)
+        self.assertEqual(storage.db.path, self.path('other.db'))
+        with self.assertRaises(ValueError):
+            create_storage(backend='mysql')
+
+
+if __name__ == '__main__':
+    unittest.main()
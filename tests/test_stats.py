@@ -0,0 +1,102 @@
+"""
+Тесты для статистики заметок.
+"""
+
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook.journal import NoteJournal
+from notebook.parallel import build_indexes
+from notebook.records import RecordReader, write_records
+from notebook.stats import NoteStats, StatsIndex, local_day
+from tests.helpers import TempDirTestCase, local_timezone, make_note
+
+
+
+class TestStats(TempDirTestCase):
+    """Тесты для NoteStats и StatsIndex."""
+
+    def test_periods(self):
+        """Месяцы и годы складываются из дней."""
+        stats = NoteStats({'2025-01-02': (1, 3), '2024-12-31': (2, 5), '2024-12-01': (1, 1)})
+
+        self.assertEqual((stats.total, stats.content_bytes), (4, 9))
+        self.assertEqual(list(stats.days), ['2024-12-01', '2024-12-31', '2025-01-02'])
+        self.assertEqual(stats.by('month'), {'2024-12': (3, 6), '2025-01': (1, 3)})
+        self.assertEqual(stats.by('year'), {'2024': (3, 6), '2025': (1, 3)})
+        with self.assertRaises(ValueError):
+            stats.by('week')
+
+    def test_local_day(self):
+        """Дата с часовым поясом переводится в местный день, дата без пояса уже местная."""
+        with local_timezone('Asia/Kolkata'):
+            self.assertEqual(local_day('2024-03-01T20:00:00+00:00'), '2024-03-02')
+            self.assertEqual(local_day('2024-03-01T23:30:00'), '2024-03-01')
+
+            stats = NoteStats.from_buckets([
+                (datetime(2024, 3, 1, 18, 15, tzinfo=timezone.utc), 1, 3),
+                (datetime(2024, 3, 1, 18, 30, tzinfo=timezone.utc), 2, 5),
+                (datetime(2024, 3, 1, 18, 45, tzinfo=timezone.utc), 1, 1),
+            ])
+        self.assertEqual(stats.days, {'2024-03-01': (1, 3), '2024-03-02': (3, 6)})
+
+    def test_index_follows_changes(self):
+        """Изменение заметки переносит её счётчики, удаление - вычитает, пустой день исчезает."""
+        index = StatsIndex(self.path + '.stats')
+        index.add(make_note(1, content='Молоко'))
+        index.add(make_note(2, created_at='2024-01-01T12:00:00'))
+        index.add(make_note(1, content='Хлеб', created_at='2024-01-02T10:00:00'))
+
+        self.assertEqual(index.days(), {'2024-01-01': (1, 10), '2024-01-02': (1, 8)})
+        index.remove(2)
+        index.remove(3)
+        self.assertEqual(index.days(), {'2024-01-02': (1, 8)})
+
+    def test_parallel_build_and_journal(self):
+        """Счётчики строятся по частям, ведутся журналом и сохраняются рядом с notes.json."""
+        notes = [make_note(note_id, created_at=f"2024-0{note_id % 3 + 1}-01T10:00:00") for note_id in range(1, 31)]
+        records_path = self.path + '.records'
+        write_records(records_path, notes, (0, 0))
+        sequential, parallel = StatsIndex('a'), StatsIndex('b')
+        build_indexes(RecordReader(records_path), [sequential], workers=1)
+        build_indexes(RecordReader(records_path), [parallel], workers=2, min_records=0)
+        self.assertEqual(parallel.days(), sequential.days())
+
+        index = StatsIndex(self.path + '.stats')
+        journal = NoteJournal(self.path, indexes=[index])
+        journal.put_many(notes)
+        journal.delete(1)
+        journal.compact()
+
+        reloaded = StatsIndex(self.path + '.stats')
+        NoteJournal(self.path, indexes=[reloaded]).load()
+        self.assertTrue(os.path.exists(self.path + '.stats'))
+        self.assertEqual(reloaded.days(), index.days())
+        self.assertEqual(NoteStats(reloaded.days()).total, 29)
+
+    def test_index_with_utc_days_is_rebuilt(self):
+        """Файл счётчиков прежней версии (день из строки даты) строится заново."""
+        notes = [make_note(1, created_at='2024-03-01T20:00:00+00:00')]
+        journal = NoteJournal(self.path, indexes=[StatsIndex(self.path + '.stats')])
+        journal.put_many(notes)
+        journal.compact()
+        with open(self.path + '.stats', encoding='utf-8') as f:
+            data = json.load(f)
+        del data['days']
+        data['notes'] = [[1, '2024-03-01', 10]]
+        with open(self.path + '.stats', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        with local_timezone('Asia/Kolkata'):
+            index = StatsIndex(self.path + '.stats')
+            NoteJournal(self.path, indexes=[index]).load()
+        self.assertEqual(index.days(), {'2024-03-02': (1, 10)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,13 +5,20 @@
 import unittest
 import os
 import sys
+import tempfile
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 
 # Добавляем путь к проекту
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from notebook.storage import NoteStorage
+import psycopg2
+
+from notebook import database
+from notebook.database import ConnectionPool, Database
+from notebook.storage import NoteStorage, page_cursor
 from notebook.models import Note
+from tests.helpers import TempDirTestCase
 
 class TestNoteStoragePostgreSQL(unittest.TestCase):
     """Тесты для класса NoteStorage с PostgreSQL (с использованием моков)."""
@@ -34,11 +41,16 @@ class TestNoteStoragePostgreSQL(unittest.TestCase):
         self.mock_database_class.return_value = self.mock_database_instance
         self.mock_database_instance.get_connection.return_value = self.mock_connection
         
-        self.storage = NoteStorage()
+        # JSON-хранилище во временной папке, чтобы не трогать notes.json проекта
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with patch('sys.stdout'):
+            self.storage = NoteStorage(os.path.join(self.tmpdir.name, 'notes.json'))
     
     def tearDown(self):
         """Очистка после каждого теста."""
+        self.storage.close()
         self.db_patcher.stop()
+        self.tmpdir.cleanup()
     
     def test_save_note(self):
         """Тест сохранения заметки."""
@@ -108,9 +120,265 @@ class TestNoteStoragePostgreSQL(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].title, 'Python программирование')
         self.mock_cursor.execute.assert_called_with(
-            "SELECT id, title, content, created_at FROM notes WHERE title ILIKE %s OR content ILIKE %s ORDER BY created_at DESC",
-            ('%Python%', '%Python%')
+            "SELECT id, title, content, created_at FROM notes, "
+            "(SELECT to_tsquery('russian', %s) || to_tsquery('english', %s)) AS q (query) "
+            "WHERE search_vector @@ query "
+            "ORDER BY ts_rank(search_vector, query) DESC, created_at DESC",
+            ['python:*', 'python:*']
         )
 
+    def test_get_all_notes_with_date_filter(self):
+        """Тест фильтрации по дате на стороне базы данных."""
+        # Arrange
+        self.mock_cursor.fetchall.return_value = []
+        
+        # Act
+        self.storage.get_all_notes(date_filter='2024-01')
+        
+        # Assert
+        sql, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("WHERE created_at >= %s AND created_at < %s", sql)
+        # Границы - местное время с поясом, а не в поясе сессии сервера
+        self.assertEqual(params, [datetime(2024, 1, 1).astimezone(), datetime(2024, 2, 1).astimezone()])
+        self.assertTrue(all(p.tzinfo is not None for p in params))
+    
+    def test_filter_notes_by_date(self):
+        """Тест фильтрации уже полученного списка заметок."""
+        # Arrange
+        notes = [Note.from_db_row((1, 'A', 'a', '2024-01-31T23:00:00')),
+                 Note.from_db_row((2, 'B', 'b', '2024-02-01T00:00:00'))]
+        
+        # Act
+        filtered = self.storage.filter_notes_by_date(notes, '2024-01')
+        
+        # Assert
+        self.assertEqual([note.id for note in filtered], [1])
+
+    def test_iter_notes_keyset_page(self):
+        """Тест постраничного чтения серверным курсором."""
+        # Arrange
+        self.mock_cursor.closed = False
+        self.mock_cursor.__iter__.return_value = iter([
+            (4, 'Заметка 4', 'Содержание 4', '2024-01-01T09:00:00')
+        ])
+        order = MagicMock()
+        order.attach_mock(self.mock_cursor.close, 'close')
+        order.attach_mock(self.mock_connection.commit, 'commit')
+        
+        # Act
+        notes = list(self.storage.iter_notes(limit=1, after='2024-01-01T10:00:00,5'))
+        
+        # Assert
+        self.assertEqual([note.id for note in notes], [4])
+        self.assertEqual([name for name, _, _ in order.mock_calls][:2], ['close', 'commit'])
+        self.mock_connection.cursor.assert_called_with(name='notes_stream')
+        sql, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("WHERE (created_at, id) < (%s::timestamptz, %s)", sql)
+        self.assertTrue(sql.endswith("ORDER BY created_at DESC, id DESC LIMIT %s"))
+        self.assertEqual(params, ['2024-01-01T10:00:00', 5, 1])
+    
+    def test_iter_notes_json_fallback(self):
+        """Тест постраничного чтения из JSON-хранилища без базы данных."""
+        # Arrange
+        with tempfile.TemporaryDirectory() as tmpdir:
+            storage = NoteStorage(os.path.join(tmpdir, 'notes.json'))
+            for note_id in range(1, 6):
+                storage.journal.put({'id': note_id, 'title': f'Заметка {note_id}',
+                                     'content': 'Текст',
+                                     'created_at': f'2024-01-0{note_id}T10:00:00'})
+            self.mock_cursor.execute.side_effect = Exception("нет соединения")
+            
+            # Act
+            with patch('sys.stdout'):
+                first_page = list(storage.iter_notes(limit=2))
+                second_page = list(storage.iter_notes(limit=2, after=page_cursor(first_page[-1])))
+            storage.close()
+        
+        # Assert
+        self.assertEqual([note.id for note in first_page], [5, 4])
+        self.assertEqual([note.id for note in second_page], [3, 2])
+
+    def test_import_batch_uses_copy(self):
+        """Тест загрузки пачки заметок через COPY."""
+        # Arrange
+        self.mock_cursor.fetchall.return_value = [
+            (10, 'A', 'a', '2024-01-01T10:00:00'),
+            (11, 'B', 'b', '2024-01-02T10:00:00'),
+        ]
+        
+        # Act
+        saved = self.storage.import_batch([Note('A', 'a'), Note('B', 'b')])
+        
+        # Assert
+        self.assertEqual([note.id for note in saved], [10, 11])
+        sql, buffer = self.mock_cursor.copy_expert.call_args[0]
+        self.assertTrue(sql.startswith("COPY notes_import"))
+        self.assertEqual(len(buffer.getvalue().splitlines()), 2)
+        self.mock_connection.commit.assert_called()
+
+    @patch('notebook.storage.execute_values')
+    def test_save_many_single_transaction(self, mock_execute_values):
+        """Тест пакетного сохранения заметок."""
+        # Arrange
+        mock_execute_values.return_value = [(21,), (22,)]
+        existing = Note('Старая', 'Текст')
+        existing.id = 5
+        
+        # Act
+        saved = self.storage.save_many([Note('A', 'a'), existing, Note('B', 'b')])
+        
+        # Assert
+        self.assertEqual([note.id for note in saved], [21, 5, 22])
+        self.assertEqual(mock_execute_values.call_count, 2)
+        insert_sql = mock_execute_values.call_args_list[0][0][1]
+        self.assertIn("RETURNING id", insert_sql)
+        self.mock_connection.commit.assert_called_once()
+    
+    def test_delete_many(self):
+        """Тест пакетного удаления заметок."""
+        # Arrange
+        self.mock_cursor.fetchall.return_value = [(1,), (3,)]
+        
+        # Act
+        deleted = self.storage.delete_many([1, 2, 3])
+        
+        # Assert
+        self.assertEqual(deleted, [1, 3])
+        self.mock_cursor.execute.assert_called_with(
+            "DELETE FROM notes WHERE id = ANY(%s) RETURNING id", ([1, 2, 3],)
+        )
+
+    def test_get_note(self):
+        """Тест получения одной заметки по ID."""
+        # Arrange
+        self.mock_cursor.fetchone.return_value = (5, "Тест", "Текст", "2024-01-01T10:00:00")
+        
+        # Act
+        note = self.storage.get_note(5)
+        
+        # Assert
+        self.assertEqual(note.id, 5)
+        self.mock_cursor.execute.assert_called_with(
+            "SELECT id, title, content, created_at FROM notes WHERE id = %s", (5,)
+        )
+
+    def test_changes_since(self):
+        """Тест ленты изменений: заметки и надгробия одним запросом после номера."""
+        # Arrange
+        self.mock_cursor.fetchall.return_value = [
+            (11, 1, 'Заметка', 'Текст', '2024-01-01T10:00:00', '2024-01-02T10:00:00', False),
+            (12, 2, None, None, None, '2024-01-03T10:00:00', True),
+        ]
+        
+        # Act
+        changes = self.storage.changes_since(10, limit=5)
+        
+        # Assert
+        sql, params = self.mock_cursor.execute.call_args[0]
+        self.assertIn("FROM notes_tombstones, horizon WHERE change_xid > %s::text::xid8 "
+                      "AND change_xid < horizon.xmin", sql)
+        self.assertTrue(sql.endswith("ORDER BY 1 FETCH FIRST %s ROWS WITH TIES"))
+        self.assertEqual(params, [10, 10, 5])
+        self.assertEqual((changes.last_seq, changes.source, changes.deleted), (12, 'database', [2]))
+        self.assertEqual(changes.notes[0].title, 'Заметка')
+        self.assertEqual(changes.changes[0].updated_at, '2024-01-02T10:00:00')
+    
+    def test_changes_since_json_fallback(self):
+        """Тест ленты изменений JSON-хранилища без базы данных."""
+        # Arrange
+        self.storage.journal.put({'id': 1, 'title': 'Заметка', 'content': 'Текст',
+                                  'created_at': '2024-01-01T10:00:00'})
+        self.storage.journal.delete(1)
+        self.storage.journal.put({'id': 2, 'title': 'Другая', 'content': 'Текст',
+                                  'created_at': '2024-01-02T10:00:00'})
+        self.mock_cursor.execute.side_effect = Exception("нет соединения")
+        
+        # Act
+        with patch('sys.stdout'):
+            changes = self.storage.changes_since()
+        
+        # Assert
+        self.assertEqual(changes.source, 'json')
+        self.assertTrue(changes.complete)
+        self.assertEqual([(change.note_id, change.deleted) for change in changes.changes],
+                         [(1, True), (2, False)])
+        self.assertIsNotNone(changes.changes[1].updated_at)
+    
+    def test_listeners_notified(self):
+        """Тест уведомления подписчиков о сохранении и удалении."""
+        # Arrange
+        listener = MagicMock()
+        self.storage.add_listener(listener)
+        self.mock_cursor.fetchone.return_value = (1,)
+        self.mock_cursor.rowcount = 1
+        
+        # Act
+        note = self.storage.save_note(Note("Тест", "Текст"))
+        self.storage.delete_note(note.id)
+        
+        # Assert
+        listener.on_saved.assert_called_once_with([note])
+        listener.on_deleted.assert_called_once_with([1])
+
+
+class TestNoteStorageWithoutConnection(TempDirTestCase):
+    """Тесты для NoteStorage, когда к базе данных нельзя подключиться."""
+    
+    def setUp(self):
+        """Создаёт хранилище, пул которого не может открыть ни одного подключения."""
+        super().setUp()
+        database._pools.clear()
+        database._schema_ready.clear()
+        self.connect_patcher = patch.object(ConnectionPool, '_connect',
+                                            side_effect=psycopg2.OperationalError("connection refused"))
+        self.connect = self.connect_patcher.start()
+        # Пул создаётся без подключений, поэтому ошибку выбрасывает pool.getconn
+        self.env_patcher = patch.dict(os.environ, {'DB_POOL_MIN': '0'})
+        self.env_patcher.start()
+        self.storage = NoteStorage(self.path, flush_interval=0, db=Database(dbname='notes_db'))
+    
+    def tearDown(self):
+        """Закрывает хранилище и снимает подмену."""
+        self.storage.close()
+        self.connect_patcher.stop()
+        self.env_patcher.stop()
+        database._pools.clear()
+        database._schema_ready.clear()
+        super().tearDown()
+    
+    def test_offline_note_gets_temporary_id(self):
+        """Новая заметка сохраняется в JSON-хранилище с временным ID и читается оттуда."""
+        with patch('sys.stdout'):
+            note = self.storage.save_note(Note("Без базы", "Текст", created_at='2024-01-01T10:00:00'))
+            notes = self.storage.get_all_notes()
+            found = self.storage.get_note(-1)
+        
+        self.assertEqual(note.id, -1)
+        self.assertEqual([n.title for n in notes], ["Без базы"])
+        self.assertEqual(found.title, "Без базы")
+        self.assertEqual(self.storage.journal.temporary_ids(), [-1])
+        self.assertIsNone(getattr(self.storage.db._local, 'connection', None))
+    
+    @patch('notebook.storage.execute_values', return_value=[(7,)])
+    def test_offline_note_moved_when_database_returns(self, mock_execute_values):
+        """Когда подключение снова открывается, заметка получает ID из базы данных."""
+        with patch('sys.stdout'):
+            self.storage.save_note(Note("Без базы", "Текст"))
+        conn = MagicMock()
+        conn.closed = 0
+        conn.get_transaction_status.return_value = 0
+        conn.cursor.return_value.fetchall.return_value = []
+        self.connect.side_effect = None
+        self.connect.return_value = conn
+        database._schema_ready.add(self.storage.db._key)
+        self.storage._offline_retry_at = 0
+        
+        with patch('sys.stdout'):
+            self.storage.get_all_notes()
+        
+        self.assertEqual(sorted(self.storage.mirror.load()), [7])
+        self.assertEqual(self.storage.journal.temporary_ids(), [])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+Тесты для массового импорта и экспорта заметок.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notebook import transfer
+from notebook.storage import NoteStorage
+
+
+class TestTransfer(unittest.TestCase):
+    """Тесты для модуля transfer на JSON-хранилище (база данных недоступна)."""
+
+    def setUp(self):
+        """Создаёт хранилище во временной папке с недоступной базой данных."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_patcher = patch('notebook.storage.Database')
+        mock_database = self.db_patcher.start()
+        self.mock_cursor = MagicMock()
+        self.mock_cursor.execute.side_effect = Exception("нет соединения")
+        self.mock_cursor.copy_expert.side_effect = Exception("нет соединения")
+        mock_database.return_value.get_connection.return_value.cursor.return_value = self.mock_cursor
+        self.stdout_patcher = patch('sys.stdout', new_callable=io.StringIO)
+        self.stdout_patcher.start()
+        self.storage = NoteStorage(self.path('notes.json'))
+
+    def tearDown(self):
+        """Снимает подмены и удаляет временную папку."""
+        self.storage.close()
+        self.stdout_patcher.stop()
+        self.db_patcher.stop()
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        """Путь к файлу во временной папке."""
+        return os.path.join(self.tmpdir.name, name)
+
+    def write_jsonl(self, name, count):
+        """Создаёт JSONL-файл с заметками."""
+        with open(self.path(name), 'w', encoding='utf-8') as f:
+            for number in range(1, count + 1):
+                f.write(json.dumps({'title': f'Заметка {number}', 'content': 'Текст',
+                                    'created_at': f'2024-01-{number:02d}T10:00:00'}) + '\n')
+        return self.path(name)
+
+    def test_import_in_batches(self):
+        """Импорт пачками присваивает ID и сохраняет даты."""
+        count = transfer.import_notes(self.storage, self.write_jsonl('in.jsonl', 5), batch_size=2)
+
+        notes = self.storage.get_all_notes()
+        self.assertEqual(count, 5)
+        self.assertEqual([note.id for note in notes], [-5, -4, -3, -2, -1])
+        self.assertEqual(notes[0].created_at, '2024-01-05T10:00:00')
+
+    def test_resume_skips_imported_records(self):
+        """Прерванный импорт продолжается с сохранённой позиции."""
+        source = self.write_jsonl('in.jsonl', 5)
+        with open(source + '.progress', 'w') as f:
+            json.dump({'done': 3}, f)
+
+        count = transfer.import_notes(self.storage, source)
+
+        self.assertEqual(count, 2)
+        self.assertFalse(os.path.exists(source + '.progress'))
+
+    def test_export_round_trip(self):
+        """Экспорт в CSV и notes.json читается обратно импортом."""
+        transfer.import_notes(self.storage, self.write_jsonl('in.jsonl', 3))
+
+        for name in ('out.csv', 'out.json'):
+            self.assertEqual(transfer.export_notes(self.storage, self.path(name)), 3)
+            records = list(transfer.read_records(self.path(name), transfer.detect_format(name)))
+            self.assertEqual([r['title'] for r in records],
+                             ['Заметка 3', 'Заметка 2', 'Заметка 1'])
+
+        with open(self.path('out.json'), encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_pg_timestamp_is_normalized(self):
+        """Даты из CSV, выгруженного через COPY, приводятся к ISO."""
+        with open(self.path('in.csv'), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'title', 'content', 'created_at'])
+            writer.writerow([1, 'A', 'a', '2024-01-01 10:00:00+03'])
+
+        record = next(transfer.read_records(self.path('in.csv'), 'csv'))
+
+        self.assertEqual(record['created_at'], '2024-01-01T10:00:00+03:00')
+
+    def test_keep_ids_skips_existing_notes(self):
+        """С keep_ids заметки с уже известными ID пропускаются, прогресс считает все записи."""
+        self.storage.mirror.put_many([{'id': 2, 'title': 'Своя', 'content': 'Текст',
+                                      'created_at': '2024-01-02T10:00:00'}])
+        source = self.path('in.csv')
+        with open(source, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'title', 'content', 'created_at'])
+            for number in (1, 2, 3):
+                writer.writerow([number, f'Заметка {number}', 'Текст', f'2024-01-0{number} 10:00:00'])
+
+        with patch('notebook.transfer._save_progress') as save_progress:
+            count = transfer.import_notes(self.storage, source, batch_size=2, keep_ids=True)
+
+        save_progress.assert_called_once_with(source + '.progress', 2)
+        self.assertEqual(count, 2)
+        self.assertEqual([note.title for note in self.storage.get_all_notes()],
+                         ['Заметка 3', 'Своя', 'Заметка 1'])
+
+    def test_temporary_ids_are_not_kept(self):
+        """Отрицательные временные ID из notes.json не переносятся."""
+        with open(self.path('in.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'id': -1, 'title': 'A', 'content': 'a'}, {'id': '7', 'title': 'B', 'content': 'b'}], f)
+
+        records = list(transfer.read_records(self.path('in.json'), 'json'))
+
+        self.assertEqual([record['id'] for record in records], [None, 7])
+
+    def test_unknown_format(self):
+        """Неизвестный формат вызывает ValueError."""
+        with self.assertRaises(ValueError):
+            transfer.detect_format('notes.xml')
+
+
+if __name__ == '__main__':
+    unittest.main()